@@ -8,8 +8,11 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from marine_data import IrishMarineDataClient
+from marine_data_v2 import IrishMarineDataClient
+from alerts import AlertEngine, AlertRule, Condition
+from safety import score_grid, best_windows
 from datetime import datetime
+import numpy as np
 
 def example_1_simple_wave_check():
     """Example 1: Check current wave height at a buoy."""
@@ -113,36 +116,35 @@ def example_5_safety_advisor():
     client = IrishMarineDataClient()
     
     # Define what activity you want to do
-    activity = "kayaking"  # Change this to sailing, fishing, swimming, etc.
+    activity = "kayak"  # Or swim, sail, surf
     
-    # Check conditions at nearest buoy (M2 for west coast)
-    data = client.get_wave_buoy_data("M2", hours_back=1)
+    # Score every buoy, hour by hour, over the last day (tide from Galway)
+    buoys = client.get_buoy_series_batch(["M1", "M2", "M3", "M4", "M5", "M6"], hours_back=24)
+    tide = client.get_galway_tide_series(hours_back=24)
+    end = np.datetime64(datetime.utcnow().replace(minute=0, second=0, microsecond=0), 's')
+    hours = end - np.arange(24)[::-1] * np.timedelta64(1, 'h')
+    grid = score_grid(activity, buoys, hours, tide=tide if len(tide) else None)
     
-    if 'latest' in data:
-        waves = data['latest']['wave_height']
-        wind = data['latest']['wind_speed']
-        temp = data['latest']['sea_temperature']
-        
-        print(f"\n🏄 Activity: {activity.upper()}")
-        print(f"📍 Checking conditions at {data['location']}...")
-        print("-" * 40)
-        
-        # Safety scores
-        wave_safe = waves < 1.5
-        wind_safe = wind < 15
-        temp_safe = temp > 10
-        
-        print(f"🌊 Waves: {waves:.1f}m {'✅' if wave_safe else '⚠️'}")
-        print(f"💨 Wind: {wind:.1f}kts {'✅' if wind_safe else '⚠️'}")
-        print(f"🌡️ Water: {temp:.1f}°C {'✅' if temp_safe else '⚠️'}")
-        
-        # Overall recommendation
-        if wave_safe and wind_safe:
-            print(f"\n✅ Conditions look good for {activity}!")
-        elif wave_safe or wind_safe:
-            print(f"\n⚠️ Mixed conditions - be careful if {activity}")
-        else:
-            print(f"\n🚫 Not recommended for {activity} today")
+    print(f"\n🏄 Activity: {activity.upper()}")
+    print("-" * 40)
+    limiting = grid.limiting()
+    for row, station in enumerate(grid.stations):
+        latest = grid.scores[row, -1]
+        if np.isnan(latest):
+            print(f"📍 {station}: no recent readings")
+            continue
+        icon = '✅' if latest >= 70 else '⚠️' if latest >= 40 else '🚫'
+        print(f"📍 {station}: {latest:.0f}/100 {icon} (limited by {limiting[row, -1].replace('_', ' ')})")
+    
+    # Best stretches of good conditions
+    windows = best_windows(grid, min_score=70, min_hours=1, top=3)
+    if windows:
+        print("\n🕐 Best windows:")
+        for window in windows:
+            print(f"  {window.station}: {str(window.start)[11:16]}-{str(window.end)[11:16]} UTC "
+                  f"(avg {window.mean_score:.0f}, min {window.min_score:.0f})")
+    else:
+        print(f"\n🚫 No good window for {activity} in the last day")
 
 def example_6_historical_analysis():
     """Example 6: Analyze trends over time."""
@@ -192,33 +194,30 @@ def example_7_custom_alert():
     
     client = IrishMarineDataClient()
     
-    # Define alert thresholds
+    # Define alert rules - thresholds with hysteresis, so a reading hovering
+    # around the limit doesn't alert over and over
     WAVE_ALERT = 3.0  # meters
     WIND_ALERT = 25   # knots
+    buoys = ["M1", "M2", "M3", "M4", "M5", "M6"]
+    rules = [AlertRule(f"{buoy_id} rough", [
+                 Condition(buoy_id, "wave_height", ">", WAVE_ALERT, clear=WAVE_ALERT - 0.5),
+                 Condition(buoy_id, "wind_speed", ">", WIND_ALERT, clear=WIND_ALERT - 5),
+             ], combine="any") for buoy_id in buoys]
+    engine = AlertEngine(rules)
     
     print(f"\n🚨 Checking for alerts (waves >{WAVE_ALERT}m, wind >{WIND_ALERT}kts)...")
     print("-" * 40)
     
-    alerts_found = False
+    # One request for all buoys; a long-running service would keep the
+    # engine and feed it each new poll (only new readings are evaluated)
+    alerts = engine.update_many(client.get_buoy_series_batch(buoys, hours_back=3).values())
     
-    # Check all buoys
-    for buoy_id in ["M1", "M2", "M3", "M4", "M5", "M6"]:
-        data = client.get_wave_buoy_data(buoy_id, hours_back=1)
-        
-        if 'latest' in data:
-            waves = data['latest']['wave_height']
-            wind = data['latest']['wind_speed']
-            
-            if waves > WAVE_ALERT or wind > WIND_ALERT:
-                alerts_found = True
-                print(f"\n⚠️ ALERT at {buoy_id} ({data['location']}):")
-                
-                if waves > WAVE_ALERT:
-                    print(f"   🌊 High waves: {waves:.1f}m")
-                if wind > WIND_ALERT:
-                    print(f"   💨 Strong wind: {wind:.1f} kts")
+    for alert in alerts:
+        print(f"\n⚠️ ALERT: {alert.rule} ({alert.kind} at {alert.time})")
+        for name, value in alert.values.items():
+            print(f"   {name}: {value:.1f}")
     
-    if not alerts_found:
+    if not alerts:
         print("\n✅ No alerts - all locations within safe limits")
 
 def main():
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Declarative alerts over buoy and tide readings.
+Rules are compiled once into NumPy arrays. Each update evaluates only the
+readings that are new since the last one, for every condition at once, and
+reports an alert when a rule starts or stops matching.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from series import ObservationSeries, SERIES_TYPES
+
+# Comparison -> (direction, strict)
+OPERATORS = {'>': (1, True), '>=': (1, False), '<': (-1, True), '<=': (-1, False)}
+
+
+class Condition(NamedTuple):
+    """
+    One test on one station's variable.
+
+    With rate_minutes set, the test is on the rate of change in units per
+    hour over that many minutes instead of on the value itself.
+    """
+    station: str
+    variable: str
+    op: str
+    threshold: float
+    clear: Optional[float] = None       # hysteresis: stays true until the value passes this
+    sustained_minutes: float = 0        # must hold this long before it counts
+    rate_minutes: Optional[float] = None
+    dataset: Optional[str] = None       # inferred from the variable if None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Condition":
+        """Build from a JSON-friendly dict with the same keys."""
+        return cls(**data)
+
+
+class AlertRule(NamedTuple):
+    """
+    Conditions combined with "all" or "any", possibly across stations.
+
+    Example:
+        >>> AlertRule("Storm swell", [
+        ...     Condition("M2", "wave_height", ">", 4.0, clear=3.5, sustained_minutes=60),
+        ...     Condition("Galway Port", "water_level", ">", 0.5, rate_minutes=60),
+        ... ])
+    """
+    name: str
+    conditions: Sequence[Condition]
+    combine: str = "all"                # "all" or "any"
+    cooldown_minutes: float = 0         # no new trigger this soon after the last
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AlertRule":
+        """Build from a JSON-friendly dict; conditions may be dicts too."""
+        conditions = [c if isinstance(c, Condition) else Condition.from_dict(c) for c in data['conditions']]
+        return cls(data['name'], conditions, data.get('combine', 'all'), data.get('cooldown_minutes', 0))
+
+
+class Alert(NamedTuple):
+    """A rule starting ("triggered") or stopping ("cleared") matching."""
+    rule: str
+    kind: str
+    time: np.datetime64                 # the reading the rule changed at
+    values: Dict[str, float]            # "station.variable" (or ".../h" for rates) -> value then
+
+
+class AlertEngine:
+    """
+    Evaluates many AlertRules incrementally.
+
+    Identical conditions are shared between rules, and conditions on the
+    same signal (station, variable, value or rate) are evaluated together
+    as one array operation over the new readings. Every new reading passes
+    through the hysteresis and sustained-window tests, and rules are
+    re-combined at every reading where a condition changes, so nothing
+    between updates is skipped: an episode that starts and ends within one
+    batch is still reported. A condition whose station has not reported
+    for max_age_minutes counts as false.
+
+    Example:
+        >>> engine = AlertEngine(rules)
+        >>> for series in collector.snapshot().values():   # after each poll
+        ...     for alert in engine.update(series):
+        ...         notify(alert)
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], max_age_minutes: float = 180):
+        """
+        Compile rules.
+
+        Args:
+            rules: AlertRules (names must be unique)
+            max_age_minutes: Readings older than this no longer satisfy a condition
+        """
+        self.rules = list(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Alert rule names must be unique")
+        self.max_age = int(max_age_minutes * 60)
+
+        conditions: Dict[Condition, int] = {}
+        rule_conditions: List[List[int]] = []
+        for rule in self.rules:
+            if rule.combine not in ("all", "any"):
+                raise ValueError(f"Rule '{rule.name}': combine must be 'all' or 'any'")
+            if not rule.conditions:
+                raise ValueError(f"Rule '{rule.name}' has no conditions")
+            rule_conditions.append([conditions.setdefault(_normalise(c), len(conditions))
+                                    for c in rule.conditions])
+        self.conditions = list(conditions)
+
+        # Signals: (dataset, station, variable, rate_minutes), each feeding a block of conditions
+        signals: Dict[Tuple, List[int]] = {}
+        for i, c in enumerate(self.conditions):
+            signals.setdefault((c.dataset, c.station, c.variable, c.rate_minutes), []).append(i)
+        self._signals = {key: np.array(indices) for key, indices in signals.items()}
+        self._station_signals: Dict[Tuple[str, str], List[Tuple]] = {}
+        for key in self._signals:
+            self._station_signals.setdefault(key[:2], []).append(key)
+
+        count = len(self.conditions)
+        self._direction = np.array([OPERATORS[c.op][0] for c in self.conditions], dtype=np.float64)
+        self._strict = np.array([OPERATORS[c.op][1] for c in self.conditions])
+        self._threshold = np.array([c.threshold for c in self.conditions], dtype=np.float64)
+        self._clear = np.array([c.threshold if c.clear is None else c.clear for c in self.conditions],
+                               dtype=np.float64)
+        self._sustained = np.array([c.sustained_minutes * 60 for c in self.conditions], dtype=np.float64)
+
+        # Condition state, carried from one update to the next
+        self._latched = np.zeros(count, dtype=bool)      # past threshold (with hysteresis)
+        self._run_start = np.zeros(count, dtype=np.int64)  # when the latch last switched on
+        self._holds = np.zeros(count, dtype=bool)        # latched for long enough
+        self._time = np.full(count, np.iinfo(np.int64).min // 2, dtype=np.int64)
+        self._value = np.full(count, np.nan)
+
+        # Rules as a flat list of condition indices, split by offsets
+        self._rule_flat = np.concatenate([np.array(indices) for indices in rule_conditions]) \
+            if rule_conditions else np.zeros(0, dtype=np.int64)
+        self._rule_offsets = np.cumsum([0] + [len(indices) for indices in rule_conditions[:-1]]) \
+            if rule_conditions else np.zeros(0, dtype=np.int64)
+        self._rule_sizes = np.array([len(indices) for indices in rule_conditions])
+        self._rule_any = np.array([rule.combine == "any" for rule in self.rules])
+        self._cooldown = np.array([rule.cooldown_minutes * 60 for rule in self.rules], dtype=np.float64)
+        self._active = np.zeros(len(self.rules), dtype=bool)
+        self._notified = np.zeros(len(self.rules), dtype=bool)   # a "triggered" alert is outstanding
+        self._last_trigger = np.full(len(self.rules), -np.inf)
+        # Condition blocks evaluated during the current update: (indices, times, holds, signal)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+
+        # Per station: newest reading seen, and recent readings kept for rates
+        self._last_seen: Dict[Tuple[str, str], int] = {}
+        self._history: Dict[Tuple[str, str], Tuple[np.ndarray, Dict[str, np.ndarray]]] = {}
+        self._history_span: Dict[Tuple[str, str], int] = {}
+        for key in self._signals:
+            if key[3] is not None:
+                station = key[:2]
+                self._history_span[station] = max(self._history_span.get(station, 0), int(key[3] * 60 * 2))
+
+    def update(self, series: ObservationSeries) -> List[Alert]:
+        """Feed one station's readings (old ones are ignored) and return new alerts."""
+        return self.update_many([series])
+
+    def update_many(self, batch: Iterable[ObservationSeries]) -> List[Alert]:
+        """
+        Feed several stations' readings, then evaluate the rules over them.
+
+        Returns:
+            Alerts for rules that started or stopped matching, oldest first
+        """
+        before = (self._holds.copy(), self._time.copy(), self._value.copy())
+        self._pending = []
+        newest = None
+        for series in batch:
+            seen = self._ingest(series)
+            if seen is not None:
+                newest = seen if newest is None else max(newest, seen)
+        if newest is None:
+            return []
+        try:
+            return self._evaluate_rules(newest, *before)
+        finally:
+            self._pending = []
+
+    def active(self) -> List[str]:
+        """Names of the rules currently matching."""
+        return [rule.name for rule, on in zip(self.rules, self._active) if on]
+
+    def _ingest(self, series: ObservationSeries) -> Optional[int]:
+        """Evaluate every condition on a series' new readings; returns the newest time."""
+        station = (series.DATASET, series.station)
+        signal_keys = self._station_signals.get(station)
+        if not signal_keys or not len(series):
+            return None
+        times = series.times.astype('datetime64[s]').astype(np.int64)
+        new = times > self._last_seen.get(station, np.iinfo(np.int64).min)
+        if not new.any():
+            return None
+        times = times[new]
+        values = {name: np.asarray(array, dtype=np.float64)[new] for name, array in series.values.items()}
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        values = {name: array[order] for name, array in values.items()}
+
+        for key in signal_keys:
+            variable, rate_minutes = key[2], key[3]
+            if variable not in values:
+                continue
+            if rate_minutes is None:
+                signal = values[variable]
+            else:
+                signal = self._rates(station, variable, times, values[variable], rate_minutes * 60)
+            self._evaluate_conditions(self._signals[key], times, signal)
+
+        self._last_seen[station] = int(times[-1])
+        self._remember(station, times, values)
+        return int(times[-1])
+
+    def _rates(self, station: Tuple[str, str], variable: str, times: np.ndarray,
+               values: np.ndarray, window: float) -> np.ndarray:
+        """
+        Change per hour from the last reading at least `window` seconds
+        earlier (NaN if there is none within twice the window).
+        """
+        old_times, old_values = self._history.get(station, (np.zeros(0, dtype=np.int64), {}))
+        all_times = np.concatenate([old_times, times])
+        all_values = np.concatenate([old_values.get(variable, np.full(len(old_times), np.nan)), values])
+        valid = np.isfinite(all_values)
+        ref_times, ref_values = all_times[valid], all_values[valid]
+        if not len(ref_times):
+            return np.full(len(times), np.nan)
+        ref = np.searchsorted(ref_times, times - window, side='right') - 1
+        found = ref >= 0
+        ref = np.maximum(ref, 0)
+        gap = (times - ref_times[ref]).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = (values - ref_values[ref]) / gap * 3600
+        rates[~found | (gap > 2 * window)] = np.nan
+        return rates
+
+    def _evaluate_conditions(self, indices: np.ndarray, times: np.ndarray, signal: np.ndarray):
+        """Run a block of conditions (one signal) over new readings: conditions x readings arrays."""
+        direction = self._direction[indices, None]
+        strict = self._strict[indices, None]
+        scaled = direction * signal[None, :]
+        finite = np.isfinite(signal)[None, :]
+
+        def passes(limit):
+            limit = direction * limit[indices, None]
+            return np.where(strict, scaled > limit, scaled >= limit)
+
+        # Latch: on past the threshold, off once back past the clear level, else unchanged
+        switch = np.where(passes(self._threshold), 1, np.where(~passes(self._clear) & finite, 0, -1))
+        columns = np.arange(len(times))
+        last_switch = np.maximum.accumulate(np.where(switch >= 0, columns, -1), axis=1)
+        latched = np.where(last_switch >= 0,
+                           np.take_along_axis(switch, np.maximum(last_switch, 0), axis=1) == 1,
+                           self._latched[indices, None])
+
+        # When did each latched run start? Carry the previous start until a new rising edge
+        previous = np.concatenate([self._latched[indices, None], latched[:, :-1]], axis=1)
+        rising = latched & ~previous
+        last_rise = np.maximum.accumulate(np.where(rising, columns, -1), axis=1)
+        run_start = np.where(last_rise >= 0, times[np.maximum(last_rise, 0)], self._run_start[indices, None])
+        holds = latched & ((times[None, :] - run_start) >= self._sustained[indices, None])
+        self._pending.append((indices, times, holds, signal))
+
+        self._latched[indices] = latched[:, -1]
+        self._run_start[indices] = run_start[:, -1]
+        self._holds[indices] = holds[:, -1]
+        self._time[indices] = times[-1]
+        self._value[indices] = signal[-1]
+
+    def _remember(self, station: Tuple[str, str], times: np.ndarray, values: Dict[str, np.ndarray]):
+        """Keep enough recent readings to compute rates on the next update."""
+        span = self._history_span.get(station)
+        if not span:
+            return
+        old_times, old_values = self._history.get(station, (np.zeros(0, dtype=np.int64), {}))
+        all_times = np.concatenate([old_times, times])
+        keep = all_times >= all_times[-1] - span
+        merged = {}
+        for name, array in values.items():
+            previous = old_values.get(name, np.full(len(old_times), np.nan))
+            merged[name] = np.concatenate([previous, array])[keep]
+        self._history[station] = (all_times[keep], merged)
+
+    def _evaluate_rules(self, now: int, holds: np.ndarray, seen: np.ndarray,
+                        values: np.ndarray) -> List[Alert]:
+        """
+        Combine condition states into rule states and report the changes.
+
+        Rules are evaluated at every time in the update where some
+        condition's holds state changed, and at `now`, from the states
+        the conditions had before the update (holds, seen, values) and
+        the blocks recorded in _pending.
+        """
+        # Times to evaluate at: the edges of every condition, plus now
+        edges = [np.array([now], dtype=np.int64)]
+        for indices, times, block, _ in self._pending:
+            previous = np.concatenate([holds[indices, None], block[:, :-1]], axis=1)
+            edges.append(times[(block != previous).any(axis=0)])
+        when = np.unique(np.concatenate(edges))
+
+        # Each condition's state as of each of those times (conditions x times)
+        state = np.repeat(holds[:, None], len(when), axis=1)
+        reading = np.repeat(seen[:, None], len(when), axis=1)
+        value = np.repeat(values[:, None], len(when), axis=1)
+        for indices, times, block, signal in self._pending:
+            last = np.searchsorted(times, when, side='right') - 1
+            columns = np.flatnonzero(last >= 0)
+            last = last[columns]
+            rows = indices[:, None]
+            state[rows, columns] = block[:, last]
+            reading[rows, columns] = times[last]
+            value[rows, columns] = signal[last]
+
+        satisfied = state & (reading >= when - self.max_age)
+        counts = np.add.reduceat(satisfied[self._rule_flat].astype(np.int64), self._rule_offsets, axis=0)
+        active = np.where(self._rule_any[:, None], counts > 0, counts == self._rule_sizes[:, None])
+
+        # Only times where some rule changes need stepping through
+        previous = np.concatenate([self._active[:, None], active[:, :-1]], axis=1)
+        alerts = []
+        for column in np.flatnonzero((active != previous).any(axis=0)):
+            alerts.extend(self._step_rules(int(when[column]), active[:, column], value[:, column]))
+        return alerts
+
+    def _step_rules(self, now: int, active: np.ndarray, values: np.ndarray) -> List[Alert]:
+        """Move every rule to its state at `now`, reporting starts and ends."""
+        # Report each episode once: a start inside the cooldown is not
+        # reported, and neither is the end of an episode that wasn't
+        started = active & ~self._active
+        triggered = started & (now - self._last_trigger >= self._cooldown)
+        stopped = ~active & self._active & self._notified
+        self._last_trigger[triggered] = now
+        self._notified = (self._notified | triggered) & active
+        self._active = active.copy()
+
+        when = np.datetime64(now, 's')
+        return [Alert(self.rules[i].name, "triggered" if triggered[i] else "cleared", when,
+                      self._rule_values(i, values))
+                for i in np.flatnonzero(triggered | stopped)]
+
+    def _rule_values(self, rule_index: int, values: np.ndarray) -> Dict[str, float]:
+        start = self._rule_offsets[rule_index]
+        labelled = {}
+        for i in self._rule_flat[start:start + self._rule_sizes[rule_index]]:
+            c = self.conditions[i]
+            label = f"{c.station}.{c.variable}" + ("/h" if c.rate_minutes is not None else "")
+            labelled[label] = float(values[i])
+        return labelled
+
+
+def _normalise(condition: Condition) -> Condition:
+    """Check a condition and fill in its dataset."""
+    if condition.op not in OPERATORS:
+        raise ValueError(f"Unknown comparison '{condition.op}' (use one of {', '.join(OPERATORS)})")
+    dataset = condition.dataset
+    if dataset is None:
+        matches = [name for name, series_type in SERIES_TYPES.items()
+                   if condition.variable in series_type.COLUMNS.values()]
+        if not matches:
+            raise ValueError(f"Unknown variable '{condition.variable}'")
+        dataset = matches[0]
+    elif dataset not in SERIES_TYPES:
+        raise ValueError(f"Unknown dataset '{dataset}'")
+    direction = OPERATORS[condition.op][0]
+    if condition.clear is not None and direction * (condition.threshold - condition.clear) < 0:
+        raise ValueError(f"clear level {condition.clear} is past the threshold {condition.threshold}; "
+                         f"it should be on the other side, e.g. > 3.0 clearing below 2.5")
+    if condition.rate_minutes is not None and condition.rate_minutes <= 0:
+        raise ValueError("rate_minutes must be positive")
+    return condition._replace(dataset=dataset, threshold=float(condition.threshold),
+                              clear=None if condition.clear is None else float(condition.clear))
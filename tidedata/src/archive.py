@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local Parquet archive of fetched observations.
+Readings are kept in files per dataset, station and month, so repeated
+analysis of the same months reads local disk instead of ERDDAP.
+Needs the optional pyarrow package.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from series import ObservationSeries, SERIES_TYPES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for the archive
+    pa = pq = None
+
+
+class ObservationArchive:
+    """
+    Partitioned, de-duplicated Parquet files of buoy and tide readings.
+
+    Layout: <directory>/<dataset>/<station>/<YYYY-MM>.parquet, each file
+    holding a `time` column and one float64 column per variable, sorted by
+    time with at most one row per time. Writing a reading that is already
+    archived replaces it.
+
+    A write never rewrites a month: the readings that are new or changed
+    go to a small <YYYY-MM>.part-NNNNNN.parquet file next to it, and
+    readings archived already with the same values are skipped. Queries
+    read a month's main file and its parts together, the newest part
+    winning. Once a month has MAX_PARTS parts they are compacted into the
+    main file (see compact).
+
+    Example:
+        >>> archive = ObservationArchive("~/.tidedata/archive")
+        >>> client = IrishMarineDataClient(archive=archive)
+        >>> client.get_wave_buoy_series("M2", 24 * 30)   # fetched and archived
+        >>> archive.query("IWBNetwork", "M2", "2024-11-01", "2024-12-01", ["wave_height"])
+    """
+
+    MAX_PARTS = 16
+
+    def __init__(self, directory: str):
+        """
+        Open (or create) an archive.
+
+        Args:
+            directory: Folder holding the archive files
+        """
+        if pq is None:
+            raise ImportError("ObservationArchive needs pyarrow (pip install pyarrow)")
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, series: ObservationSeries) -> int:
+        """
+        Merge a series into the archive.
+
+        Args:
+            series: BuoySeries or TideSeries from the client
+
+        Returns:
+            How many readings were not archived before
+        """
+        if not len(series):
+            return 0
+        months = series.times.astype('datetime64[M]')
+        added = 0
+        with self._lock:
+            for month in np.unique(months):
+                keep = months == month
+                added += self._merge_month(series.DATASET, series.station, str(month),
+                                           series.times[keep],
+                                           {name: array[keep] for name, array in series.values.items()})
+        return added
+
+    def write_all(self, chunk: Dict[str, ObservationSeries]) -> int:
+        """Write every series in a station -> series dict (e.g. from iter_chunks)."""
+        return sum(self.write(series) for series in chunk.values())
+
+    def compact(self, dataset: str, station: str):
+        """Merge each month's part files into its main file."""
+        with self._lock:
+            for month in self.months(dataset, station):
+                if self._parts(dataset, station, month):
+                    self._compact_month(dataset, station, month)
+
+    def query(self, dataset: str, station: str, start: Optional[str] = None,
+              end: Optional[str] = None, columns: Optional[List[str]] = None) -> ObservationSeries:
+        """
+        Read archived readings, opening only the months and columns needed.
+
+        Args:
+            dataset: "IWBNetwork" or "IrishNationalTideGaugeNetwork"
+            station: Station id, e.g. "M2" or "Galway Port"
+            start: First time to include (ISO string, inclusive)
+            end: Time to stop at (ISO string, exclusive)
+            columns: Variables to load (all if None)
+
+        Returns:
+            A BuoySeries or TideSeries, empty if nothing is archived.
+            If `columns` is given, only those variables are present.
+        """
+        series_type = SERIES_TYPES[dataset]
+        names = list(columns) if columns else list(series_type.COLUMNS.values())
+        start64 = np.datetime64(start.rstrip('Z'), 's') if start else None
+        end64 = np.datetime64(end.rstrip('Z'), 's') if end else None
+
+        for _ in range(3):
+            paths = []
+            for month in self.months(dataset, station):
+                month64 = np.datetime64(month, 'M')
+                if start64 is not None and month64 + 1 <= start64.astype('datetime64[M]'):
+                    continue
+                if end64 is not None and month64.astype('datetime64[s]') >= end64:
+                    continue
+                paths.extend(self._month_files(dataset, station, month))
+            try:
+                times, values = self._read_files(paths, names)
+            except FileNotFoundError:
+                continue  # a month was compacted under us; look again
+            break
+        else:
+            raise RuntimeError(f"Archive for {station} kept changing while reading it")
+
+        times, values = _latest_per_time(times, values)
+        keep = np.ones(len(times), dtype=bool)
+        if start64 is not None:
+            keep &= times >= start64
+        if end64 is not None:
+            keep &= times < end64
+        return series_type(station, times[keep], {name: values[name][keep] for name in names})
+
+    def stations(self, dataset: str) -> List[str]:
+        """Stations with archived readings for a dataset."""
+        folder = os.path.join(self.directory, dataset)
+        return sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+
+    def months(self, dataset: str, station: str) -> List[str]:
+        """Archived months ("YYYY-MM") for a station, oldest first."""
+        folder = os.path.join(self.directory, dataset, station)
+        if not os.path.isdir(folder):
+            return []
+        return sorted({name.split('.')[0] for name in os.listdir(folder) if name.endswith('.parquet')})
+
+    def _path(self, dataset: str, station: str, month: str) -> str:
+        return os.path.join(self.directory, dataset, station, f"{month}.parquet")
+
+    def _parts(self, dataset: str, station: str, month: str) -> List[str]:
+        """A month's part files, oldest first."""
+        folder = os.path.join(self.directory, dataset, station)
+        prefix = f"{month}.part-"
+        if not os.path.isdir(folder):
+            return []
+        return [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                if name.startswith(prefix) and name.endswith('.parquet')]
+
+    def _month_files(self, dataset: str, station: str, month: str) -> List[str]:
+        """A month's main file (if any) and then its parts, oldest first."""
+        path = self._path(dataset, station, month)
+        return ([path] if os.path.exists(path) else []) + self._parts(dataset, station, month)
+
+    def _read_files(self, paths: List[str], names: Optional[List[str]] = None):
+        """
+        Concatenate the readings of several files, in order.
+
+        Only `names` are read (every variable in the files if None); a file
+        without one of them gives NaN for it.
+        """
+        times, tables = [], []
+        for path in paths:
+            available = pq.read_schema(path).names
+            wanted = [name for name in (names or available) if name != 'time' and name in available]
+            table = pq.read_table(path, columns=['time'] + wanted)
+            times.append(table.column('time').to_numpy().astype('datetime64[s]'))
+            tables.append(table)
+        if names is None:
+            names = list(dict.fromkeys(name for table in tables for name in table.column_names if name != 'time'))
+        if not tables:
+            return np.array([], dtype='datetime64[s]'), {name: np.array([], dtype=np.float64) for name in names}
+        values = {name: np.concatenate([
+            table.column(name).to_numpy() if name in table.column_names else np.full(table.num_rows, np.nan)
+            for table in tables]) for name in names}
+        return np.concatenate(times), values
+
+    def _merge_month(self, dataset: str, station: str, month: str,
+                     times: np.ndarray, values: Dict[str, np.ndarray]) -> int:
+        """Add one month's new or changed readings as a part file; returns how many are new."""
+        times, values = _latest_per_time(times.astype('datetime64[s]'), values)
+        paths = self._month_files(dataset, station, month)
+        if not paths:
+            _write_table(self._path(dataset, station, month), times, values)
+            return len(times)
+
+        old_times, old_values = _latest_per_time(*self._read_files(paths))
+        position = np.minimum(np.searchsorted(old_times, times), len(old_times) - 1)
+        found = old_times[position] == times
+        changed = ~found
+        for name, array in values.items():
+            old = old_values[name][position] if name in old_values else np.full(len(times), np.nan)
+            changed |= ~((old == array) | (np.isnan(old) & np.isnan(array)))
+        if not changed.any():
+            return 0
+
+        parts = self._parts(dataset, station, month)
+        number = int(parts[-1].rsplit('-', 1)[1].split('.')[0]) + 1 if parts else 1
+        part_path = os.path.join(os.path.dirname(paths[0]), f"{month}.part-{number:06d}.parquet")
+        _write_table(part_path, times[changed], {name: array[changed] for name, array in values.items()})
+        if len(parts) + 1 >= self.MAX_PARTS:
+            self._compact_month(dataset, station, month)
+        return int((~found).sum())
+
+    def _compact_month(self, dataset: str, station: str, month: str):
+        """Rewrite a month's main file with its parts merged in, then remove the parts."""
+        parts = self._parts(dataset, station, month)
+        times, values = _latest_per_time(*self._read_files(self._month_files(dataset, station, month)))
+        _write_table(self._path(dataset, station, month), times, values)
+        # Readers listing the parts before this see the same readings twice
+        # (de-duplicated) or retry if a part is gone
+        for path in parts:
+            os.remove(path)
+
+
+def _latest_per_time(times: np.ndarray, values: Dict[str, np.ndarray]):
+    """Sort by time, keeping the last of equal times (stable, so the newest wins)."""
+    if not len(times):
+        return times, values
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    last = np.append(times[1:] != times[:-1], True)
+    return times[last], {name: np.asarray(array)[order][last] for name, array in values.items()}
+
+
+def _write_table(path: str, times: np.ndarray, values: Dict[str, np.ndarray]):
+    """Write one Parquet file atomically (readers never see a half-written file)."""
+    table = pa.table({'time': pa.array(times, type=pa.timestamp('s')), **values})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, path)
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Irish Marine Data Client - asyncio version
+The same data as IrishMarineDataClient, but every fetch is awaitable so it
+never blocks the event loop of an async web service.
+"""
+
+import asyncio
+import aiohttp
+from yarl import URL
+from typing import AsyncIterator, Dict, List, Optional
+
+from marine_data_v2 import LatestReading, MarineDataQueries, TokenBucket
+from series import BuoySeries, ObservationSeries, TideSeries
+from harmonics import HarmonicModel
+from erddap_csv import read_columns
+from response_formats import get_format
+
+
+class AsyncIrishMarineDataClient(MarineDataQueries):
+    """
+    Async client for Irish Marine Institute ERDDAP data.
+
+    Builds the same URLs and returns the same dictionaries as
+    IrishMarineDataClient (both share MarineDataQueries), using one pooled
+    aiohttp session for all calls. Use it as an async context manager so
+    the connections get closed.
+
+    Example:
+        >>> async with AsyncIrishMarineDataClient() as client:
+        >>>     data = await client.get_wave_buoy_data("M2", 6)
+        >>>     print(f"Wave height: {data['latest']['wave_height']}m")
+    """
+
+    def __init__(self, max_connections: int = 100, max_per_host: int = 6,
+                 requests_per_second: Optional[float] = 2.0, burst: int = 6,
+                 response_format: str = "csv"):
+        """
+        Initialize the client. The HTTP session is opened on first use.
+
+        Args:
+            max_connections: Size of the shared connection pool
+            max_per_host: Most connections open to one server at a time
+            requests_per_second: Sustained request rate (None to disable)
+            burst: How many requests may go out back-to-back
+            response_format: File type the *_series methods ask ERDDAP for
+                (see IrishMarineDataClient)
+        """
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.throttle = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.response_format = get_format(response_format)
+        if not self.response_format.available():
+            print(f"⚠️ {response_format} responses need an optional package; using CSV")
+            self.response_format = get_format("csv")
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncIrishMarineDataClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it inside the running loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def _throttle(self):
+        """Wait for the rate limit without blocking the loop."""
+        if self.throttle:
+            wait = self.throttle.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def _http_get(self, url: str):
+        """
+        Send a GET request and return (status, body bytes).
+
+        Timeouts and connection errors are raised to the caller.
+        Cancelling the calling task cancels the request too.
+        """
+        await self._throttle()
+        # aiohttp wants URLs it will not re-quote; ours are already encoded
+        async with self._get_session().get(URL(url, encoded=True)) as response:
+            return response.status, await response.read()
+
+    async def _http_get_text(self, url: str):
+        """Send a GET request and return (status, body text)."""
+        status, body = await self._http_get(url)
+        return status, body.decode('utf-8', errors='replace')
+
+    async def get_wave_buoy_data(self, buoy_id: str = "M2", hours_back: int = 24,
+                                 latest_only: bool = False) -> Dict:
+        """
+        Get wave and weather data from Irish weather buoys (M1-M6).
+
+        Args:
+            buoy_id: Buoy identifier (M1, M2, M3, M4, M5, M6)
+            hours_back: How many hours of historical data to retrieve
+            latest_only: Ask the server for just the newest row in the window
+
+        Returns:
+            Dictionary with latest readings and historical data
+
+        Example:
+            >>> data = await client.get_wave_buoy_data("M2", 6)
+        """
+
+        full_url = self._build_buoy_url(buoy_id, hours_back, latest_only)
+
+        try:
+            print(f"🌊 Fetching data from buoy {buoy_id}...")
+            status, text = await self._http_get_text(full_url)
+
+            if status == 200:
+                return self._parse_buoy_csv(text, buoy_id, latest_only)
+            else:
+                print(f"⚠️ Error: Server returned status {status}")
+                print("📊 Using sample data for demonstration...")
+                return self._get_mock_buoy_data(buoy_id)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+            print("📊 Using sample data for demonstration...")
+            return self._get_mock_buoy_data(buoy_id)
+
+    async def get_galway_tide_data(self, hours_back: int = 24) -> Dict:
+        """
+        Get tide level data from Galway Harbor.
+
+        Args:
+            hours_back: How many hours of historical data to retrieve
+
+        Returns:
+            Dictionary with current tide level and historical data
+
+        Example:
+            >>> tides = await client.get_galway_tide_data(12)
+        """
+
+        full_url = self._build_tide_url(hours_back)
+
+        try:
+            print(f"📈 Fetching tide data from Galway Harbor...")
+            status, text = await self._http_get_text(full_url)
+
+            if status == 200:
+                return self._parse_tide_csv(text)
+            else:
+                print(f"⚠️ Error: Server returned status {status}")
+                print("📊 Using sample data for demonstration...")
+                return self._get_mock_tide_data()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+            print("📊 Using sample data for demonstration...")
+            return self._get_mock_tide_data()
+
+    async def get_buoy_data_batch(self, buoy_ids: List[str], hours_back: int = 24,
+                                  latest_only: bool = False) -> Dict[str, Dict]:
+        """
+        Get wave and weather data for several buoys with a single request.
+
+        Args:
+            buoy_ids: Buoy identifiers, e.g. ["M2", "M3"]
+            hours_back: How many hours of historical data to retrieve
+            latest_only: Ask the server for just the newest row per buoy
+
+        Returns:
+            Dictionary of buoy_id -> buoy data, in the order requested
+
+        Example:
+            >>> buoys = await client.get_buoy_data_batch(["M2", "M5"], 6)
+        """
+
+        full_url = self._build_buoy_url(buoy_ids, hours_back, latest_only)
+
+        try:
+            print(f"🌊 Fetching data from buoys {', '.join(buoy_ids)}...")
+            status, text = await self._http_get_text(full_url)
+
+            if status == 200:
+                return self._parse_multi_buoy_csv(text, buoy_ids, latest_only)
+            else:
+                print(f"⚠️ Error: Server returned status {status}")
+                print("📊 Using sample data for demonstration...")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+            print("📊 Using sample data for demonstration...")
+
+        return {buoy_id: self._get_mock_buoy_data(buoy_id) for buoy_id in buoy_ids}
+
+    async def get_wave_buoy_series(self, buoy_id: str = "M2", hours_back: int = 24) -> BuoySeries:
+        """
+        Get one buoy's readings as NumPy arrays (empty if the fetch fails).
+
+        Example:
+            >>> series = await client.get_wave_buoy_series("M2", 24 * 90)
+        """
+
+        full_url = self._build_buoy_url(buoy_id, hours_back)
+        return (await self._fetch_series(BuoySeries, full_url, [buoy_id]))[buoy_id]
+
+    async def get_buoy_series_batch(self, buoy_ids: List[str], hours_back: int = 24) -> Dict[str, BuoySeries]:
+        """Get several buoys' readings as NumPy arrays with a single request."""
+
+        full_url = self._build_buoy_url(buoy_ids, hours_back)
+        return await self._fetch_series(BuoySeries, full_url, buoy_ids)
+
+    async def get_galway_tide_series(self, hours_back: int = 24) -> TideSeries:
+        """Get Galway tide levels as NumPy arrays (empty if the fetch fails)."""
+
+        full_url = self._build_tide_url(hours_back)
+        return (await self._fetch_series(TideSeries, full_url, ["Galway Port"]))["Galway Port"]
+
+    async def fit_galway_tide_model(self, days: int = 60, **fit_options) -> HarmonicModel:
+        """
+        Fit a harmonic tide model to recent Galway gauge readings.
+
+        Example:
+            >>> model = await client.fit_galway_tide_model(90)
+        """
+
+        series = await self.get_galway_tide_series(days * 24)
+        return HarmonicModel.fit_series(series, **fit_options)
+
+    async def _fetch_series(self, series_type, full_url: str, stations: List[str]) -> Dict:
+        """Fetch a query and parse it into one series per station."""
+
+        columns = None
+        try:
+            columns = await self._fetch_columns(full_url, list(series_type.COLUMNS))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+
+        return self._series_from_columns(series_type, columns, stations)
+
+    async def _fetch_columns(self, csv_url: str, numeric: List[str]):
+        """Fetch a query as column arrays, retrying a failed binary format as CSV."""
+        response_format = self.response_format
+        if response_format.name != "csv":
+            try:
+                status, body = await self._http_get(response_format.url_for(csv_url))
+                if status == 200:
+                    return response_format.decode(body, numeric)
+                if status == 404:
+                    return None  # ERDDAP answers 404 when no rows match
+                print(f"⚠️ {response_format.name} request returned status {status}, retrying as CSV")
+            except Exception as e:
+                print(f"⚠️ {response_format.name} response unusable ({str(e)}), retrying as CSV")
+
+        status, text = await self._http_get_text(csv_url)
+        if status == 200:
+            return read_columns(text, numeric)
+        print(f"⚠️ Error: Server returned status {status}")
+        return None
+
+    async def iter_chunks(self, stations: Optional[List[str]] = None, hours_back: int = 24 * 365,
+                          dataset: str = "IWBNetwork",
+                          chunk_rows: int = 10000) -> AsyncIterator[Dict[str, ObservationSeries]]:
+        """
+        Stream a long query, parsing it in batches as the bytes arrive.
+
+        Works like IrishMarineDataClient.iter_chunks: memory depends on
+        chunk_rows, there is no sample-data fallback, and HTTP errors are
+        raised.
+
+        Example:
+            >>> async for chunk in client.iter_chunks(["M2"], hours_back=24 * 365 * 3):
+            ...     archive.write(chunk["M2"])
+        """
+
+        series_type, full_url = self._build_stream_url(stations, hours_back, dataset)
+        numeric = list(series_type.COLUMNS)
+        await self._throttle()
+        print(f"🌊 Streaming {full_url.split('?')[0].rsplit('/', 1)[-1]}...")
+        # A long download may take longer than the usual request timeout
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.timeout)
+        async with self._get_session().get(URL(full_url, encoded=True), timeout=timeout) as response:
+            if response.status == 404:
+                return  # ERDDAP answers 404 when no rows match
+            response.raise_for_status()
+
+            header, lines, pending = None, [], b""
+            async for block in response.content.iter_chunked(1 << 16):
+                pending += block
+                complete, _, pending = pending.rpartition(b"\n")
+                if not complete:
+                    pending = complete + pending
+                    continue
+                lines.extend(complete.decode('utf-8', errors='replace').split("\n"))
+                if header is None and len(lines) >= 2:
+                    header, lines = lines[:2], lines[2:]   # names and units rows
+                if header is not None and len(lines) >= chunk_rows:
+                    yield self._chunk_from_columns(series_type, read_columns("\n".join(header + lines), numeric))
+                    lines = []
+            if pending:
+                lines.append(pending.decode('utf-8', errors='replace'))
+            if header is None and len(lines) >= 2:
+                header, lines = lines[:2], lines[2:]
+            if header is not None and any(line.strip() for line in lines):
+                yield self._chunk_from_columns(series_type, read_columns("\n".join(header + lines), numeric))
+
+    async def iter_rows(self, stations: Optional[List[str]] = None, hours_back: int = 24 * 365,
+                        dataset: str = "IWBNetwork", chunk_rows: int = 10000) -> AsyncIterator[Dict]:
+        """Stream a long query one reading at a time (see iter_chunks)."""
+
+        async for chunk in self.iter_chunks(stations, hours_back, dataset, chunk_rows):
+            for row in self._rows_of_chunk(chunk):
+                yield row
+
+    async def get_latest_readings(self, buoy_ids: Optional[List[str]] = None,
+                                  hours_back: int = 3) -> Dict[str, LatestReading]:
+        """
+        Get just the newest reading from each buoy, as cheaply as possible.
+
+        Example:
+            >>> latest = await client.get_latest_readings(["M2", "M4"])
+        """
+
+        buoy_ids = buoy_ids or ["M1", "M2", "M3", "M4", "M5", "M6"]
+        full_url = self._build_buoy_url(buoy_ids, hours_back, latest_only=True)
+        csv_text = ""
+
+        try:
+            print(f"🌊 Fetching latest readings from buoys {', '.join(buoy_ids)}...")
+            status, text = await self._http_get_text(full_url)
+
+            if status == 200:
+                csv_text = text
+            else:
+                print(f"⚠️ Error: Server returned status {status}")
+                print("📊 Using sample data for demonstration...")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+            print("📊 Using sample data for demonstration...")
+
+        return self._parse_latest_readings(csv_text, buoy_ids)
+
+    async def get_all_buoy_data(self, hours_back: int = 1, batched: bool = True) -> List[Dict]:
+        """
+        Get latest data from all M-series buoys (M1-M6).
+
+        Args:
+            hours_back: How many hours of data to retrieve
+            batched: Fetch all buoys in one request; otherwise send the
+                per-buoy requests concurrently
+
+        Returns:
+            List of dictionaries, one for each buoy, in buoy order
+
+        Example:
+            >>> all_buoys = await client.get_all_buoy_data(1)
+        """
+
+        buoys = ["M1", "M2", "M3", "M4", "M5", "M6"]
+
+        print(f"📍 Checking buoys {', '.join(buoys)}...")
+        # Only the latest reading is summarized, so let the server pick it
+        if batched:
+            fetched = list((await self.get_buoy_data_batch(buoys, hours_back, latest_only=True)).values())
+        else:
+            fetched = await asyncio.gather(*(self.get_wave_buoy_data(b, hours_back, latest_only=True)
+                                             for b in buoys))
+
+        return self._summarize_buoys(buoys, fetched)
+
+    async def get_aggregated(self, dataset: str, stations: List[str], variables: List[str],
+                             bucket: str = "1hour", reducer: str = "mean",
+                             hours_back: int = 24 * 7) -> Dict:
+        """
+        Get time-bucketed statistics computed by the ERDDAP server
+        (see IrishMarineDataClient.get_aggregated).
+
+        Example:
+            >>> daily = await client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight"],
+            ...                                     bucket="1day", reducer="max")
+        """
+
+        full_url = self._build_aggregate_url(dataset, stations, variables, bucket, reducer, hours_back)
+        result = self._empty_aggregate(dataset, stations, bucket, reducer)
+
+        try:
+            print(f"📊 Fetching {reducer} per {bucket} from {dataset}...")
+            status, text = await self._http_get_text(full_url)
+
+            if status == 200:
+                self._parse_aggregate_csv(text, variables, result)
+            else:
+                print(f"⚠️ Error: Server returned status {status}")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Connection error: {str(e) or type(e).__name__}")
+
+        return result
+
+    async def get_weather_data(self, station: str = "M2", hours_back: int = 6) -> Dict:
+        """
+        Get weather data (wind, temperature, pressure) from a marine station.
+
+        Args:
+            station: Station ID (M1-M6 or coastal station name)
+            hours_back: Hours of historical data
+
+        Returns:
+            Dictionary with weather parameters
+
+        Example:
+            >>> weather = await client.get_weather_data("M3", 3)
+        """
+
+        # For M-series buoys, use the buoy data function
+        if station.startswith("M") and len(station) == 2:
+            return await self.get_wave_buoy_data(station, hours_back)
+
+        # Coastal weather stations are still a placeholder
+        return self._get_mock_weather_data(station)
+
+
+if __name__ == "__main__":
+    # Quick test
+    async def _demo():
+        async with AsyncIrishMarineDataClient() as client:
+            for buoy in await client.get_all_buoy_data(hours_back=1):
+                print(f"{buoy['buoy_id']}: {buoy['wave_height']}m waves")
+
+    asyncio.run(_demo())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Background collector for buoy and tide readings.
+One long-running process polls every dataset on its own schedule through a
+single IrishMarineDataClient, keeps the readings in the client's store and
+holds the freshest series in memory for readers in the same process.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from marine_data_v2 import IrishMarineDataClient, SAMPLING_MINUTES
+from series import ObservationSeries
+
+
+class PollJob(NamedTuple):
+    """One dataset and its stations, polled together on a fixed cadence."""
+    dataset: str
+    stations: Tuple[str, ...]
+    interval: float         # seconds between polls
+    offset: float = 0.0     # seconds after each interval boundary, for data that lands late
+    hours_back: int = 3     # window fetched by each poll
+
+
+# Buoys report hourly and appear on ERDDAP a few minutes later; the tide
+# gauge reports every five minutes. A few hours back covers missed polls.
+DEFAULT_JOBS = [
+    PollJob("IWBNetwork", ("M1", "M2", "M3", "M4", "M5", "M6"),
+            interval=SAMPLING_MINUTES["IWBNetwork"] * 60, offset=10 * 60, hours_back=3),
+    PollJob("IrishNationalTideGaugeNetwork", ("Galway Port",),
+            interval=SAMPLING_MINUTES["IrishNationalTideGaugeNetwork"] * 60, offset=60, hours_back=1),
+]
+
+# Dataset -> how to fetch its stations as series
+FETCHERS: Dict[str, Callable[[IrishMarineDataClient, Sequence[str], int], Dict[str, ObservationSeries]]] = {
+    "IWBNetwork": lambda client, stations, hours_back: client.get_buoy_series_batch(list(stations), hours_back),
+    "IrishNationalTideGaugeNetwork": lambda client, stations, hours_back: {
+        "Galway Port": client.get_galway_tide_series(hours_back)},
+}
+
+
+class Collector:
+    """
+    Polls each PollJob on its own clock, in one process.
+
+    - Polls are aligned to the sensors' reporting interval (plus the job's
+      offset) and spread by a random jitter, so they land just after new
+      readings are published and not all at once.
+    - A job still running when it falls due again is not started twice;
+      the tick is skipped and counted in stats['coalesced'].
+    - A poll that fails (no readings for any station) is retried after an
+      exponentially growing delay, capped at max_backoff.
+    - Readings go to the client's store (and archive) as they are parsed,
+      and each polled window is recorded as covered, so get_*_data calls
+      for recent windows are answered locally.
+    - snapshot() gives readers the freshest series without any locking.
+
+    Example:
+        >>> client = IrishMarineDataClient(store=ObservationStore("observations.db"))
+        >>> collector = Collector(client)
+        >>> collector.start()
+        >>> collector.latest("IWBNetwork", "M2")['wave_height'][-1]
+    """
+
+    def __init__(self, client: IrishMarineDataClient, jobs: Optional[List[PollJob]] = None,
+                 jitter: float = 30.0, max_backoff: float = 3600.0,
+                 clock: Callable[[], float] = time.time, rng: Optional[random.Random] = None):
+        """
+        Args:
+            client: The shared client (give it a store to keep readings)
+            jobs: What to poll (DEFAULT_JOBS if None)
+            jitter: Up to this many seconds are added to each poll time
+            max_backoff: Longest wait between retries of a failing job
+            clock: Source of the current time in seconds (for tests)
+            rng: Random source for jitter (for tests)
+        """
+        self.client = client
+        self.jobs = list(DEFAULT_JOBS if jobs is None else jobs)
+        unknown = [job.dataset for job in self.jobs if job.dataset not in FETCHERS]
+        if unknown:
+            raise ValueError(f"No way to poll datasets: {', '.join(unknown)}")
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.stats = {'polls': 0, 'failures': 0, 'coalesced': 0}
+
+        now = self.clock()
+        self._due = [now + self.rng.uniform(0, self.jitter) for _ in self.jobs]
+        self._failures = [0] * len(self.jobs)
+        self._running: List[Optional[Future]] = [None] * len(self.jobs)
+        self._snapshot: Dict[Tuple[str, str], ObservationSeries] = {}
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.jobs)),
+                                            thread_name_prefix="collector")
+
+    def snapshot(self) -> Dict[Tuple[str, str], ObservationSeries]:
+        """
+        The newest series for every (dataset, station) polled so far.
+
+        The dictionary is replaced, never changed, when a poll finishes,
+        so it can be read freely - but don't modify it or its series.
+        """
+        return self._snapshot
+
+    def latest(self, dataset: str, station: str) -> Optional[ObservationSeries]:
+        """The newest series for one station (None until it is first polled)."""
+        return self._snapshot.get((dataset, station))
+
+    def poll(self, job: PollJob) -> bool:
+        """
+        Fetch one job's window now and publish it.
+
+        Returns:
+            True if any station returned readings
+        """
+        fetched_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        window_start = self.client.window_start(job.hours_back, job.dataset)
+        try:
+            results = FETCHERS[job.dataset](self.client, job.stations, job.hours_back)
+        except Exception as e:
+            print(f"⚠️ Poll of {job.dataset} failed: {str(e)}")
+            return False
+
+        fresh = {(job.dataset, station): series for station, series in results.items() if len(series)}
+        if self.client.store is not None:
+            for _, station in fresh:
+                try:
+                    self.client.store.mark_covered(job.dataset, station, window_start, fetched_at)
+                except Exception as e:
+                    print(f"⚠️ Could not record coverage for {station}: {str(e)}")
+        with self._publish_lock:
+            self._snapshot = {**self._snapshot, **fresh}
+        return bool(fresh)
+
+    def run_pending(self) -> float:
+        """
+        Start every job that is due, and schedule its next poll.
+
+        Returns:
+            Seconds until the next job falls due
+        """
+        now = self.clock()
+        for i, job in enumerate(self.jobs):
+            if self._due[i] > now:
+                continue
+            running = self._running[i]
+            if running is not None and not running.done():
+                self.stats['coalesced'] += 1
+                self._due[i] = self._next_slot(job, now)
+                continue
+            # Provisional (set first); _run_job reschedules from the outcome
+            self._due[i] = self._next_slot(job, now)
+            self._running[i] = self._executor.submit(self._run_job, i)
+        return max(0.0, min(self._due) - self.clock()) if self.jobs else 60.0
+
+    def start(self):
+        """Run the scheduler in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="collector-scheduler", daemon=True)
+        self._thread.start()
+
+    def run_forever(self):
+        """Poll until stop() is called (blocks; start() runs this in a thread)."""
+        while not self._stop.is_set():
+            self._stop.wait(self.run_pending())
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop scheduling and wait for polls in progress."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "Collector":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run_job(self, i: int):
+        job = self.jobs[i]
+        ok = self.poll(job)
+        now = self.clock()
+        with self._publish_lock:
+            self.stats['polls'] += 1
+            if not ok:
+                self.stats['failures'] += 1
+        if ok:
+            self._failures[i] = 0
+            self._due[i] = self._next_slot(job, now)
+        else:
+            self._failures[i] += 1
+            self._due[i] = now + self._backoff(job, self._failures[i])
+
+    def _next_slot(self, job: PollJob, now: float) -> float:
+        """The first interval boundary (plus offset) after now, plus jitter."""
+        slots_done = (now - job.offset) // job.interval
+        return (slots_done + 1) * job.interval + job.offset + self.rng.uniform(0, self.jitter)
+
+    def _backoff(self, job: PollJob, failures: int) -> float:
+        """Retry delay after `failures` failed polls in a row."""
+        return min(self.max_backoff, job.interval * 2 ** (failures - 1)) + self.rng.uniform(0, self.jitter)
+
+
+if __name__ == "__main__":
+    import sys
+    from store import ObservationStore
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "observations.db"
+    print(f"📡 Collecting buoy and tide readings into {path} (Ctrl+C to stop)")
+    with IrishMarineDataClient(store=ObservationStore(path)) as client:
+        collector = Collector(client)
+        try:
+            collector.run_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️ Stopping collector")
+        finally:
+            collector.stop()
+            print(f"📊 {collector.stats['polls']} polls, {collector.stats['failures']} failed, "
+                  f"{collector.stats['coalesced']} coalesced")
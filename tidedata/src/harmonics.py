@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Harmonic tide prediction.
+Fits tidal constituents (M2, S2, K1, O1, ...) to observed water levels by
+least squares, then predicts the level at any times - past or future -
+without asking the gauge.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from erddap_csv import as_datetime64
+from series import TideSeries
+
+# Constituent speeds in degrees per hour, in the order they are tried
+# when choosing what a record is long enough to resolve.
+CONSTITUENT_SPEEDS: Dict[str, float] = {
+    'M2': 28.9841042,
+    'S2': 30.0000000,
+    'K1': 15.0410686,
+    'O1': 13.9430356,
+    'N2': 28.4397295,
+    'M4': 57.9682084,
+    'MS4': 58.9841042,
+    'M6': 86.9523127,
+    'MN4': 57.4238337,
+    'K2': 30.0821373,
+    'P1': 14.9589314,
+    'Q1': 13.3986609,
+    'L2': 29.5284789,
+    'NU2': 28.5125831,
+    '2N2': 27.8953548,
+    'MU2': 27.9682084,
+    'MK3': 44.0251729,
+    'S4': 60.0000000,
+    'M8': 115.9364166,
+    'SSA': 0.0821373,
+    'SA': 0.0410686,
+}
+
+# Phases are measured from this instant, so a saved model means the same thing anywhere
+REFERENCE_TIME = np.datetime64('2000-01-01T00:00:00', 's')
+
+
+def hours_since_reference(times) -> np.ndarray:
+    """datetime64 (or ISO string) times -> float hours since REFERENCE_TIME."""
+    times = as_datetime64(times)
+    return (times - REFERENCE_TIME).astype(np.int64) / 3600.0
+
+
+def resolvable_constituents(duration_hours: float, rayleigh: float = 1.0,
+                            candidates: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Constituents a record of this length can tell apart (Rayleigh criterion).
+
+    Two constituents can only be separated if the record spans at least
+    `rayleigh` full cycles of the difference between their frequencies.
+    Candidates are taken in order, so M2 is kept over S2 if both can't be.
+
+    Args:
+        duration_hours: Length of the observed record
+        rayleigh: Cycles of separation required (1 is the usual choice)
+        candidates: Names to choose from (all known ones by default)
+
+    Returns:
+        Constituent names, in priority order
+    """
+    chosen: List[str] = []
+    for name in candidates or CONSTITUENT_SPEEDS:
+        speed = CONSTITUENT_SPEEDS[name]
+        # A constituent must also be resolvable from the mean (speed 0)
+        separations = [speed] + [abs(speed - CONSTITUENT_SPEEDS[other]) for other in chosen]
+        if min(separations) * duration_hours / 360.0 >= rayleigh:
+            chosen.append(name)
+    return chosen
+
+
+class HarmonicModel:
+    """
+    A fitted set of tidal constituents: level(t) = mean + sum A cos(w t - g).
+
+    Nodal (18.6-year) corrections are not applied, so a model is best used
+    within a year or two of the record it was fitted to. Refit periodically.
+
+    Example:
+        >>> model = HarmonicModel.fit(series.times, series['water_level'])
+        >>> minutes = np.arange('2025-01-01', '2026-01-01', dtype='datetime64[m]')
+        >>> levels = model.predict(minutes)   # a year at 1-minute steps
+    """
+
+    def __init__(self, mean: float, constituents: Dict[str, Tuple[float, float]],
+                 residual_std: float = float('nan')):
+        """
+        Args:
+            mean: Mean water level (the datum of the fitted record)
+            constituents: Name -> (amplitude in metres, phase in degrees
+                relative to REFERENCE_TIME)
+            residual_std: Standard deviation of the fit's residuals
+        """
+        self.mean = mean
+        self.constituents = dict(constituents)
+        self.residual_std = residual_std
+        self._speeds = np.radians([CONSTITUENT_SPEEDS[name] for name in self.constituents])
+        self._amplitudes = np.array([amplitude for amplitude, _ in self.constituents.values()])
+        self._phases = np.radians([phase for _, phase in self.constituents.values()])
+
+    @classmethod
+    def fit(cls, times, levels, constituents: Optional[Sequence[str]] = None,
+            rayleigh: float = 1.0) -> "HarmonicModel":
+        """
+        Least-squares fit of constituents to observed levels.
+
+        Args:
+            times: datetime64 times of the observations
+            levels: Observed water levels (NaN readings are ignored)
+            constituents: Names to fit; by default every constituent the
+                record is long enough to resolve
+            rayleigh: Separation required when choosing automatically
+
+        Returns:
+            The fitted HarmonicModel
+        """
+        hours = hours_since_reference(times)
+        levels = np.asarray(levels, dtype=np.float64)
+        valid = np.isfinite(levels)
+        hours, levels = hours[valid], levels[valid]
+        if len(hours) < 2:
+            raise ValueError("Need at least two observed levels to fit a tide model")
+
+        if constituents is None:
+            constituents = resolvable_constituents(hours.max() - hours.min(), rayleigh)
+        unknown = [name for name in constituents if name not in CONSTITUENT_SPEEDS]
+        if unknown:
+            raise ValueError(f"Unknown constituents: {', '.join(unknown)}")
+        if len(hours) < 2 * len(constituents) + 1:
+            raise ValueError(f"{len(hours)} observations are too few for {len(constituents)} constituents")
+
+        # Columns: mean, then cos and sin for each constituent
+        angles = np.outer(hours, np.radians([CONSTITUENT_SPEEDS[name] for name in constituents]))
+        design = np.empty((len(hours), 1 + 2 * len(constituents)))
+        design[:, 0] = 1.0
+        design[:, 1::2] = np.cos(angles)
+        design[:, 2::2] = np.sin(angles)
+        coefficients, *_ = np.linalg.lstsq(design, levels, rcond=None)
+
+        cos_terms, sin_terms = coefficients[1::2], coefficients[2::2]
+        amplitudes = np.hypot(cos_terms, sin_terms)
+        phases = np.degrees(np.arctan2(sin_terms, cos_terms)) % 360.0
+        residual_std = float(np.std(levels - design @ coefficients))
+        return cls(float(coefficients[0]),
+                   {name: (float(a), float(g)) for name, a, g in zip(constituents, amplitudes, phases)},
+                   residual_std)
+
+    @classmethod
+    def fit_series(cls, series: TideSeries, **kwargs) -> "HarmonicModel":
+        """Fit to a TideSeries' water_level (see fit())."""
+        return cls.fit(series.times, series['water_level'], **kwargs)
+
+    def predict(self, times) -> np.ndarray:
+        """
+        Predicted water level at each time.
+
+        Works one constituent at a time over the whole array, so memory
+        stays at a few copies of `times` however many there are.
+
+        Args:
+            times: datetime64 array or ERDDAP ISO strings
+
+        Returns:
+            float64 array of levels, same shape as times
+        """
+        hours = hours_since_reference(times)
+        levels = np.full(hours.shape, self.mean)
+        for speed, amplitude, phase in zip(self._speeds, self._amplitudes, self._phases):
+            levels += amplitude * np.cos(speed * hours - phase)
+        return levels
+
+    def level_at(self, times) -> np.ndarray:
+        """
+        Predicted level at any number of times (the same call as
+        TideSeries.level_at, so a planner can take either). Nothing is
+        interpolated: each level is evaluated directly.
+        """
+        return self.predict(times)
+
+    def predict_series(self, start: str, end: str, step_minutes: int = 5,
+                       station: str = "Galway Port") -> TideSeries:
+        """
+        Predicted levels on a regular grid, as a TideSeries.
+
+        Args:
+            start: First time (ISO string, inclusive)
+            end: Last time (ISO string, exclusive)
+            step_minutes: Grid spacing
+            station: Station name to attach
+
+        Returns:
+            TideSeries with predicted water_level (water_level_malin is NaN)
+        """
+        times = np.arange(np.datetime64(start.rstrip('Z'), 's'), np.datetime64(end.rstrip('Z'), 's'),
+                          np.timedelta64(step_minutes * 60, 's'))
+        return TideSeries(station, times, {'water_level': self.predict(times),
+                                           'water_level_malin': np.full(len(times), np.nan)})
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly form of the model (see from_dict)."""
+        return {
+            'mean': self.mean,
+            'residual_std': self.residual_std,
+            'constituents': {name: {'amplitude': a, 'phase': g} for name, (a, g) in self.constituents.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HarmonicModel":
+        """Rebuild a model saved with to_dict()."""
+        return cls(data['mean'],
+                   {name: (c['amplitude'], c['phase']) for name, c in data['constituents'].items()},
+                   data.get('residual_std', float('nan')))
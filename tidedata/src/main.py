@@ -4,7 +4,7 @@ Irish Marine Data - Main Demo Application
 Shows how to fetch and display real-time marine data from Irish waters.
 """
 
-from marine_data import IrishMarineDataClient, save_to_csv, format_for_display, convert_timestamp
+from marine_data_v2 import IrishMarineDataClient, save_to_csv, format_for_display, convert_timestamp
 from datetime import datetime
 import time
 import os
@@ -22,11 +22,10 @@ def print_section(title: str):
     print(f"  {title}")
     print(f"{'─'*60}")
 
-def demo_single_buoy():
+def demo_single_buoy(client: IrishMarineDataClient):
     """Demonstrate getting data from a single buoy."""
     print_section("📍 SINGLE BUOY DATA - M2 (West of Ireland)")
     
-    client = IrishMarineDataClient()
     data = client.get_wave_buoy_data("M2", hours_back=6)
     
     print(format_for_display(data))
@@ -46,11 +45,10 @@ def demo_single_buoy():
     
     return data
 
-def demo_all_buoys():
+def demo_all_buoys(client: IrishMarineDataClient):
     """Get current conditions from all M-series buoys."""
     print_section("🌊 ALL IRISH WEATHER BUOYS (M1-M6)")
     
-    client = IrishMarineDataClient()
     all_buoys = client.get_all_buoy_data(hours_back=1)
     
     print("\n📊 Current Conditions Summary:")
@@ -73,11 +71,10 @@ def demo_all_buoys():
     
     return all_buoys
 
-def demo_galway_tides():
+def demo_galway_tides(client: IrishMarineDataClient):
     """Get tide data from Galway Harbor."""
     print_section("📈 GALWAY HARBOR TIDES")
     
-    client = IrishMarineDataClient()
     tides = client.get_galway_tide_data(hours_back=24)
     
     print(format_for_display(tides))
@@ -105,12 +102,10 @@ def demo_galway_tides():
     
     return tides
 
-def demo_weather_monitoring():
+def demo_weather_monitoring(client: IrishMarineDataClient):
     """Demonstrate weather monitoring from marine stations."""
     print_section("💨 WEATHER CONDITIONS")
     
-    client = IrishMarineDataClient()
-    
     # Get weather from multiple locations
     stations = ["M1", "M3", "M5"]
     
@@ -131,42 +126,34 @@ def demo_weather_monitoring():
     
     return True
 
-def check_marine_safety():
+def check_marine_safety(client: IrishMarineDataClient):
     """Check if conditions are safe for marine activities."""
     print_section("🛡️ MARINE SAFETY CHECK")
     
-    client = IrishMarineDataClient()
-    
     # Define safety thresholds
     SAFE_WAVE_HEIGHT = 2.0  # meters
     SAFE_WIND_SPEED = 15.0  # knots
     
     print("\n🔍 Checking conditions for marine activities...")
     
-    # Check a few key locations
+    # Check a few key locations - only the latest reading is needed
     locations = ["M2", "M4", "M5"]
     safe_count = 0
     
-    for buoy_id in locations:
-        data = client.get_wave_buoy_data(buoy_id, hours_back=1)
+    for buoy_id, latest in client.get_latest_readings(locations, hours_back=3).items():
+        wave_height = latest.wave_height
+        wind_speed = latest.wind_speed
         
-        if 'latest' in data:
-            latest = data['latest']
-            wave_height = latest.get('wave_height', 0)
-            wind_speed = latest.get('wind_speed', 0)
-            
-            is_safe = wave_height <= SAFE_WAVE_HEIGHT and wind_speed <= SAFE_WIND_SPEED
-            
-            status = "✅ SAFE" if is_safe else "⚠️  CAUTION"
-            if is_safe:
-                safe_count += 1
-            
-            print(f"\n{buoy_id} - {data.get('location', 'Unknown')}:")
-            print(f"  Status: {status}")
-            print(f"  Waves: {wave_height:.1f}m {'✅' if wave_height <= SAFE_WAVE_HEIGHT else '⚠️'}")
-            print(f"  Wind: {wind_speed:.1f} kts {'✅' if wind_speed <= SAFE_WIND_SPEED else '⚠️'}")
+        is_safe = wave_height <= SAFE_WAVE_HEIGHT and wind_speed <= SAFE_WIND_SPEED
+        
+        status = "✅ SAFE" if is_safe else "⚠️  CAUTION"
+        if is_safe:
+            safe_count += 1
         
-        time.sleep(0.5)
+        print(f"\n{buoy_id} - {latest.location}:")
+        print(f"  Status: {status}")
+        print(f"  Waves: {wave_height:.1f}m {'✅' if wave_height <= SAFE_WAVE_HEIGHT else '⚠️'}")
+        print(f"  Wind: {wind_speed:.1f} kts {'✅' if wind_speed <= SAFE_WIND_SPEED else '⚠️'}")
     
     print(f"\n📊 Summary: {safe_count}/{len(locations)} locations have safe conditions")
     
@@ -190,6 +177,8 @@ def main():
     
     input("\nPress Enter to start fetching data...")
     
+    # One client for every demo, so connections are opened once and reused
+    client = IrishMarineDataClient()
     try:
         # Run all demonstrations
         print("\n" + "="*60)
@@ -198,27 +187,27 @@ def main():
         
         # 1. Single buoy demo
         print("\n[1/5] Fetching single buoy data...")
-        m2_data = demo_single_buoy()
+        m2_data = demo_single_buoy(client)
         time.sleep(1)
         
         # 2. All buoys summary
         print("\n[2/5] Fetching all buoys...")
-        all_buoys = demo_all_buoys()
+        all_buoys = demo_all_buoys(client)
         time.sleep(1)
         
         # 3. Tide data
         print("\n[3/5] Fetching tide data...")
-        tide_data = demo_galway_tides()
+        tide_data = demo_galway_tides(client)
         time.sleep(1)
         
         # 4. Weather monitoring
         print("\n[4/5] Fetching weather data...")
-        demo_weather_monitoring()
+        demo_weather_monitoring(client)
         time.sleep(1)
         
         # 5. Safety check
         print("\n[5/5] Running safety analysis...")
-        check_marine_safety()
+        check_marine_safety(client)
         
         # Final summary
         print("\n" + "="*60)
@@ -247,6 +236,8 @@ def main():
     except Exception as e:
         print(f"\n\n❌ Error: {str(e)}")
         print("Please check your internet connection and try again.")
+    finally:
+        client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,300 +6,437 @@ No API key required! Free, open-source marine data from Ireland's coast.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import csv
 from io import StringIO
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, NamedTuple, Iterator, Union
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import re
+from urllib.parse import urlsplit, quote
+import numpy as np
 
-class IrishMarineDataClient:
+from response_cache import ResponseCache
+from result_memo import ResultMemo
+from rolling_window import RollingWindow
+from series import ObservationSeries, BuoySeries, TideSeries
+from harmonics import HarmonicModel
+from tide_state import state_label
+from erddap_csv import read_columns, iter_column_chunks
+from response_formats import get_format
+from archive import ObservationArchive
+from mmap_archive import MmapArchive
+from store import ObservationStore
+
+
+class TokenBucket:
     """
-    Simple client for accessing Irish Marine Institute ERDDAP data.
+    Token bucket used to keep our request rate polite.
     
-    This makes it easy to get:
-    - Wave heights and conditions from buoys M1-M6
-    - Tide levels from Galway Harbor
-    - Weather data (wind, temperature, pressure)
-    - Sea temperature readings
+    Each request takes one token. Tokens refill at `rate` per second up to
+    `capacity`, so short bursts (like refreshing all six buoys) go out at
+    once while sustained traffic is held to `rate` requests per second.
+    
+    Example:
+        >>> bucket = TokenBucket(rate=2.0, capacity=6)
+        >>> bucket.acquire()  # returns immediately while tokens remain
     """
     
-    def __init__(self):
-        """Initialize the client with ERDDAP base URL."""
-        self.base_url = "https://erddap.marine.ie/erddap/tabledap"
-        self.timeout = 30  # seconds to wait for response
+    def __init__(self, rate: float = 2.0, capacity: int = 6):
+        """Create a bucket that starts full."""
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        Take a token and return how many seconds to wait before using it.
         
-    def get_wave_buoy_data(self, buoy_id: str = "M2", hours_back: int = 24) -> Dict:
+        The bucket may go into debt, so callers that arrive while it is
+        empty queue up behind each other instead of all waking at once.
         """
-        Get wave and weather data from Irish weather buoys (M1-M6).
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def acquire(self):
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+# ERDDAP server-side reducers, see "orderBy" in the ERDDAP tabledap docs
+AGGREGATE_REDUCERS = {
+    'mean': 'orderByMean',
+    'sum': 'orderBySum',
+    'count': 'orderByCount',
+    'min': 'orderByMin',
+    'max': 'orderByMax',
+    'minmax': 'orderByMinMax',
+}
+
+# How often each dataset gets a new reading (minutes). Query windows start
+# on these boundaries so repeated queries produce identical, cacheable URLs.
+SAMPLING_MINUTES = {
+    'IWBNetwork': 60,
+    'IrishNationalTideGaugeNetwork': 5,
+}
+
+# Time buckets look like "10min", "1hour", "1day", "7days", "1month"
+_BUCKET_PATTERN = re.compile(r"^\d*(sec|min|hour|day|month|year)s?$")
+
+
+class LatestReading(NamedTuple):
+    """
+    The most recent reading from one buoy - no history attached.
+    
+    Returned by IrishMarineDataClient.get_latest_readings(). The fields
+    match the keys of data['latest'] from get_wave_buoy_data().
+    """
+    buoy_id: str
+    location: str
+    timestamp: str
+    wave_height: float
+    peak_period: float
+    wave_direction: float
+    wind_speed: float
+    wind_direction: float
+    sea_temperature: float
+    air_temperature: float
+    pressure: float
+    is_sample: bool = False  # True when the server had no reading and sample data was used
+    
+    def as_latest_dict(self) -> Dict:
+        """Return the reading in the same shape as data['latest']."""
+        latest = self._asdict()
+        for key in ('buoy_id', 'location', 'is_sample'):
+            del latest[key]
+        return latest
+
+
+class MarineDataQueries:
+    """
+    The parts of a marine data client that don't depend on how requests
+    are sent: ERDDAP query URLs, parsing responses into the result
+    dictionaries, and sample data for when the server can't be reached.
+    
+    IrishMarineDataClient (requests, threads) and AsyncIrishMarineDataClient
+    (aiohttp) each add their own transport on top, so both build the same
+    URLs and return the same shapes.
+    """
+    
+    base_url = "https://erddap.marine.ie/erddap/tabledap"
+    timeout = 30  # seconds to wait for response
+    archive: Optional[Union[ObservationArchive, MmapArchive]] = None
+    store: Optional[ObservationStore] = None
+    
+    def _save_series(self, series: ObservationSeries, latest_only: bool = False):
+        """
+        Keep a freshly parsed series in the archive and store, if set.
         
-        Args:
-            buoy_id: Buoy identifier (M1, M2, M3, M4, M5, M6)
-            hours_back: How many hours of historical data to retrieve
-            
-        Returns:
-            Dictionary with latest readings and historical data
-            
-        Example:
-            >>> client = IrishMarineDataClient()
-            >>> data = client.get_wave_buoy_data("M2", 6)
-            >>> print(f"Wave height: {data['latest']['wave_height']}m")
+        latest_only results (just the newest row) go to the store only: the
+        full-window fetches that follow archive the same readings anyway.
+        """
+        if not len(series):
+            return
+        if self.archive is not None and not latest_only:
+            try:
+                self.archive.write(series)
+            except Exception as e:
+                print(f"⚠️ Could not archive {series.station}: {str(e)}")
+        if self.store is not None:
+            try:
+                self.store.upsert(series)
+            except Exception as e:
+                print(f"⚠️ Could not store {series.station}: {str(e)}")
+    
+    def _summarize_buoys(self, buoys: List[str], fetched: List[Dict]) -> List[Dict]:
+        """Reduce full buoy results to the short summaries get_all_buoy_data returns."""
+        results = []
+        for buoy_id, data in zip(buoys, fetched):
+            if data and data.get('latest'):
+                summary = {
+                    'buoy_id': buoy_id,
+                    'timestamp': data['latest'].get('timestamp', 'N/A'),
+                    'wave_height': data['latest'].get('wave_height', 0),
+                    'wind_speed': data['latest'].get('wind_speed', 0),
+                    'sea_temp': data['latest'].get('sea_temperature', 0),
+                    'location': data.get('location', 'Irish Waters')
+                }
+                results.append(summary)
+        
+        return results
+    
+    def window_start(self, hours_back: float, dataset: Optional[str] = None) -> str:
         """
+        Start of the query window, formatted for ERDDAP (ISO 8601).
         
-        # Calculate time range
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(hours=hours_back)
+        Public so callers that record what a fetch covered (e.g. the
+        collector marking store coverage) use the same window.
         
-        # Format times for ERDDAP (ISO 8601)
-        time_start = start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        For known datasets the start is rounded down to the sampling
+        interval: the window may include one extra older reading, but the
+        same query made minutes later gives the same URL.
+        """
+        start_time = datetime.utcnow() - timedelta(hours=hours_back)
+        step = SAMPLING_MINUTES.get(dataset)
+        if step:
+            minutes = start_time.hour * 60 + start_time.minute
+            floored = minutes - minutes % step
+            start_time = start_time.replace(hour=floored // 60, minute=floored % 60,
+                                            second=0, microsecond=0)
+        return start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    
+    def _station_constraint(self, station_ids) -> str:
+        """
+        Build the (already URL-encoded) station_id constraint.
         
+        One station is matched exactly; a list of stations becomes a
+        regular expression such as station_id=~"(M1|M2|M3)".
+        """
+        if isinstance(station_ids, str):
+            return f"station_id=%22{quote(station_ids)}%22"
+        pattern = "(" + "|".join(re.escape(s) for s in station_ids) + ")"
+        return f"station_id=~%22{quote(pattern, safe='')}%22"
+    
+    def _time_constraint(self, time_start: str, since: Optional[str]) -> str:
+        """Time constraint: the whole window, or only rows newer than `since`."""
+        if since:
+            return f"time%3E{since}"
+        return f"time%3E={time_start}"
+    
+    def _build_buoy_url(self, buoy_id, hours_back: int, latest_only: bool = False,
+                        since: Optional[str] = None) -> str:
+        """Build the ERDDAP CSV query URL for one buoy (or a list of buoys)."""
         # Build the WORKING query URL
         dataset = "IWBNetwork"
+        time_start = self.window_start(hours_back, dataset)
         # Note: WaveHeight is in meters, WindSpeed in knots
         variables = "station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure"
         
         # Build URL with proper encoding (> must be %3E, quotes must be %22)
         url = f"{self.base_url}/{dataset}.csv"
         # WORKING FORMAT: Use %3E for >= and %22 for quotes
-        query = f"?{variables}&station_id=%22{buoy_id}%22&time%3E={time_start}"
-        full_url = url + query
-        
-        try:
-            print(f"🌊 Fetching data from buoy {buoy_id}...")
-            response = requests.get(full_url, timeout=self.timeout)
-            
-            if response.status_code == 200:
-                return self._parse_buoy_csv(response.text, buoy_id)
-            else:
-                print(f"⚠️ Error: Server returned status {response.status_code}")
-                print("📊 Using sample data for demonstration...")
-                return self._get_mock_buoy_data(buoy_id)
-                
-        except Exception as e:
-            print(f"⚠️ Connection error: {str(e)}")
-            print("📊 Using sample data for demonstration...")
-            return self._get_mock_buoy_data(buoy_id)
+        query = f"?{variables}&{self._station_constraint(buoy_id)}&{self._time_constraint(time_start, since)}"
+        if latest_only:
+            # Server-side: keep only the row with the largest time per station
+            query += "&orderByMax(%22station_id,time%22)"
+        return url + query
     
-    def get_galway_tide_data(self, hours_back: int = 24) -> Dict:
-        """
-        Get tide level data from Galway Harbor.
-        
-        Args:
-            hours_back: How many hours of historical data to retrieve
-            
-        Returns:
-            Dictionary with current tide level and historical data
-            
-        Example:
-            >>> client = IrishMarineDataClient()
-            >>> tides = client.get_galway_tide_data(12)
-            >>> print(f"Current tide level: {tides['latest']['water_level']}m")
-        """
-        
-        # Calculate time range
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(hours=hours_back)
-        
-        # Format times for ERDDAP
-        time_start = start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-        
+    def _build_tide_url(self, hours_back: int, since: Optional[str] = None) -> str:
+        """Build the ERDDAP CSV query URL for the Galway tide gauge."""
         # Build the WORKING query URL
         dataset = "IrishNationalTideGaugeNetwork"
+        time_start = self.window_start(hours_back, dataset)
         variables = "station_id,time,Water_Level_LAT,Water_Level_OD_Malin"
         
         # Build URL with proper encoding
         url = f"{self.base_url}/{dataset}.csv"
         # WORKING FORMAT: Use %3E for >= and %20 for spaces in "Galway Port"
-        query = f"?{variables}&station_id=%22Galway%20Port%22&time%3E={time_start}"
-        full_url = url + query
-        
-        try:
-            print(f"📈 Fetching tide data from Galway Harbor...")
-            response = requests.get(full_url, timeout=self.timeout)
-            
-            if response.status_code == 200:
-                return self._parse_tide_csv(response.text)
-            else:
-                print(f"⚠️ Error: Server returned status {response.status_code}")
-                print("📊 Using sample data for demonstration...")
-                return self._get_mock_tide_data()
-                
-        except Exception as e:
-            print(f"⚠️ Connection error: {str(e)}")
-            print("📊 Using sample data for demonstration...")
-            return self._get_mock_tide_data()
+        query = f"?{variables}&station_id=%22Galway%20Port%22&{self._time_constraint(time_start, since)}"
+        return url + query
     
-    def get_all_buoy_data(self, hours_back: int = 1) -> List[Dict]:
-        """
-        Get latest data from all M-series buoys (M1-M6).
+    def _build_aggregate_url(self, dataset: str, stations: List[str], variables: List[str],
+                             bucket: str, reducer: str, hours_back: int) -> str:
+        """Build an ERDDAP query that reduces rows per station and time bucket (see get_aggregated)."""
+        if reducer not in AGGREGATE_REDUCERS:
+            raise ValueError(f"reducer must be one of {', '.join(AGGREGATE_REDUCERS)}")
+        if not _BUCKET_PATTERN.match(bucket):
+            raise ValueError(f"bucket should look like '1hour' or '1day', not '{bucket}'")
+        if reducer in ('min', 'max', 'minmax') and len(variables) != 1:
+            raise ValueError(f"reducer '{reducer}' works on exactly one variable")
+        time_start = self.window_start(hours_back, dataset)
         
-        Args:
-            hours_back: How many hours of data to retrieve
-            
-        Returns:
-            List of dictionaries, one for each buoy
-            
-        Example:
-            >>> client = IrishMarineDataClient()
-            >>> all_buoys = client.get_all_buoy_data(1)
-            >>> for buoy in all_buoys:
-            >>>     print(f"{buoy['buoy_id']}: {buoy['wave_height']}m waves")
-        """
+        # orderByMin/Max/MinMax use the last column in the list as the one to compare
+        group = f"station_id,time/{bucket}"
+        if reducer in ('min', 'max', 'minmax'):
+            group += f",{variables[0]}"
         
-        buoys = ["M1", "M2", "M3", "M4", "M5", "M6"]
-        results = []
-        
-        for buoy_id in buoys:
-            print(f"📍 Checking buoy {buoy_id}...")
-            data = self.get_wave_buoy_data(buoy_id, hours_back)
-            
-            if data and data.get('latest'):
-                summary = {
-                    'buoy_id': buoy_id,
-                    'timestamp': data['latest'].get('timestamp', 'N/A'),
-                    'wave_height': data['latest'].get('wave_height', 0),
-                    'wind_speed': data['latest'].get('wind_speed', 0),
-                    'sea_temp': data['latest'].get('sea_temperature', 0),
-                    'location': data.get('location', 'Irish Waters')
-                }
-                results.append(summary)
-            
-            time.sleep(0.5)  # Be nice to the server
+        station_ids = stations[0] if len(stations) == 1 else stations
+        url = f"{self.base_url}/{dataset}.csv"
+        query = (f"?station_id,time,{','.join(variables)}"
+                 f"&{self._station_constraint(station_ids)}&time%3E={time_start}"
+                 f"&{AGGREGATE_REDUCERS[reducer]}(%22{group}%22)")
+        return url + query
+    
+    def _build_stream_url(self, stations: Optional[List[str]], hours_back: int, dataset: str):
+        """The series type and query URL for streaming a dataset (see iter_chunks)."""
+        if dataset == "IWBNetwork":
+            return BuoySeries, self._build_buoy_url(stations or ["M1", "M2", "M3", "M4", "M5", "M6"], hours_back)
+        if dataset == "IrishNationalTideGaugeNetwork":
+            return TideSeries, self._build_tide_url(hours_back)
+        raise ValueError(f"Streaming is not supported for dataset '{dataset}'")
+    
+    def _chunk_from_columns(self, series_type, columns) -> Dict[str, ObservationSeries]:
+        """One streamed batch of columns as series, by station."""
+        chunk = series_type.split_by_station(*columns)
+        if series_type is BuoySeries:
+            for station, series in chunk.items():
+                series.location = self._get_buoy_location(station)
+        return chunk
+    
+    def _rows_of_chunk(self, chunk: Dict[str, ObservationSeries]) -> Iterator[Dict]:
+        """The readings of a streamed batch as row dictionaries (see iter_rows)."""
+        for station, series in chunk.items():
+            names = list(series.values)
+            columns = [series.values[name].tolist() for name in names]
+            for time_string, *row in zip(series.time_strings(), *columns):
+                yield {'station_id': station, 'time': time_string, **dict(zip(names, row))}
+    
+    def _series_from_columns(self, series_type, columns, stations: List[str]) -> Dict:
+        """Split fetched columns into one (saved) series per station; empty series if columns is None."""
+        if columns is None:
+            result = {station: series_type.empty(station) for station in stations}
+        else:
+            result = series_type.split_by_station(*columns, stations)
         
-        return results
+        for station, series in result.items():
+            if series_type is BuoySeries:
+                series.location = self._get_buoy_location(station)
+            self._save_series(series)
+        return result
     
-    def get_weather_data(self, station: str = "M2", hours_back: int = 6) -> Dict:
+    def _parse_latest_readings(self, csv_text: str, buoy_ids: List[str]) -> Dict[str, LatestReading]:
         """
-        Get weather data (wind, temperature, pressure) from a marine station.
+        Turn a latest-only response into one LatestReading per buoy.
         
-        Args:
-            station: Station ID (M1-M6 or coastal station name)
-            hours_back: Hours of historical data
-            
-        Returns:
-            Dictionary with weather parameters
-            
-        Example:
-            >>> client = IrishMarineDataClient()
-            >>> weather = client.get_weather_data("M3", 3)
-            >>> print(f"Wind: {weather['latest']['wind_speed']} knots")
+        Buoys missing from the response (or every buoy, if csv_text is
+        empty) get sample data marked is_sample.
         """
+        latest_rows: Dict[str, Dict] = {}
+        for row in csv.DictReader(StringIO(csv_text)):
+            if row.get('station_id') in buoy_ids and row.get('time', '').startswith('20'):
+                latest_rows[row['station_id']] = row
         
-        # For M-series buoys, use the buoy data function
-        if station.startswith("M") and len(station) == 2:
-            return self.get_wave_buoy_data(station, hours_back)
+        readings = {}
+        for buoy_id in buoy_ids:
+            location = self._get_buoy_location(buoy_id)
+            if buoy_id in latest_rows:
+                readings[buoy_id] = LatestReading(buoy_id, location,
+                                                  **self._latest_from_row(latest_rows[buoy_id]))
+            else:
+                sample = self._get_mock_buoy_data(buoy_id)['latest']
+                readings[buoy_id] = LatestReading(buoy_id, location, **sample, is_sample=True)
         
-        # For other stations, use a different dataset
-        # This is a placeholder for coastal weather stations
-        return self._get_mock_weather_data(station)
+        return readings
+    
+    def _empty_aggregate(self, dataset: str, stations: List[str], bucket: str, reducer: str) -> Dict:
+        """The get_aggregated result before any rows are added."""
+        return {
+            'dataset': dataset,
+            'reducer': reducer,
+            'bucket': bucket,
+            'stations': {station: [] for station in stations},
+            'data_points': 0
+        }
+    
+    def _parse_aggregate_csv(self, csv_text: str, variables: List[str], result: Dict):
+        """Add the rows of an aggregate response to a get_aggregated result."""
+        for row in csv.DictReader(StringIO(csv_text)):
+            station_rows = result['stations'].get(row.get('station_id', ''))
+            if station_rows is None or not row.get('time', '').startswith('20'):
+                continue  # units row or a station we did not ask for
+            reduced = {'time': row['time']}
+            for variable in variables:
+                value = row.get(variable)
+                reduced[variable] = float(value) if value not in (None, '', 'NaN') else None
+            station_rows.append(reduced)
+            result['data_points'] += 1
     
-    def _parse_buoy_csv(self, csv_text: str, buoy_id: str) -> Dict:
+    def _parse_buoy_csv(self, csv_text: str, buoy_id: str, latest_only: bool = False) -> Dict:
         """Parse ERDDAP CSV response for buoy data."""
         
         try:
-            # Parse CSV using csv module
-            reader = csv.DictReader(StringIO(csv_text))
-            rows = list(reader)
-            
-            # Skip units row if present
-            if rows and not rows[0].get('time', '').startswith('20'):
-                rows = rows[1:]
-            
-            if not rows:
+            series = BuoySeries.from_csv(csv_text, buoy_id, self._get_buoy_location(buoy_id))
+            if not len(series):
                 return self._get_mock_buoy_data(buoy_id)
-            
-            # Get the latest row
-            latest_row = rows[-1]
-            
-            # Extract and convert values with proper field names
-            latest_data = {
-                'timestamp': latest_row.get('time', ''),
-                'wave_height': float(latest_row.get('WaveHeight', 0) or 0),
-                'peak_period': float(latest_row.get('WavePeriod', 0) or 0),
-                'wave_direction': float(latest_row.get('MeanWaveDirection', 0) or 0),
-                'wind_speed': float(latest_row.get('WindSpeed', 0) or 0),
-                'wind_direction': float(latest_row.get('WindDirection', 0) or 0),
-                'sea_temperature': float(latest_row.get('SeaTemperature', 0) or 0),
-                'air_temperature': float(latest_row.get('AirTemperature', 0) or 0),
-                'pressure': float(latest_row.get('AtmosphericPressure', 0) or 0)
-            }
-            
-            # Get historical data
-            historical = []
-            for row in rows:
-                if row.get('time', '').startswith('20'):  # Valid timestamp
-                    historical.append({
-                        'time': row.get('time', ''),
-                        'wave_height': float(row.get('WaveHeight', 0) or 0),
-                        'wind_speed': float(row.get('WindSpeed', 0) or 0)
-                    })
-            
-            return {
-                'buoy_id': buoy_id,
-                'location': self._get_buoy_location(buoy_id),
-                'latest': latest_data,
-                'historical': historical,
-                'data_points': len(rows)
-            }
+            self._save_series(series, latest_only)
+            return series.to_dict()
             
         except Exception as e:
             print(f"⚠️ Error parsing data: {str(e)}")
             return self._get_mock_buoy_data(buoy_id)
     
+    def _parse_multi_buoy_csv(self, csv_text: str, buoy_ids: List[str],
+                              latest_only: bool = False) -> Dict[str, Dict]:
+        """Parse an ERDDAP CSV response holding several buoys, split by station_id."""
+        
+        try:
+            by_buoy = BuoySeries.from_csv_by_station(csv_text, buoy_ids)
+        except Exception as e:
+            print(f"⚠️ Error parsing data: {str(e)}")
+            by_buoy = {}
+        
+        results = {}
+        for buoy_id in buoy_ids:
+            series = by_buoy.get(buoy_id)
+            if series is None or not len(series):
+                results[buoy_id] = self._get_mock_buoy_data(buoy_id)
+            else:
+                series.location = self._get_buoy_location(buoy_id)
+                self._save_series(series, latest_only)
+                results[buoy_id] = series.to_dict()
+        return results
+    
+    def _latest_from_row(self, row: Dict) -> Dict:
+        """Convert one buoy CSV row into the data['latest'] dictionary."""
+        return {
+            'timestamp': row.get('time', ''),
+            'wave_height': float(row.get('WaveHeight', 0) or 0),
+            'peak_period': float(row.get('WavePeriod', 0) or 0),
+            'wave_direction': float(row.get('MeanWaveDirection', 0) or 0),
+            'wind_speed': float(row.get('WindSpeed', 0) or 0),
+            'wind_direction': float(row.get('WindDirection', 0) or 0),
+            'sea_temperature': float(row.get('SeaTemperature', 0) or 0),
+            'air_temperature': float(row.get('AirTemperature', 0) or 0),
+            'pressure': float(row.get('AtmosphericPressure', 0) or 0)
+        }
+    
     def _parse_tide_csv(self, csv_text: str) -> Dict:
         """Parse ERDDAP CSV response for tide data."""
         
         try:
-            # Parse CSV using csv module
-            reader = csv.DictReader(StringIO(csv_text))
-            rows = list(reader)
-            
-            # Skip units row if present
-            if rows and not rows[0].get('time', '').startswith('20'):
-                rows = rows[1:]
-            
-            if not rows:
+            series = TideSeries.from_csv(csv_text, 'Galway Port')
+            if not len(series):
                 return self._get_mock_tide_data()
-            
-            # Get latest reading
-            latest_row = rows[-1]
-            
-            latest_data = {
-                'timestamp': latest_row.get('time', ''),
-                'water_level': float(latest_row.get('Water_Level_LAT', 0) or 0),
-                'water_level_malin': float(latest_row.get('Water_Level_OD_Malin', 0) or 0)
-            }
-            
-            # Get historical for tide chart
-            historical = []
-            for row in rows:
-                if row.get('time', '').startswith('20'):  # Valid timestamp
-                    historical.append({
-                        'time': row.get('time', ''),
-                        'level': float(row.get('Water_Level_LAT', 0) or 0)
-                    })
-            
-            return {
-                'station': 'Galway Port',
-                'latest': latest_data,
-                'historical': historical,
-                'data_points': len(rows),
-                'tide_state': self._calculate_tide_state(historical)
-            }
+            self._save_series(series)
+            return series.to_dict()
             
         except Exception as e:
             print(f"⚠️ Error parsing tide data: {str(e)}")
             return self._get_mock_tide_data()
     
+    def _tide_latest_from_row(self, row: Dict) -> Dict:
+        """Convert one tide gauge CSV row into the data['latest'] dictionary."""
+        return {
+            'timestamp': row.get('time', ''),
+            'water_level': float(row.get('Water_Level_LAT', 0) or 0),
+            'water_level_malin': float(row.get('Water_Level_OD_Malin', 0) or 0)
+        }
+    
     def _calculate_tide_state(self, historical: List[Dict]) -> str:
-        """Determine if tide is rising or falling."""
+        """Determine if tide is rising or falling from the trend of recent levels."""
         if len(historical) < 2:
             return "Unknown"
         
-        recent_levels = [h['level'] for h in historical[-5:]]
-        if recent_levels[-1] > recent_levels[0]:
-            return "Rising 📈"
-        else:
-            return "Falling 📉"
+        # Least-squares slope over the last few readings, so one noisy
+        # reading at either end does not flip the answer
+        recent_levels = np.array([h['level'] for h in historical[-7:]], dtype=np.float64)
+        slope = np.polyfit(np.arange(len(recent_levels)), recent_levels, 1)[0]
+        return state_label(slope)
     
     def _get_buoy_location(self, buoy_id: str) -> str:
         """Get human-readable location for buoy."""
@@ -415,6 +552,777 @@ class IrishMarineDataClient:
             'note': 'Sample data for demonstration'
         }
 
+
+class IrishMarineDataClient(MarineDataQueries):
+    """
+    Simple client for accessing Irish Marine Institute ERDDAP data.
+    
+    This makes it easy to get:
+    - Wave heights and conditions from buoys M1-M6
+    - Tide levels from Galway Harbor
+    - Weather data (wind, temperature, pressure)
+    - Sea temperature readings
+    """
+    
+    def __init__(self, max_workers: int = 6, max_per_host: int = 6,
+                 requests_per_second: Optional[float] = 2.0, burst: int = 6,
+                 pool_size: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                 memo: Optional[ResultMemo] = None, response_format: str = "csv",
+                 archive: Optional[Union[ObservationArchive, MmapArchive]] = None,
+                 store: Optional[ObservationStore] = None):
+        """
+        Initialize the client with ERDDAP base URL.
+        
+        The client keeps one HTTP session open so connections to ERDDAP are
+        reused between calls. Use it in a `with` block (or call close())
+        to release them.
+        
+        Args:
+            max_workers: Threads used when fetching several buoys at once
+            max_per_host: Most requests allowed in flight to one server
+            requests_per_second: Sustained request rate (None to disable)
+            burst: How many requests may go out back-to-back
+            pool_size: Keep-alive connections kept per host
+                (defaults to enough for max_workers)
+            cache: Optional ResponseCache to reuse recent responses from disk
+            memo: Optional ResultMemo to share parsed results in memory
+                (results are then shared between callers - don't modify them)
+            response_format: File type the *_series methods ask ERDDAP for:
+                "csv", or the smaller binary "parquet" (needs pyarrow) or
+                "ncCF" (needs netCDF4). Falls back to CSV if unusable.
+            archive: Optional ObservationArchive (Parquet) or MmapArchive
+                (memory-mapped arrays) that every fetched buoy and tide
+                reading is appended to
+            store: Optional ObservationStore that keeps every fetched
+                reading; windows it already covers are answered from it,
+                and it is used instead of sample data when ERDDAP is down
+        """
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.throttle = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self.pool_size = pool_size or max(max_workers, max_per_host)
+        self.session = self._create_session()
+        self.cache = cache
+        self.memo = memo
+        self._windows: Dict[tuple, RollingWindow] = {}
+        self._windows_lock = threading.Lock()
+        self.archive = archive
+        self.store = store
+        self.response_format = get_format(response_format)
+        if not self.response_format.available():
+            print(f"⚠️ {response_format} responses need an optional package; using CSV")
+            self.response_format = get_format("csv")
+    
+    def _create_session(self) -> requests.Session:
+        """Create the pooled, keep-alive session shared by all requests."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+    
+    def close(self):
+        """Close the HTTP session and its pooled connections."""
+        self.session.close()
+    
+    def __enter__(self) -> "IrishMarineDataClient":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _memoized(self, key, compute, should_store=lambda result: 'note' not in result):
+        """
+        Run compute() through the result memo, if the client has one.
+        
+        Sample data (marked with a 'note') is not kept, so a failed fetch
+        is retried on the next call rather than remembered.
+        """
+        if self.memo is None:
+            return compute()
+        return self.memo.get_or_compute(key, compute, should_store)
+    
+    def _read_store(self, series_type, station: str, hours_back: int) -> Optional[Dict]:
+        """The window as a legacy result from the store, if it covers it."""
+        if self.store is None:
+            return None
+        dataset = series_type.DATASET
+        window_start = self.window_start(hours_back, dataset)
+        current_to = (datetime.utcnow() - timedelta(seconds=self.store.max_age)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        try:
+            if not self.store.covers(dataset, station, window_start, current_to):
+                return None
+            series = self.store.read(dataset, station, window_start)
+        except Exception as e:
+            print(f"⚠️ Could not read the store: {str(e)}")
+            return None
+        return self._stored_result(series) if len(series) else None
+    
+    def _stored_result(self, series: ObservationSeries, note: Optional[str] = None) -> Dict:
+        """Turn a series read from the store into the legacy result dict."""
+        if isinstance(series, BuoySeries):
+            series.location = self._get_buoy_location(series.station)
+        result = series.to_dict()
+        if note:
+            result['note'] = note
+        return result
+    
+    def _with_store(self, series_type, window_start: str, fetch) -> Dict[str, Dict]:
+        """
+        Run fetch() (returning station -> result) and settle it with the store.
+        
+        Stations fetched for real have their window recorded as covered;
+        stations that only got sample data are answered from stored
+        readings instead, when there are any.
+        """
+        if self.store is None:
+            return fetch()
+        fetched_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        results = fetch()
+        for station, result in results.items():
+            try:
+                if 'note' not in result:
+                    self.store.mark_covered(series_type.DATASET, station, window_start, fetched_at)
+                    continue
+                stored = self.store.read(series_type.DATASET, station, window_start)
+                if len(stored):
+                    print(f"💾 ERDDAP unavailable - using stored readings for {station}")
+                    results[station] = self._stored_result(stored, 'Stored readings (ERDDAP unavailable)')
+            except Exception as e:
+                print(f"⚠️ Could not use the store for {station}: {str(e)}")
+        return results
+    
+    def reset_incremental(self):
+        """Forget the readings kept for incremental fetches."""
+        with self._windows_lock:
+            self._windows.clear()
+    
+    def _incremental_buoy_data(self, buoy_id: str, hours_back: int) -> Dict:
+        """Update this buoy's rolling window with new readings and return it."""
+        window = self._poll_window(
+            "IWBNetwork", buoy_id, hours_back,
+            lambda since: self._build_buoy_url(buoy_id, hours_back, since=since),
+            lambda row: ({'time': row.get('time', ''),
+                          'wave_height': float(row.get('WaveHeight', 0) or 0),
+                          'wind_speed': float(row.get('WindSpeed', 0) or 0)},
+                         self._latest_from_row(row)))
+        if window is None:
+            return self._get_mock_buoy_data(buoy_id)
+        
+        historical, latest = window
+        return {
+            'buoy_id': buoy_id,
+            'location': self._get_buoy_location(buoy_id),
+            'latest': latest,
+            'historical': historical,
+            'data_points': len(historical)
+        }
+    
+    def _incremental_tide_data(self, hours_back: int) -> Dict:
+        """Update the Galway tide rolling window with new readings and return it."""
+        window = self._poll_window(
+            "IrishNationalTideGaugeNetwork", "Galway Port", hours_back,
+            lambda since: self._build_tide_url(hours_back, since=since),
+            lambda row: ({'time': row.get('time', ''),
+                          'level': float(row.get('Water_Level_LAT', 0) or 0)},
+                         self._tide_latest_from_row(row)))
+        if window is None:
+            return self._get_mock_tide_data()
+        
+        historical, latest = window
+        return {
+            'station': 'Galway Port',
+            'latest': latest,
+            'historical': historical,
+            'data_points': len(historical),
+            'tide_state': self._calculate_tide_state(historical)
+        }
+    
+    def _poll_window(self, dataset: str, station: str, hours_back: int, build_url, to_entries):
+        """
+        Fetch readings newer than the window's last one and merge them in.
+        
+        The first call (or one reaching further back than before) fetches
+        the whole window. Readings older than hours_back are dropped.
+        
+        Returns:
+            (historical list, latest dict) copies, or None if there is no data
+        """
+        with self._windows_lock:
+            window = self._windows.setdefault((dataset, station), RollingWindow())
+        cutoff = self.window_start(hours_back, dataset)
+        
+        with window.lock:
+            since = window.last_seen
+            if window.covered_from is None or window.covered_from > cutoff:
+                since = None  # we don't hold this much history yet - fetch it all
+            
+            try:
+                print(f"🔄 Checking {station} for new readings since {since or cutoff}...")
+                response = self._http_get(build_url(since))
+                
+                if response.status_code == 200:
+                    if since is None:
+                        window.clear()
+                        window.covered_from = cutoff
+                    for row in csv.DictReader(StringIO(response.text)):
+                        if row.get('time', '').startswith('20'):  # skips the units row
+                            entry, latest = to_entries(row)
+                            window.add(row['time'], entry, latest)
+                elif response.status_code == 404 and since is not None:
+                    pass  # ERDDAP answers 404 when no rows match: nothing new yet
+                else:
+                    print(f"⚠️ Error: Server returned status {response.status_code}")
+                    
+            except Exception as e:
+                print(f"⚠️ Connection error: {str(e)}")
+            
+            window.evict_before(cutoff)
+            if not window:
+                return None
+            return list(window.rows), dict(window.latest)
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get the semaphore limiting concurrent requests to this URL's host."""
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+    
+    def _http_get(self, url: str) -> requests.Response:
+        """
+        Get a URL, answering from the response cache when possible.
+        
+        A fresh cached copy is returned without touching the network; a
+        stale one is revalidated with a conditional request.
+        """
+        if self.cache is None:
+            return self._send(url)
+        
+        entry = self.cache.lookup(url)
+        if entry is not None and entry.fresh:
+            return entry.to_response()
+        
+        response = self._send(url, entry.validators() if entry else None)
+        if response.status_code == 304 and entry is not None:
+            return self.cache.revalidate(entry).to_response()
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        return response
+    
+    def _send(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Send a GET request, respecting the rate limit and per-host cap."""
+        if self.throttle:
+            self.throttle.acquire()
+        with self._host_slot(url):
+            return self.session.get(url, timeout=self.timeout, headers=headers)
+        
+    def get_wave_buoy_data(self, buoy_id: str = "M2", hours_back: int = 24,
+                           latest_only: bool = False, incremental: bool = False) -> Dict:
+        """
+        Get wave and weather data from Irish weather buoys (M1-M6).
+        
+        Args:
+            buoy_id: Buoy identifier (M1, M2, M3, M4, M5, M6)
+            hours_back: How many hours of historical data to retrieve
+            latest_only: Ask the server for just the newest row in the
+                window (historical then holds that single reading)
+            incremental: Only download readings newer than the last call's,
+                keeping the rest of the window in memory (for pollers)
+            
+        Returns:
+            Dictionary with latest readings and historical data
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> data = client.get_wave_buoy_data("M2", 6)
+            >>> print(f"Wave height: {data['latest']['wave_height']}m")
+        """
+        
+        if incremental:
+            return self._incremental_buoy_data(buoy_id, hours_back)
+        
+        if latest_only:
+            full_url = self._build_buoy_url(buoy_id, hours_back, latest_only)
+            return self._memoized(('buoy', buoy_id, full_url),
+                                  lambda: self._fetch_wave_buoy_data(buoy_id, full_url, latest_only))
+        
+        stored = self._read_store(BuoySeries, buoy_id, hours_back)
+        if stored is not None:
+            return stored
+        
+        full_url = self._build_buoy_url(buoy_id, hours_back)
+        window_start = self.window_start(hours_back, "IWBNetwork")
+        # The URL holds the dataset, station and rounded window, so it is the memo key
+        return self._memoized(('buoy', buoy_id, full_url), lambda: self._with_store(
+            BuoySeries, window_start,
+            lambda: {buoy_id: self._fetch_wave_buoy_data(buoy_id, full_url)})[buoy_id])
+    
+    def _fetch_wave_buoy_data(self, buoy_id: str, full_url: str, latest_only: bool = False) -> Dict:
+        """Fetch and parse one buoy's data (sample data if that fails)."""
+        
+        try:
+            print(f"🌊 Fetching data from buoy {buoy_id}...")
+            response = self._http_get(full_url)
+            
+            if response.status_code == 200:
+                return self._parse_buoy_csv(response.text, buoy_id, latest_only)
+            else:
+                print(f"⚠️ Error: Server returned status {response.status_code}")
+                print("📊 Using sample data for demonstration...")
+                return self._get_mock_buoy_data(buoy_id)
+                
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+            print("📊 Using sample data for demonstration...")
+            return self._get_mock_buoy_data(buoy_id)
+    
+    def get_galway_tide_data(self, hours_back: int = 24, incremental: bool = False) -> Dict:
+        """
+        Get tide level data from Galway Harbor.
+        
+        Args:
+            hours_back: How many hours of historical data to retrieve
+            incremental: Only download readings newer than the last call's,
+                keeping the rest of the window in memory (for pollers)
+            
+        Returns:
+            Dictionary with current tide level and historical data
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> tides = client.get_galway_tide_data(12)
+            >>> print(f"Current tide level: {tides['latest']['water_level']}m")
+        """
+        
+        if incremental:
+            return self._incremental_tide_data(hours_back)
+        
+        stored = self._read_store(TideSeries, "Galway Port", hours_back)
+        if stored is not None:
+            return stored
+        
+        full_url = self._build_tide_url(hours_back)
+        window_start = self.window_start(hours_back, "IrishNationalTideGaugeNetwork")
+        return self._memoized(('tide', full_url), lambda: self._with_store(
+            TideSeries, window_start,
+            lambda: {"Galway Port": self._fetch_galway_tide_data(full_url)})["Galway Port"])
+    
+    def _fetch_galway_tide_data(self, full_url: str) -> Dict:
+        """Fetch and parse Galway tide data (sample data if that fails)."""
+        
+        try:
+            print(f"📈 Fetching tide data from Galway Harbor...")
+            response = self._http_get(full_url)
+            
+            if response.status_code == 200:
+                return self._parse_tide_csv(response.text)
+            else:
+                print(f"⚠️ Error: Server returned status {response.status_code}")
+                print("📊 Using sample data for demonstration...")
+                return self._get_mock_tide_data()
+                
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+            print("📊 Using sample data for demonstration...")
+            return self._get_mock_tide_data()
+    
+    def get_buoy_data_batch(self, buoy_ids: List[str], hours_back: int = 24,
+                            latest_only: bool = False) -> Dict[str, Dict]:
+        """
+        Get wave and weather data for several buoys with a single request.
+        
+        ERDDAP returns every requested station in one CSV, which is split
+        up by station_id here. Each value has the same shape as
+        get_wave_buoy_data() returns.
+        
+        Args:
+            buoy_ids: Buoy identifiers, e.g. ["M2", "M3"]
+            hours_back: How many hours of historical data to retrieve
+            latest_only: Ask the server for just the newest row per buoy
+            
+        Returns:
+            Dictionary of buoy_id -> buoy data, in the order requested
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> buoys = client.get_buoy_data_batch(["M2", "M5"], 6)
+            >>> print(f"M5 waves: {buoys['M5']['latest']['wave_height']}m")
+        """
+        
+        full_url = self._build_buoy_url(buoy_ids, hours_back, latest_only)
+        fetch = lambda: self._fetch_buoy_data_batch(buoy_ids, full_url, latest_only)
+        if not latest_only and self.store is not None:
+            stored = {buoy_id: self._read_store(BuoySeries, buoy_id, hours_back) for buoy_id in buoy_ids}
+            if all(result is not None for result in stored.values()):
+                return stored
+            window_start = self.window_start(hours_back, "IWBNetwork")
+            fetch = lambda: self._with_store(BuoySeries, window_start,
+                                             lambda: self._fetch_buoy_data_batch(buoy_ids, full_url))
+        return self._memoized(('buoys', tuple(buoy_ids), full_url), fetch,
+                              lambda result: not any('note' in data for data in result.values()))
+    
+    def _fetch_buoy_data_batch(self, buoy_ids: List[str], full_url: str,
+                               latest_only: bool = False) -> Dict[str, Dict]:
+        """Fetch and split a multi-buoy query (sample data where that fails)."""
+        
+        try:
+            print(f"🌊 Fetching data from buoys {', '.join(buoy_ids)}...")
+            response = self._http_get(full_url)
+            
+            if response.status_code == 200:
+                return self._parse_multi_buoy_csv(response.text, buoy_ids, latest_only)
+            else:
+                print(f"⚠️ Error: Server returned status {response.status_code}")
+                print("📊 Using sample data for demonstration...")
+                
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+            print("📊 Using sample data for demonstration...")
+        
+        return {buoy_id: self._get_mock_buoy_data(buoy_id) for buoy_id in buoy_ids}
+    
+    def get_wave_buoy_series(self, buoy_id: str = "M2", hours_back: int = 24) -> BuoySeries:
+        """
+        Get one buoy's readings as NumPy arrays instead of a list of dicts.
+        
+        Much lighter than get_wave_buoy_data() for long windows. Unlike the
+        dict methods there is no sample-data fallback: if the fetch fails
+        the series is simply empty.
+        
+        Args:
+            buoy_id: Buoy identifier (M1, M2, M3, M4, M5, M6)
+            hours_back: How many hours of historical data to retrieve
+            
+        Returns:
+            BuoySeries; use .to_dict() for the get_wave_buoy_data() shape
+            
+        Example:
+            >>> series = client.get_wave_buoy_series("M2", 24 * 90)
+            >>> print(f"Highest waves: {np.nanmax(series['wave_height'])}m")
+        """
+        
+        full_url = self._build_buoy_url(buoy_id, hours_back)
+        return self._memoized(('buoy_series', full_url),
+                              lambda: self._fetch_series(BuoySeries, full_url, [buoy_id])[buoy_id],
+                              len)
+    
+    def get_buoy_series_batch(self, buoy_ids: List[str], hours_back: int = 24) -> Dict[str, BuoySeries]:
+        """
+        Get several buoys' readings as NumPy arrays with a single request.
+        
+        Args:
+            buoy_ids: Buoy identifiers, e.g. ["M2", "M3"]
+            hours_back: How many hours of historical data to retrieve
+            
+        Returns:
+            Dictionary of buoy_id -> BuoySeries, in the order requested
+        """
+        
+        full_url = self._build_buoy_url(buoy_ids, hours_back)
+        return self._memoized(('buoy_series', tuple(buoy_ids), full_url),
+                              lambda: self._fetch_series(BuoySeries, full_url, buoy_ids),
+                              lambda result: all(len(series) for series in result.values()))
+    
+    def get_galway_tide_series(self, hours_back: int = 24) -> TideSeries:
+        """
+        Get Galway tide levels as NumPy arrays (empty if the fetch fails).
+        
+        Args:
+            hours_back: How many hours of historical data to retrieve
+            
+        Returns:
+            TideSeries; use .to_dict() for the get_galway_tide_data() shape
+        """
+        
+        full_url = self._build_tide_url(hours_back)
+        return self._memoized(('tide_series', full_url),
+                              lambda: self._fetch_series(TideSeries, full_url, ["Galway Port"])["Galway Port"],
+                              len)
+    
+    def fit_galway_tide_model(self, days: int = 60, **fit_options) -> HarmonicModel:
+        """
+        Fit a harmonic tide model to recent Galway gauge readings.
+        
+        The model predicts the level at any time without further fetches.
+        Longer records resolve more constituents: about 15 days separates
+        M2 from S2, and six months adds K2 and P1.
+        
+        Args:
+            days: Days of observed levels to fit to
+            **fit_options: Passed to HarmonicModel.fit (constituents, rayleigh)
+            
+        Returns:
+            The fitted HarmonicModel (raises ValueError if no data came back)
+            
+        Example:
+            >>> model = client.fit_galway_tide_model(90)
+            >>> tomorrow = model.predict_series("2025-01-02T00:00:00Z", "2025-01-03T00:00:00Z")
+        """
+        
+        series = self.get_galway_tide_series(days * 24)
+        return HarmonicModel.fit_series(series, **fit_options)
+    
+    def _fetch_series(self, series_type, full_url: str, stations: List[str]) -> Dict:
+        """Fetch a query and parse it into one series per station."""
+        
+        columns = None
+        try:
+            columns = self._fetch_columns(full_url, list(series_type.COLUMNS))
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+        
+        return self._series_from_columns(series_type, columns, stations)
+    
+    def _fetch_columns(self, csv_url: str, numeric: List[str]):
+        """
+        Fetch a query as column arrays in the configured response format.
+        
+        If a binary format fails (the server refuses it, or the body can't
+        be decoded) the query is repeated as CSV.
+        
+        Returns:
+            (station_ids, times, values) as erddap_csv.read_columns returns,
+            or None if the server returned an error
+        """
+        response_format = self.response_format
+        if response_format.name != "csv":
+            try:
+                response = self._http_get(response_format.url_for(csv_url))
+                if response.status_code == 200:
+                    return response_format.decode(response.content, numeric)
+                if response.status_code == 404:
+                    return None  # ERDDAP answers 404 when no rows match
+                print(f"⚠️ {response_format.name} request returned status {response.status_code}, retrying as CSV")
+            except Exception as e:
+                print(f"⚠️ {response_format.name} response unusable ({str(e)}), retrying as CSV")
+        
+        response = self._http_get(csv_url)
+        if response.status_code == 200:
+            return read_columns(response.text, numeric)
+        print(f"⚠️ Error: Server returned status {response.status_code}")
+        return None
+    
+    def iter_chunks(self, stations: Optional[List[str]] = None, hours_back: int = 24 * 365,
+                    dataset: str = "IWBNetwork",
+                    chunk_rows: int = 10000) -> Iterator[Dict[str, ObservationSeries]]:
+        """
+        Stream a long query, parsing it in batches as the bytes arrive.
+        
+        Memory use depends on chunk_rows, not on how many years are asked
+        for, which makes this the way to do historical backfills. The
+        response cache and memo are not used, and there is no sample-data
+        fallback: HTTP errors are raised.
+        
+        Args:
+            stations: Buoy ids for IWBNetwork (default all M-series buoys);
+                ignored for the tide dataset, which is Galway Port only
+            hours_back: How many hours of history to stream
+            dataset: "IWBNetwork" or "IrishNationalTideGaugeNetwork"
+            chunk_rows: Rows parsed per batch
+            
+        Yields:
+            Dictionary of station id -> BuoySeries/TideSeries for each batch,
+            holding only the stations present in that batch
+            
+        Example:
+            >>> for chunk in client.iter_chunks(["M2"], hours_back=24 * 365 * 3):
+            ...     archive.write(chunk["M2"])
+        """
+        
+        series_type, full_url = self._build_stream_url(stations, hours_back, dataset)
+        for columns in self._stream_columns(full_url, list(series_type.COLUMNS), chunk_rows):
+            yield self._chunk_from_columns(series_type, columns)
+    
+    def iter_rows(self, stations: Optional[List[str]] = None, hours_back: int = 24 * 365,
+                  dataset: str = "IWBNetwork", chunk_rows: int = 10000) -> Iterator[Dict]:
+        """
+        Stream a long query one reading at a time (see iter_chunks).
+        
+        Yields:
+            {'station_id': ..., 'time': ISO string, <variable>: float, ...}
+            with NaN where a station reported nothing
+        """
+        
+        for chunk in self.iter_chunks(stations, hours_back, dataset, chunk_rows):
+            yield from self._rows_of_chunk(chunk)
+    
+    def _stream_columns(self, url: str, numeric: List[str], chunk_rows: int):
+        """Send a streamed GET and yield erddap_csv column chunks from its body."""
+        if self.throttle:
+            self.throttle.acquire()
+        with self._host_slot(url):
+            print(f"🌊 Streaming {url.split('?')[0].rsplit('/', 1)[-1]}...")
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+            try:
+                if response.status_code == 404:
+                    return  # ERDDAP answers 404 when no rows match
+                response.raise_for_status()
+                response.raw.decode_content = True  # let urllib3 undo gzip
+                yield from iter_column_chunks(response.raw, numeric, chunk_rows)
+            finally:
+                response.close()
+    
+    def get_latest_readings(self, buoy_ids: Optional[List[str]] = None,
+                            hours_back: int = 3) -> Dict[str, LatestReading]:
+        """
+        Get just the newest reading from each buoy, as cheaply as possible.
+        
+        The server picks the last row per station (ERDDAP orderByMax), so
+        only one row per buoy is downloaded and parsed.
+        
+        Args:
+            buoy_ids: Buoys to check (defaults to M1-M6)
+            hours_back: How far back to look for a reading
+            
+        Returns:
+            Dictionary of buoy_id -> LatestReading, in the order requested
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> latest = client.get_latest_readings(["M2", "M4"])
+            >>> print(f"M2 waves: {latest['M2'].wave_height}m")
+        """
+        
+        buoy_ids = buoy_ids or ["M1", "M2", "M3", "M4", "M5", "M6"]
+        full_url = self._build_buoy_url(buoy_ids, hours_back, latest_only=True)
+        csv_text = ""
+        
+        try:
+            print(f"🌊 Fetching latest readings from buoys {', '.join(buoy_ids)}...")
+            response = self._http_get(full_url)
+            
+            if response.status_code == 200:
+                csv_text = response.text
+            else:
+                print(f"⚠️ Error: Server returned status {response.status_code}")
+                print("📊 Using sample data for demonstration...")
+                
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+            print("📊 Using sample data for demonstration...")
+        
+        return self._parse_latest_readings(csv_text, buoy_ids)
+    
+    def get_all_buoy_data(self, hours_back: int = 1, batched: bool = True,
+                          concurrent: bool = True) -> List[Dict]:
+        """
+        Get latest data from all M-series buoys (M1-M6).
+        
+        Args:
+            hours_back: How many hours of data to retrieve
+            batched: Fetch all buoys in one request (see get_buoy_data_batch)
+            concurrent: When not batched, send the per-buoy requests in
+                parallel (results keep buoy order)
+            
+        Returns:
+            List of dictionaries, one for each buoy
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> all_buoys = client.get_all_buoy_data(1)
+            >>> for buoy in all_buoys:
+            >>>     print(f"{buoy['buoy_id']}: {buoy['wave_height']}m waves")
+        """
+        
+        buoys = ["M1", "M2", "M3", "M4", "M5", "M6"]
+        
+        print(f"📍 Checking buoys {', '.join(buoys)}...")
+        # Only the latest reading is summarized, so let the server pick it
+        if batched:
+            fetched = list(self.get_buoy_data_batch(buoys, hours_back, latest_only=True).values())
+        elif concurrent:
+            # The token bucket and per-host limit keep this polite to the server
+            workers = max(1, min(self.max_workers, len(buoys)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(lambda b: self.get_wave_buoy_data(b, hours_back, latest_only=True), buoys))
+        else:
+            fetched = [self.get_wave_buoy_data(buoy_id, hours_back, latest_only=True) for buoy_id in buoys]
+        
+        return self._summarize_buoys(buoys, fetched)
+    
+    def get_aggregated(self, dataset: str, stations: List[str], variables: List[str],
+                       bucket: str = "1hour", reducer: str = "mean",
+                       hours_back: int = 24 * 7) -> Dict:
+        """
+        Get time-bucketed statistics computed by the ERDDAP server.
+        
+        Instead of downloading every reading and averaging locally, the
+        server groups rows by station and time bucket and sends back one
+        row per group (two for "minmax").
+        
+        Args:
+            dataset: ERDDAP dataset, e.g. "IWBNetwork"
+            stations: station_id values, e.g. ["M2", "M3"] or ["Galway Port"]
+            variables: Columns to reduce, e.g. ["WaveHeight", "WindSpeed"]
+            bucket: Time bucket size, e.g. "1hour", "1day", "7days"
+            reducer: One of mean, sum, count, min, max, minmax.
+                min/max/minmax pick the row with the extreme value of a
+                single variable, so they take exactly one variable.
+            hours_back: How many hours of history to summarize
+            
+        Returns:
+            Dictionary with the settings used and, under 'stations', a list
+            of {'time': ..., <variable>: value} rows per station (None where
+            the server had no value). Empty lists if the request failed.
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> daily = client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight"],
+            ...                               bucket="1day", reducer="max", hours_back=24 * 30)
+            >>> for row in daily['stations']['M2']:
+            >>>     print(f"{row['time']}: {row['WaveHeight']}m")
+        """
+        
+        full_url = self._build_aggregate_url(dataset, stations, variables, bucket, reducer, hours_back)
+        result = self._empty_aggregate(dataset, stations, bucket, reducer)
+        
+        try:
+            print(f"📊 Fetching {reducer} per {bucket} from {dataset}...")
+            response = self._http_get(full_url)
+            
+            if response.status_code == 200:
+                self._parse_aggregate_csv(response.text, variables, result)
+            else:
+                print(f"⚠️ Error: Server returned status {response.status_code}")
+                
+        except Exception as e:
+            print(f"⚠️ Connection error: {str(e)}")
+        
+        return result
+    
+    def get_weather_data(self, station: str = "M2", hours_back: int = 6) -> Dict:
+        """
+        Get weather data (wind, temperature, pressure) from a marine station.
+        
+        Args:
+            station: Station ID (M1-M6 or coastal station name)
+            hours_back: Hours of historical data
+            
+        Returns:
+            Dictionary with weather parameters
+            
+        Example:
+            >>> client = IrishMarineDataClient()
+            >>> weather = client.get_weather_data("M3", 3)
+            >>> print(f"Wind: {weather['latest']['wind_speed']} knots")
+        """
+        
+        # For M-series buoys, use the buoy data function
+        if station.startswith("M") and len(station) == 2:
+            return self.get_wave_buoy_data(station, hours_back)
+        
+        # For other stations, use a different dataset
+        # This is a placeholder for coastal weather stations
+        return self._get_mock_weather_data(station)
+    
 # Utility functions for data export and formatting
 
 def save_to_csv(data: Dict, filename: str):
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped archive of observation history.
+Each station's readings are stored as plain fixed-width .npy arrays, so any
+number of processes on one host can map the same files and share their
+pages instead of each loading a private copy.
+"""
+
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from erddap_csv import epoch_seconds
+from series import ObservationSeries, SERIES_TYPES
+
+
+class MmapArchive:
+    """
+    Fixed-width arrays per dataset and station, opened with np.load(mmap_mode='r').
+
+    Layout: <directory>/<dataset>/<station>/CURRENT names the live
+    generation folder, which holds time.npy (int64 epoch seconds, sorted,
+    unique), one <variable>.npy (float32) per variable and a LENGTH file.
+    The arrays are allocated with spare capacity and only their first
+    LENGTH entries are readings.
+
+    - New readings after the last archived one (the usual poll) are
+      written into the spare capacity in place, then LENGTH is replaced:
+      O(new readings), and readers never see a partly written row.
+    - Readings already archived with the same values are skipped.
+    - Anything else (older or corrected readings, or running out of
+      capacity) writes a whole new generation folder and swaps CURRENT to
+      it atomically, so a reader always maps columns of one generation.
+
+    Only one process should write. Archives in the older flat layout (the
+    .npy files directly in the station folder) are read as they are and
+    moved to a generation folder on their next write.
+
+    Example:
+        >>> archive = MmapArchive("/srv/tidedata/mmap")
+        >>> client = IrishMarineDataClient(archive=archive)   # writer
+        >>> m2 = MmapArchive("/srv/tidedata/mmap").open("IWBNetwork", "M2")   # any reader
+        >>> data = m2.to_dict(lazy=True)   # 'historical' built on demand
+    """
+
+    TIME_FILE = "time.npy"
+    CURRENT_FILE = "CURRENT"
+    LENGTH_FILE = "LENGTH"
+    MIN_CAPACITY = 1024
+
+    def __init__(self, directory: str):
+        """
+        Open (or create) an archive.
+
+        Args:
+            directory: Folder holding the .npy files
+        """
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, series: ObservationSeries) -> int:
+        """
+        Merge a series into the station's arrays (newest reading wins per time).
+
+        Returns:
+            How many readings were not archived before
+        """
+        if not len(series):
+            return 0
+        folder = self._folder(series.DATASET, series.station)
+        names = list(series.COLUMNS.values())
+        times = series.times.astype('datetime64[s]').astype(np.int64)
+        values = {name: series.values[name].astype(np.float32) if name in series.values
+                  else np.full(len(times), np.nan, dtype=np.float32) for name in names}
+        if not np.all(np.diff(times) > 0):
+            times, values = _sorted_unique(times, values)
+
+        with self._lock:
+            generation, count = self._current(folder)
+            if generation is None:
+                return self._rewrite(folder, None, times, values, 0)
+            old_times = np.load(os.path.join(generation, self.TIME_FILE), mmap_mode='r')
+            tail = times > old_times[count - 1] if count else np.ones(len(times), dtype=bool)
+            head = np.flatnonzero(~tail)
+            if len(head) and not self._already_archived(generation, old_times[:count], times[head],
+                                                        {name: array[head] for name, array in values.items()}):
+                return self._rewrite(folder, generation, times, values, count)
+            added = int(tail.sum())
+            if not added:
+                return 0
+            if count + added > len(old_times):
+                return self._rewrite(folder, generation, times[tail],
+                                     {name: array[tail] for name, array in values.items()}, count)
+            self._append(generation, count, times[tail], {name: array[tail] for name, array in values.items()})
+            return added
+
+    def write_all(self, chunk: Dict[str, ObservationSeries]) -> int:
+        """Write every series in a station -> series dict (e.g. from iter_chunks)."""
+        return sum(self.write(series) for series in chunk.values())
+
+    def open(self, dataset: str, station: str, start: Optional[str] = None,
+             end: Optional[str] = None) -> ObservationSeries:
+        """
+        Map a station's history without reading it into memory.
+
+        Args:
+            dataset: "IWBNetwork" or "IrishNationalTideGaugeNetwork"
+            station: Station id, e.g. "M2" or "Galway Port"
+            start: First time to include (ISO string, inclusive)
+            end: Time to stop at (ISO string, exclusive)
+
+        Returns:
+            A BuoySeries or TideSeries whose arrays are read-only views of
+            the mapped files (float32 values), empty if nothing is archived
+        """
+        series_type = SERIES_TYPES[dataset]
+        folder = self._folder(dataset, station)
+        for _ in range(3):
+            generation, count = self._current(folder)
+            if generation is None:
+                return series_type.empty(station)
+            try:
+                epoch = np.load(os.path.join(generation, self.TIME_FILE), mmap_mode='r')[:count]
+                first = np.searchsorted(epoch, epoch_seconds(start)) if start else 0
+                stop = np.searchsorted(epoch, epoch_seconds(end)) if end else count
+                values = {name: self._load_column(generation, name, count)[first:stop]
+                          for name in series_type.COLUMNS.values()}
+            except FileNotFoundError:
+                continue  # the writer swapped generations under us; look again
+            return series_type(station, epoch[first:stop].view('datetime64[s]'), values)
+        raise RuntimeError(f"Archive for {station} kept changing while opening it")
+
+    def stations(self, dataset: str) -> List[str]:
+        """Stations with archived readings for a dataset."""
+        folder = os.path.join(self.directory, dataset)
+        return sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+
+    def _folder(self, dataset: str, station: str) -> str:
+        return os.path.join(self.directory, dataset, station)
+
+    def _current(self, folder: str) -> Tuple[Optional[str], int]:
+        """The live generation folder and its reading count ((None, 0) if nothing is archived)."""
+        if not os.path.exists(os.path.join(folder, self.CURRENT_FILE)):
+            legacy = os.path.join(folder, self.TIME_FILE)
+            if os.path.exists(legacy):
+                return folder, len(np.load(legacy, mmap_mode='r'))
+        try:
+            with open(os.path.join(folder, self.CURRENT_FILE)) as f:
+                generation = os.path.join(folder, f.read().strip())
+            with open(os.path.join(generation, self.LENGTH_FILE)) as f:
+                return generation, int(f.read())
+        except FileNotFoundError:
+            return None, 0
+
+    def _already_archived(self, generation: str, old_times: np.ndarray, times: np.ndarray,
+                          values: Dict[str, np.ndarray]) -> bool:
+        """True if every reading is archived already with the same values."""
+        position = np.searchsorted(old_times, times)
+        if np.any(position >= len(old_times)) or np.any(old_times[np.minimum(position, len(old_times) - 1)] != times):
+            return False
+        for name, array in values.items():
+            old = self._load_column(generation, name, len(old_times))[position]
+            if not np.array_equal(old, array, equal_nan=True):
+                return False
+        return True
+
+    def _append(self, generation: str, count: int, times: np.ndarray, values: Dict[str, np.ndarray]):
+        """Write readings into the spare capacity, then publish the new length."""
+        stop = count + len(times)
+        capacity = len(np.load(os.path.join(generation, self.TIME_FILE), mmap_mode='r'))
+        for name, array in {'time': times, **values}.items():
+            path = os.path.join(generation, f"{name}.npy")
+            if os.path.exists(path):
+                column = np.load(path, mmap_mode='r+')
+            else:   # a variable this generation doesn't have yet
+                column = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(capacity,))
+                column[:] = np.nan
+            column[count:stop] = array
+            column.flush()
+            del column
+        self._write_text(os.path.join(generation, self.LENGTH_FILE), str(stop))
+
+    def _rewrite(self, folder: str, generation: Optional[str], times: np.ndarray,
+                 values: Dict[str, np.ndarray], old_count: int) -> int:
+        """Merge readings with the archived ones into a new generation and switch to it."""
+        if generation is not None and old_count:
+            old_times = np.load(os.path.join(generation, self.TIME_FILE), mmap_mode='r')[:old_count]
+            times = np.concatenate([old_times, times])
+            values = {name: np.concatenate([self._load_column(generation, name, old_count), array])
+                      for name, array in values.items()}
+            times, values = _sorted_unique(times, values)
+        capacity = max(self.MIN_CAPACITY, 2 * len(times))
+
+        legacy = generation == folder
+        number = 1 if generation is None or legacy else int(os.path.basename(generation).split('-')[1]) + 1
+        name = f"gen-{number:06d}"
+        target = os.path.join(folder, name)
+        shutil.rmtree(target, ignore_errors=True)   # left over from an interrupted write
+        os.makedirs(target)
+        for column_name, array in {'time': times, **values}.items():
+            column = np.lib.format.open_memmap(os.path.join(target, f"{column_name}.npy"), mode='w+',
+                                               dtype=array.dtype, shape=(capacity,))
+            if array.dtype.kind == 'f':
+                column[len(array):] = np.nan
+            column[:len(array)] = array
+            column.flush()
+            del column
+        self._write_text(os.path.join(target, self.LENGTH_FILE), str(len(times)))
+        self._write_text(os.path.join(folder, self.CURRENT_FILE), name)   # the switch
+        # Readers that mapped the old files keep them until they let go
+        if legacy:
+            for file_name in os.listdir(folder):
+                if file_name.endswith('.npy'):
+                    os.remove(os.path.join(folder, file_name))
+        elif generation is not None:
+            shutil.rmtree(generation, ignore_errors=True)
+        return len(times) - old_count
+
+    def _load_column(self, folder: str, name: str, count: int) -> np.ndarray:
+        """Map one variable's file, trimmed to `count` readings (all NaN if absent)."""
+        path = os.path.join(folder, f"{name}.npy")
+        if not os.path.exists(path):
+            return np.full(count, np.nan, dtype=np.float32)
+        return np.load(path, mmap_mode='r')[:count]
+
+    @staticmethod
+    def _write_text(path: str, text: str):
+        """Replace a small file atomically."""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+def _sorted_unique(times: np.ndarray, values: Dict[str, np.ndarray]):
+    """Sort by time, keeping the last of equal times (stable, so the newest wins)."""
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    last = np.append(times[1:] != times[:-1], True)
+    return times[last], {name: np.asarray(array)[order][last] for name, array in values.items()}
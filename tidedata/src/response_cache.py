@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for ERDDAP responses.
+Buoys only report hourly, so repeating the same query a few minutes later
+can be answered from disk instead of the Marine Institute's servers.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit, unquote, quote
+
+import requests
+
+# How long (seconds) a cached response is used before asking the server again
+DEFAULT_TTLS = {
+    'IWBNetwork': 10 * 60,                     # buoys report hourly
+    'IrishNationalTideGaugeNetwork': 5 * 60,   # tide gauges report every few minutes
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize an ERDDAP query URL so equivalent queries share a cache entry.
+
+    Percent-encoding is made uniform (">" and "%3E" are the same) and the
+    plain constraints are sorted, since their order does not change the
+    result. The variable list and orderBy filters keep their order.
+    """
+    parts = urlsplit(url)
+    pieces = [quote(unquote(p), safe=",=~()") for p in parts.query.split('&')] if parts.query else []
+    head, rest = pieces[:1], pieces[1:]
+    constraints = sorted(p for p in rest if '(' not in p)
+    filters = [p for p in rest if '(' in p]
+    query = '&'.join(head + constraints + filters)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{query}"
+
+
+def dataset_from_url(url: str) -> str:
+    """Get the dataset name from a tabledap URL (".../tabledap/IWBNetwork.csv?...")."""
+    filename = urlsplit(url).path.rsplit('/', 1)[-1]
+    return filename.split('.', 1)[0]
+
+
+class CachedResponse:
+    """One cached response body with the headers needed to revalidate it."""
+
+    def __init__(self, key: str, body: bytes, meta: Dict, fresh: bool):
+        self.key = key
+        self.body = body
+        self.meta = meta
+        self.fresh = fresh
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional request (If-None-Match / If-Modified-Since)."""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Rebuild a requests.Response so callers can treat hits like fetches."""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.body
+        response.encoding = self.meta.get('encoding') or 'utf-8'
+        response.url = self.meta.get('url', '')
+        return response
+
+
+class ResponseCache:
+    """
+    Size-bounded, least-recently-used cache of ERDDAP responses on disk.
+
+    Each response is kept for a per-dataset time-to-live. After that it is
+    revalidated with the server using its ETag/Last-Modified headers, so an
+    unchanged response costs a 304 instead of a full download.
+
+    Example:
+        >>> cache = ResponseCache("~/.cache/tidedata", max_bytes=50_000_000)
+        >>> client = IrishMarineDataClient(cache=cache)
+        >>> client.get_wave_buoy_data("M2", 6)
+        >>> print(cache.stats())
+    """
+
+    def __init__(self, directory: str, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 5 * 60, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Open (or create) a cache directory.
+
+        Args:
+            directory: Where cached responses are stored
+            ttls: Seconds to trust a response, per dataset name
+                (merged over DEFAULT_TTLS)
+            default_ttl: Seconds to trust responses from other datasets
+            max_bytes: Total size of cached bodies before the least
+                recently used are deleted
+        """
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        self._load_index()
+
+    def _load_index(self):
+        """Find the entries already on disk."""
+        for name in os.listdir(self.directory):
+            if name.endswith('.body'):
+                key = name[:-len('.body')]
+                if os.path.exists(self._path(key, '.json')):
+                    self._sizes[key] = os.path.getsize(self._path(key, '.body'))
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def key_for(self, url: str) -> str:
+        """Cache key for a URL (hash of the normalized URL)."""
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def ttl_for(self, url: str) -> float:
+        """Time-to-live in seconds for responses to this URL."""
+        return self.ttls.get(dataset_from_url(url), self.default_ttl)
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """
+        Find a cached response for a URL.
+
+        Returns None if nothing is cached. Otherwise the entry's `fresh`
+        flag says whether it can be used without asking the server.
+        Fresh lookups count as hits, everything else as a miss (a stale
+        entry confirmed by the server is also counted by revalidate()).
+        """
+        key = self.key_for(url)
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key, '.json')) as f:
+                    meta = json.load(f)
+                with open(self._path(key, '.body'), 'rb') as f:
+                    body = f.read()
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            fresh = time.time() - meta['stored_at'] < self.ttl_for(url)
+            if fresh:
+                self.hits += 1
+                os.utime(self._path(key, '.body'))  # mark as recently used
+            else:
+                self.misses += 1
+            return CachedResponse(key, body, meta, fresh)
+
+    def revalidate(self, entry: CachedResponse) -> CachedResponse:
+        """Record that the server confirmed (304) a stale entry is unchanged."""
+        with self._lock:
+            entry.meta['stored_at'] = time.time()
+            if entry.key in self._sizes:
+                os.utime(self._path(entry.key, '.body'))
+                self._write_json(entry.key, entry.meta)
+            else:
+                # Evicted while we were asking the server - put it back
+                self._write_entry(entry.key, entry.body, entry.meta)
+            self.revalidated += 1
+            entry.fresh = True
+            return entry
+
+    def store(self, url: str, response: requests.Response):
+        """Save a successful response, evicting old entries if over max_bytes."""
+        key = self.key_for(url)
+        body = response.content
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding,
+        }
+        with self._lock:
+            self._write_entry(key, body, meta)
+
+    def _write_entry(self, key: str, body: bytes, meta: Dict):
+        """Write body and metadata atomically, then enforce max_bytes (lock held)."""
+        tmp = self._path(key, '.body.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, self._path(key, '.body'))
+        self._write_json(key, meta)
+        self._sizes[key] = len(body)
+        self._evict()
+
+    def _write_json(self, key: str, meta: Dict):
+        tmp = self._path(key, '.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(key, '.json'))
+
+    def _evict(self):
+        """Delete least recently used entries until under max_bytes (lock held)."""
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=lambda k: os.path.getmtime(self._path(k, '.body')))
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes[key]
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        self._sizes.pop(key, None)
+        for suffix in ('.body', '.json'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cached response."""
+        with self._lock:
+            for key in list(self._sizes):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'evictions': self.evictions,
+                'entries': len(self._sizes),
+                'bytes': sum(self._sizes.values()),
+            }
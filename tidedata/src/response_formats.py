@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Response formats the client can ask ERDDAP for.
+CSV always works; Parquet and NetCDF (ncCF) are smaller on the wire and
+decode straight into arrays, but need optional packages (pyarrow, netCDF4).
+"""
+
+from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erddap_csv import read_columns, _frame_to_columns
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for Parquet responses
+    pq = None
+
+try:
+    import netCDF4
+except ImportError:  # optional: only needed for ncCF responses
+    netCDF4 = None
+
+Columns = Tuple[Optional[np.ndarray], np.ndarray, Dict[str, np.ndarray]]
+
+
+class ResponseFormat(ABC):
+    """
+    One ERDDAP file type and how to decode it.
+
+    decode() returns the same (station_ids, times, values) arrays as
+    erddap_csv.read_columns, so series code does not care which format
+    was used.
+    """
+
+    name = ""
+    extension = ""
+
+    def available(self) -> bool:
+        """True if the packages needed to decode this format are installed."""
+        return True
+
+    def url_for(self, csv_url: str) -> str:
+        """Turn one of the client's .csv query URLs into a URL for this format."""
+        return csv_url.replace(".csv?", f".{self.extension}?", 1)
+
+    @abstractmethod
+    def decode(self, body: bytes, numeric: Sequence[str]) -> Columns:
+        """Parse a response body into (station_ids, times, values)."""
+
+
+class CsvFormat(ResponseFormat):
+    """Plain ERDDAP .csv (names row, units row, data)."""
+
+    name = extension = "csv"
+
+    def decode(self, body: bytes, numeric: Sequence[str]) -> Columns:
+        return read_columns(body.decode('utf-8'), numeric)
+
+
+class ParquetFormat(ResponseFormat):
+    """ERDDAP .parquet, read with pyarrow."""
+
+    name = extension = "parquet"
+
+    def available(self) -> bool:
+        return pq is not None
+
+    def decode(self, body: bytes, numeric: Sequence[str]) -> Columns:
+        table = pq.read_table(BytesIO(body))
+        wanted = set(numeric) | {'station_id', 'time'}
+        frame = table.select([name for name in table.column_names if name in wanted]).to_pandas()
+        if frame['time'].dtype.kind in 'if':
+            frame['time'] = pd.to_datetime(frame['time'], unit='s')  # ERDDAP epoch seconds
+        return _frame_to_columns(frame, numeric)
+
+
+class NcCFFormat(ResponseFormat):
+    """
+    ERDDAP .ncCF (CF discrete sampling geometry), read with netCDF4.
+
+    Time-series datasets come back as a contiguous ragged array: one entry
+    per station with a rowSize count, and observation variables laid out
+    station after station.
+    """
+
+    name = extension = "ncCF"
+
+    def available(self) -> bool:
+        return netCDF4 is not None
+
+    def decode(self, body: bytes, numeric: Sequence[str]) -> Columns:
+        with netCDF4.Dataset('response.nc', memory=body) as dataset:
+            variables = dataset.variables
+            time = variables['time']
+            if not time.units.startswith("seconds since 1970-01-01"):
+                raise ValueError(f"Unexpected time units '{time.units}'")
+            seconds = np.ma.filled(np.ma.asarray(time[:], dtype=np.float64), np.nan)
+            times = seconds.round().astype(np.int64).astype('datetime64[s]')
+
+            stations = None
+            if 'station_id' in variables:
+                ids = variables['station_id'][:]
+                if getattr(ids, 'ndim', 1) == 2:
+                    ids = netCDF4.chartostring(ids)
+                ids = np.asarray(ids, dtype=object)
+                if 'rowSize' in variables and ids.shape != times.shape:
+                    ids = np.repeat(ids, np.asarray(variables['rowSize'][:], dtype=np.int64))
+                stations = ids
+
+            values = {name: np.ma.filled(np.ma.asarray(variables[name][:], dtype=np.float64), np.nan)
+                      if name in variables else np.full(len(times), np.nan)
+                      for name in numeric}
+        return stations, times, values
+
+
+FORMATS: Dict[str, ResponseFormat] = {
+    fmt.name: fmt for fmt in (CsvFormat(), ParquetFormat(), NcCFFormat())
+}
+
+
+def get_format(name: str) -> ResponseFormat:
+    """Look up a response format by name ("csv", "parquet" or "ncCF")."""
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown response format '{name}'; choose from {', '.join(FORMATS)}")
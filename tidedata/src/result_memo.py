@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+In-memory memo of parsed marine data results.
+When many request handlers ask for the same buoy in the same minute, only
+the first one fetches and parses; the rest wait for it and share the result.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultMemo:
+    """
+    Thread-safe time-to-live memo with single-flight loading.
+
+    Values are kept for `ttl` seconds, and at most `max_entries` of them
+    (least recently used are dropped first). If a key is being computed
+    when another thread asks for it, that thread waits for the running
+    computation instead of starting its own.
+
+    Results are shared between callers, so treat them as read-only.
+
+    Example:
+        >>> memo = ResultMemo(ttl=60)
+        >>> client = IrishMarineDataClient(memo=memo)
+        >>> client.get_wave_buoy_data("M2", 6)  # fetched and parsed
+        >>> client.get_wave_buoy_data("M2", 6)  # served from memory
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256):
+        """
+        Create an empty memo.
+
+        Args:
+            ttl: Seconds a result is reused
+            max_entries: Most results kept at once
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # callers that waited on another thread's fetch
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       should_store: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Return the memoized value for `key`, computing it at most once.
+
+        Args:
+            key: Anything hashable identifying the result
+            compute: Called (by one thread only) when there is no fresh value
+            should_store: Decides whether a computed value is kept; it is
+                returned to the waiting callers either way
+
+        Returns:
+            The cached or freshly computed value. If compute() raises, the
+            error is raised in every caller waiting on it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if should_store(flight.value):
+                self._store(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every memoized result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'entries': len(self._entries),
+            }
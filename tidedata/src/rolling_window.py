@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Rolling window of recent readings for incremental polling.
+A poller only downloads readings newer than the last one it has seen and
+keeps the rest of its window locally.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+
+class RollingWindow:
+    """
+    Time-ordered readings for one (dataset, station), newest last.
+
+    Times are ERDDAP ISO strings ("2024-11-01T01:00:00Z"), which sort
+    correctly as plain strings.
+
+    Example:
+        >>> window = RollingWindow()
+        >>> window.add("2024-11-01T01:00:00Z", {'wave_height': 2.4})
+        >>> window.last_seen
+        '2024-11-01T01:00:00Z'
+    """
+
+    def __init__(self):
+        self.times: List[str] = []
+        self.rows: List[Any] = []
+        self.latest: Optional[Dict] = None  # full 'latest' dict for the newest row
+        self.covered_from: Optional[str] = None  # oldest time we have fetched from
+        self.lock = threading.Lock()
+
+    @property
+    def last_seen(self) -> Optional[str]:
+        """Time of the newest reading, or None if the window is empty."""
+        return self.times[-1] if self.times else None
+
+    def add(self, time: str, row: Any, latest: Optional[Dict] = None) -> bool:
+        """
+        Append a reading if it is newer than everything in the window.
+
+        Args:
+            time: ISO timestamp of the reading
+            row: The historical entry to keep for it
+            latest: The full 'latest' dict for this reading
+
+        Returns:
+            True if it was added, False if it was already known
+        """
+        if self.times and time <= self.times[-1]:
+            return False
+        self.times.append(time)
+        self.rows.append(row)
+        if latest is not None:
+            self.latest = latest
+        return True
+
+    def evict_before(self, cutoff: str) -> int:
+        """Drop readings older than `cutoff`. Returns how many were dropped."""
+        count = bisect_left(self.times, cutoff)
+        if count:
+            del self.times[:count]
+            del self.rows[:count]
+        if not self.times:
+            self.latest = None
+        if self.covered_from is not None and self.covered_from < cutoff:
+            self.covered_from = cutoff  # we no longer hold anything older
+        return count
+
+    def clear(self):
+        """Forget every reading."""
+        self.times.clear()
+        self.rows.clear()
+        self.latest = None
+        self.covered_from = None
+
+    def __len__(self) -> int:
+        return len(self.times)
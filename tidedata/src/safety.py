@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Safety scores for water activities.
+Scores every (station, time) cell of a grid of conditions - waves, wind,
+sea temperature and tidal flow - for an activity in one set of array
+operations, and finds the best windows to go out.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from erddap_csv import as_datetime64
+from series import BuoySeries
+
+
+class Band(NamedTuple):
+    """
+    Where a condition is acceptable: 0 below low_zero, rising to 1 at
+    low_ok, 1 up to high_ok, falling to 0 at high_zero. None leaves a side open.
+    """
+    low_zero: Optional[float] = None
+    low_ok: Optional[float] = None
+    high_ok: Optional[float] = None
+    high_zero: Optional[float] = None
+
+    def score(self, values: np.ndarray) -> np.ndarray:
+        """0-1 for each value (NaN stays NaN)."""
+        result = np.ones(np.shape(values))
+        if self.low_ok is not None:
+            low_zero = self.low_ok if self.low_zero is None else self.low_zero
+            result = np.minimum(result, _ramp(values, low_zero, self.low_ok))
+        if self.high_ok is not None:
+            high_zero = self.high_ok if self.high_zero is None else self.high_zero
+            result = np.minimum(result, _ramp(-values, -high_zero, -self.high_ok))
+        return np.where(np.isnan(values), np.nan, result)
+
+
+class ActivityProfile(NamedTuple):
+    """Acceptable conditions for one activity (None: doesn't matter)."""
+    name: str
+    wave_height: Optional[Band] = None      # metres
+    wave_period: Optional[Band] = None      # seconds
+    wind_speed: Optional[Band] = None       # knots
+    sea_temperature: Optional[Band] = None  # °C
+    tide_rate: Optional[Band] = None        # |rate of change| in m/h, a stand-in for tidal flow
+    offshore_wind: float = 1.0              # wind limits scale by this when blowing offshore
+
+
+# Conservative starting points for Irish waters; adjust to the people using them
+PROFILES: Dict[str, ActivityProfile] = {
+    'swim': ActivityProfile('swim', wave_height=Band(high_ok=0.5, high_zero=1.0),
+                            wind_speed=Band(high_ok=10, high_zero=18),
+                            sea_temperature=Band(low_zero=6, low_ok=12),
+                            tide_rate=Band(high_ok=0.3, high_zero=1.0), offshore_wind=0.6),
+    'kayak': ActivityProfile('kayak', wave_height=Band(high_ok=0.8, high_zero=1.5),
+                             wind_speed=Band(high_ok=12, high_zero=20),
+                             sea_temperature=Band(low_zero=4, low_ok=10),
+                             tide_rate=Band(high_ok=0.5, high_zero=1.5), offshore_wind=0.6),
+    'sail': ActivityProfile('sail', wave_height=Band(high_ok=2.0, high_zero=3.5),
+                            wind_speed=Band(low_zero=4, low_ok=8, high_ok=18, high_zero=28)),
+    'surf': ActivityProfile('surf', wave_height=Band(low_zero=0.5, low_ok=1.0, high_ok=2.5, high_zero=4.0),
+                            wave_period=Band(low_zero=6, low_ok=9),
+                            wind_speed=Band(high_ok=10, high_zero=20)),
+}
+
+# Bearing (degrees) from each station towards the nearest shore, from the
+# side of Ireland the station lies on (see the client's _get_buoy_location):
+# a buoy off the south-west coast has the land to its north-east.
+SHORE_BEARINGS: Dict[str, float] = {
+    'M1': 45,             # Southwest of Ireland
+    'M2': 90,             # West of Ireland
+    'M3': 45,             # Southwest of Ireland
+    'M4': 315,            # Southeast of Ireland
+    'M5': 90,             # West of Ireland
+    'M6': 135,            # Northwest of Ireland
+    'Galway Port': 0,     # on the north shore of Galway Bay
+}
+
+
+def offshore_sector(shore_bearing: float, half_width: float = 45) -> Tuple[float, float]:
+    """Wind directions (from, degrees) blowing off a shore that lies at shore_bearing."""
+    return ((shore_bearing - half_width) % 360, (shore_bearing + half_width) % 360)
+
+
+# Wind directions (from, degrees) that blow away from the nearest shore,
+# roughly, for each station. Offshore wind carries swimmers and paddlers out.
+OFFSHORE_SECTORS: Dict[str, Tuple[float, float]] = {
+    station: offshore_sector(bearing) for station, bearing in SHORE_BEARINGS.items()
+}
+
+# Conditions scored, in the order of ScoreGrid.factors
+FACTORS = ['wave_height', 'wave_period', 'wind_speed', 'sea_temperature', 'tide_rate']
+
+# Factor -> BuoySeries variable it is read from
+BUOY_VARIABLES = {
+    'wave_height': 'wave_height',
+    'wave_period': 'peak_period',
+    'wind_speed': 'wind_speed',
+    'sea_temperature': 'sea_temperature',
+}
+
+
+class ScoreGrid(NamedTuple):
+    """Scores (0-100, NaN without data) for each station (rows) and time (columns)."""
+    stations: List[str]
+    times: np.ndarray                   # datetime64[s]
+    scores: np.ndarray                  # stations x times
+    factors: Dict[str, np.ndarray]      # per-condition 0-1 scores, stations x times
+
+    def limiting(self) -> np.ndarray:
+        """Name of the condition holding each cell's score down ('' without data)."""
+        names = list(self.factors)
+        stacked = np.stack([self.factors[name] for name in names])
+        worst = np.argmin(np.where(np.isnan(stacked), np.inf, stacked), axis=0)
+        return np.where(np.isnan(self.scores), '', np.array(names)[worst])
+
+
+class Window(NamedTuple):
+    """A run of consecutive good cells at one station."""
+    station: str
+    start: np.datetime64
+    end: np.datetime64                  # time of the last good cell
+    mean_score: float
+    min_score: float
+
+
+def score(profile: ActivityProfile, conditions: Dict[str, np.ndarray],
+          offshore: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score a grid of conditions for an activity.
+
+    Each condition the profile cares about is scored 0-1 by its Band, and
+    a cell's score is the worst of them (times 100): safety is decided by
+    the weakest factor. Conditions that are missing or NaN are left out;
+    a cell with none at all scores NaN.
+
+    Args:
+        profile: The activity
+        conditions: Arrays of equal (broadcastable) shape, keyed by FACTORS
+            names; tide_rate may be signed
+        offshore: True where the wind blows offshore (wind limits tighten)
+
+    Returns:
+        (scores 0-100, {factor: 0-1 scores})
+    """
+    factors = {}
+    for name in FACTORS:
+        band = getattr(profile, name)
+        if band is None or name not in conditions:
+            continue
+        values = np.asarray(conditions[name], dtype=np.float64)
+        if name == 'tide_rate':
+            values = np.abs(values)
+        if name == 'wind_speed' and offshore is not None and profile.offshore_wind != 1.0:
+            values = np.where(offshore, values / profile.offshore_wind, values)
+        factors[name] = band.score(values)
+    if not factors:
+        raise ValueError(f"No conditions given that matter for {profile.name}")
+    factors = dict(zip(factors, np.broadcast_arrays(*factors.values())))
+    stacked = np.stack(list(factors.values()))
+    with np.errstate(invalid='ignore'):
+        worst = np.min(np.where(np.isnan(stacked), np.inf, stacked), axis=0)
+    return np.where(np.isinf(worst), np.nan, 100.0 * worst), factors
+
+
+def score_grid(activity: str, buoys: Dict[str, BuoySeries], times, tide=None,
+               offshore_sectors: Dict[str, Tuple[float, float]] = OFFSHORE_SECTORS,
+               max_gap_minutes: float = 180) -> ScoreGrid:
+    """
+    Score an activity at every station and time.
+
+    Buoy readings are interpolated onto `times` (see value_at), so
+    observed series, forecasts on any grid, or a mix all work.
+
+    Args:
+        activity: A PROFILES key ("swim", "kayak", "sail", "surf")
+        buoys: station -> BuoySeries, e.g. from get_buoy_series_batch
+        times: datetime64 array or ISO strings to score at
+        tide: Optional TideSeries or HarmonicModel (anything with
+            level_at) giving the tidal flow, shared by every station
+        offshore_sectors: station -> (from, to) wind bearings counted as offshore
+        max_gap_minutes: Don't interpolate buoy readings across longer gaps
+
+    Returns:
+        ScoreGrid with one row per station, in the order given
+    """
+    if activity not in PROFILES:
+        raise ValueError(f"Unknown activity '{activity}' (choose from {', '.join(PROFILES)})")
+    times = as_datetime64(times)
+    stations = list(buoys)
+    conditions = {name: _stack([_value_at(buoys[station], variable, times, max_gap_minutes)
+                                for station in stations], len(times))
+                  for name, variable in BUOY_VARIABLES.items()}
+    conditions['wind_direction'] = _stack([_direction_at(buoys[station], times, max_gap_minutes)
+                                           for station in stations], len(times))
+    if tide is not None:
+        conditions['tide_rate'] = tide_rate_at(tide, times)[None, :]
+
+    offshore = np.zeros((len(stations), len(times)), dtype=bool)
+    for row, station in enumerate(stations):
+        if station in offshore_sectors:
+            offshore[row] = in_sector(conditions['wind_direction'][row], *offshore_sectors[station])
+
+    scores, factors = score(PROFILES[activity], conditions, offshore)
+    scores = np.broadcast_to(scores, (len(stations), len(times)))
+    factors = {name: np.broadcast_to(array, scores.shape) for name, array in factors.items()}
+    return ScoreGrid(stations, times, scores, factors)
+
+
+def best_windows(grid: ScoreGrid, min_score: float = 70, min_hours: float = 1,
+                 top: Optional[int] = 5) -> List[Window]:
+    """
+    Runs of consecutive cells scoring at least min_score, best first.
+
+    Args:
+        grid: From score_grid
+        min_score: Score every cell of a window must reach
+        min_hours: Shortest window worth returning
+        top: How many windows to return (None for all)
+
+    Returns:
+        Windows ordered by mean score, then by start time
+    """
+    good = np.nan_to_num(grid.scores, nan=-1.0) >= min_score
+    rows, columns = good.shape
+    if not good.size:
+        return []
+    # Edges of every run in every row at once, padded so runs can't join across rows
+    padded = np.zeros((rows, columns + 2), dtype=np.int8)
+    padded[:, 1:-1] = good
+    edges = np.diff(padded, axis=1)
+    run_rows, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)   # exclusive; same row-major order as starts
+
+    durations = (grid.times[stops - 1] - grid.times[starts]).astype('timedelta64[s]').astype(np.float64) / 3600
+    keep = durations >= min_hours
+    run_rows, starts, stops = run_rows[keep], starts[keep], stops[keep]
+
+    sums = np.concatenate([np.zeros((rows, 1)), np.cumsum(np.where(good, grid.scores, 0.0), axis=1)], axis=1)
+    means = (sums[run_rows, stops] - sums[run_rows, starts]) / (stops - starts)
+    # Minimum of each run: reduce over [start, stop) slices of the flattened grid (plus a sentinel)
+    flat = np.append(np.where(good, grid.scores, np.inf).ravel(), np.inf)
+    bounds = np.column_stack([run_rows * columns + starts, run_rows * columns + stops]).ravel()
+    minimums = np.minimum.reduceat(flat, bounds)[::2] if len(bounds) else np.zeros(0)
+
+    order = np.lexsort((grid.times[starts].astype(np.int64), -means))
+    if top is not None:
+        order = order[:top]
+    return [Window(grid.stations[run_rows[i]], grid.times[starts[i]], grid.times[stops[i] - 1],
+                   float(means[i]), float(minimums[i])) for i in order]
+
+
+def tide_rate_at(tide, times, step_minutes: float = 15) -> np.ndarray:
+    """Rate of change of the water level (m/h) from anything with level_at, by central difference."""
+    times = as_datetime64(times)
+    step = np.timedelta64(int(step_minutes * 60), 's')
+    return (tide.level_at(times + step) - tide.level_at(times - step)) / (2 * step_minutes / 60)
+
+
+def in_sector(bearings: np.ndarray, start: float, end: float) -> np.ndarray:
+    """True where a bearing lies clockwise from start to end (wrapping through north)."""
+    bearings = np.asarray(bearings, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        return (bearings - start) % 360 <= (end - start) % 360
+
+
+def _value_at(series: BuoySeries, variable: str, times: np.ndarray, max_gap_minutes: float) -> np.ndarray:
+    """One variable at times, all NaN if the series doesn't have it."""
+    if variable not in series.values:
+        return np.full(len(times), np.nan)
+    return series.value_at(variable, times, max_gap_minutes=max_gap_minutes)
+
+
+def _stack(rows: List[np.ndarray], columns: int) -> np.ndarray:
+    return np.stack(rows) if rows else np.zeros((0, columns))
+
+
+def _direction_at(series: BuoySeries, times: np.ndarray, max_gap_minutes: float) -> np.ndarray:
+    """Wind direction at times, interpolated the short way round (350° to 10° passes north)."""
+    if 'wind_direction' not in series.values:
+        return np.full(len(times), np.nan)
+    directions = np.asarray(series['wind_direction'], dtype=np.float64)
+    valid = np.isfinite(directions)
+    unwrapped = np.full(len(directions), np.nan)
+    unwrapped[valid] = np.degrees(np.unwrap(np.radians(directions[valid])))
+    turning = BuoySeries(series.station, series.times, {'wind_direction': unwrapped})
+    return turning.value_at('wind_direction', times, max_gap_minutes=max_gap_minutes) % 360
+
+
+def _ramp(values: np.ndarray, zero: float, one: float) -> np.ndarray:
+    """0 at `zero`, 1 at `one` (above it), linear between and clipped; a step if they are equal."""
+    if one == zero:
+        return (values >= one).astype(np.float64)
+    with np.errstate(invalid='ignore'):
+        return np.clip((values - zero) / (one - zero), 0.0, 1.0)
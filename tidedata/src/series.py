@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Columnar time series for marine data.
+Instead of a list with one dictionary per reading, a series keeps one NumPy
+array per variable - far smaller and faster for long windows of history.
+"""
+
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from erddap_csv import as_datetime64, read_columns
+from tide_events import TideEvents, find_high_low
+from tide_state import TideStates, UNKNOWN
+
+
+class ObservationSeries:
+    """
+    Readings from one station as NumPy arrays.
+
+    `times` is a datetime64[s] array (UTC) and every variable is a float64
+    array of the same length (float32 when memory-mapped from an
+    MmapArchive), with NaN where the station reported nothing.
+    Subclasses say which ERDDAP columns they hold in COLUMNS.
+
+    Example:
+        >>> series = client.get_wave_buoy_series("M2", 24 * 30)
+        >>> print(series['wave_height'].max())
+        >>> df = series.to_pandas()
+    """
+
+    # ERDDAP dataset the readings come from
+    DATASET = ""
+    # ERDDAP column name -> our variable name
+    COLUMNS: Dict[str, str] = {}
+    # data['historical'] key -> variable name
+    HISTORICAL_FIELDS: Dict[str, str] = {}
+
+    def __init__(self, station: str, times: np.ndarray, values: Dict[str, np.ndarray],
+                 location: Optional[str] = None):
+        """
+        Wrap existing arrays (no copies are made).
+
+        Args:
+            station: Station identifier, e.g. "M2" or "Galway Port"
+            times: datetime64 array of reading times, oldest first
+            values: Variable name -> float64 array, each the length of times
+            location: Human-readable location, if known
+        """
+        self.station = station
+        self.times = times.astype('datetime64[s]', copy=False)
+        self.values = values
+        self.location = location
+        for name, array in values.items():
+            if len(array) != len(self.times):
+                raise ValueError(f"'{name}' has {len(array)} values for {len(self.times)} times")
+
+    @classmethod
+    def empty(cls, station: str, location: Optional[str] = None) -> "ObservationSeries":
+        """A series with no readings."""
+        return cls(station, np.array([], dtype='datetime64[s]'),
+                   {name: np.array([], dtype=np.float64) for name in cls.COLUMNS.values()},
+                   location)
+
+    @classmethod
+    def from_csv(cls, csv_text: str, station: Optional[str] = None,
+                 location: Optional[str] = None) -> "ObservationSeries":
+        """
+        Parse an ERDDAP CSV response straight into arrays.
+
+        Args:
+            csv_text: ERDDAP .csv response (names row, units row, data)
+            station: Keep only rows for this station_id (all rows if None)
+            location: Human-readable location to attach
+
+        Returns:
+            A series of the calling class's type
+        """
+        stations, times, values = cls._read_csv(csv_text)
+        if station is None:
+            station = stations[0] if stations is not None and len(stations) else ''
+        elif stations is not None:
+            keep = stations == station
+            times = times[keep]
+            values = {name: array[keep] for name, array in values.items()}
+        return cls(station, times, values, location)
+
+    @classmethod
+    def from_csv_by_station(cls, csv_text: str, stations: List[str]) -> Dict[str, "ObservationSeries"]:
+        """
+        Parse a multi-station ERDDAP CSV response into one series per station.
+
+        Args:
+            csv_text: ERDDAP .csv response covering several stations
+            stations: Station ids wanted; missing ones get an empty series
+
+        Returns:
+            Dictionary of station id -> series, in the order given
+        """
+        return cls.split_by_station(*read_columns(csv_text, list(cls.COLUMNS)), stations)
+
+    @classmethod
+    def split_by_station(cls, station_column: Optional[np.ndarray], times: np.ndarray,
+                         columns: Dict[str, np.ndarray],
+                         stations: Optional[List[str]] = None) -> Dict[str, "ObservationSeries"]:
+        """
+        Build one series per station from erddap_csv column arrays.
+
+        Args:
+            station_column: station_id of each row (None if the response had none)
+            times: datetime64 time of each row
+            columns: ERDDAP column name -> float64 array
+            stations: Station ids wanted; missing ones get an empty series.
+                If None, every station present is returned.
+
+        Returns:
+            Dictionary of station id -> series
+        """
+        values = {name: columns[column] for column, name in cls.COLUMNS.items()}
+        if station_column is None:
+            station_column = np.full(len(times), '', dtype=object)
+        if stations is None:
+            stations = list(dict.fromkeys(station_column))
+        result = {}
+        for station in stations:
+            keep = station_column == station
+            result[station] = cls(station, times[keep],
+                                  {name: array[keep] for name, array in values.items()})
+        return result
+
+    @classmethod
+    def _read_csv(cls, csv_text: str):
+        """Read station ids, times and this class's variables as arrays."""
+        stations, times, columns = read_columns(csv_text, list(cls.COLUMNS))
+        values = {name: columns[column] for column, name in cls.COLUMNS.items()}
+        return stations, times, values
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[name]
+
+    def value_at(self, name: str, times, method: str = "linear",
+                 max_gap_minutes: Optional[float] = None) -> np.ndarray:
+        """
+        A variable interpolated at any number of times in one call.
+
+        Each query time is placed by binary search over the reading times,
+        then interpolated between its two neighbouring readings (NaN
+        readings are skipped). Times outside the series give NaN.
+
+        Args:
+            name: Variable, e.g. 'water_level'
+            times: datetime64 array or ISO strings (a single time is fine too)
+            method: "linear", or "cubic" for a smooth curve through the
+                readings (cubic Hermite with finite-difference slopes)
+            max_gap_minutes: Give NaN between readings further apart than
+                this, rather than interpolating across an outage
+
+        Returns:
+            float64 array shaped like `times`
+        """
+        if method not in ("linear", "cubic"):
+            raise ValueError(f"Unknown interpolation method: {method}")
+        query = as_datetime64(times)
+        values = np.asarray(self.values[name], dtype=np.float64)
+        valid = np.isfinite(values)
+        return _interpolate(self.times[valid], values[valid], query, method,
+                            None if max_gap_minutes is None else max_gap_minutes * 60)
+
+    def time_strings(self) -> List[str]:
+        """Reading times as ERDDAP-style ISO strings ("2024-11-01T01:00:00Z")."""
+        return [t + 'Z' for t in np.datetime_as_string(self.times, unit='s')]
+
+    def latest(self) -> Dict:
+        """The newest reading as a data['latest']-style dictionary (NaN -> 0)."""
+        if not len(self):
+            return {}
+        latest = {'timestamp': np.datetime_as_string(self.times[-1], unit='s') + 'Z'}
+        for name, array in self.values.items():
+            latest[name] = _legacy_floats(array[-1:])[0]
+        return latest
+
+    def to_historical(self, lazy: bool = False) -> Union[List[Dict], "HistoricalView"]:
+        """
+        The legacy data['historical'] list of dictionaries.
+
+        Args:
+            lazy: Return a HistoricalView that builds each dictionary only
+                when it is looked at, instead of building them all now
+        """
+        view = HistoricalView(self, self.HISTORICAL_FIELDS)
+        return view if lazy else view[:]
+
+    def to_dict(self, lazy: bool = False) -> Dict:
+        """
+        The legacy result dictionary, as returned by the get_*_data methods.
+
+        Subclasses add their dataset's own keys.
+
+        Args:
+            lazy: Give 'historical' as a HistoricalView (see to_historical)
+        """
+        return {
+            'station': self.station,
+            'latest': self.latest(),
+            'historical': self.to_historical(lazy),
+            'data_points': len(self)
+        }
+
+    def to_pandas(self):
+        """A pandas DataFrame indexed by time, one column per variable."""
+        import pandas as pd
+        frame = pd.DataFrame(self.values, index=pd.DatetimeIndex(self.times, name='time'))
+        frame.attrs['station'] = self.station
+        return frame
+
+
+class BuoySeries(ObservationSeries):
+    """Wave and weather readings from one M-series buoy."""
+
+    DATASET = "IWBNetwork"
+    COLUMNS = {
+        'WaveHeight': 'wave_height',
+        'WavePeriod': 'peak_period',
+        'MeanWaveDirection': 'wave_direction',
+        'WindSpeed': 'wind_speed',
+        'WindDirection': 'wind_direction',
+        'SeaTemperature': 'sea_temperature',
+        'AirTemperature': 'air_temperature',
+        'AtmosphericPressure': 'pressure',
+    }
+    HISTORICAL_FIELDS = {'wave_height': 'wave_height', 'wind_speed': 'wind_speed'}
+
+    def to_dict(self, lazy: bool = False) -> Dict:
+        return {
+            'buoy_id': self.station,
+            'location': self.location or 'Irish Waters',
+            'latest': self.latest(),
+            'historical': self.to_historical(lazy),
+            'data_points': len(self)
+        }
+
+
+class TideSeries(ObservationSeries):
+    """Water levels from one tide gauge."""
+
+    DATASET = "IrishNationalTideGaugeNetwork"
+    COLUMNS = {
+        'Water_Level_LAT': 'water_level',
+        'Water_Level_OD_Malin': 'water_level_malin',
+    }
+    HISTORICAL_FIELDS = {'level': 'water_level'}
+
+    def to_dict(self, lazy: bool = False) -> Dict:
+        states = self.states()
+        return {
+            **super().to_dict(lazy),
+            'tide_state': self.tide_state(),
+            'tide_now': states.latest().to_dict() if len(states) else None
+        }
+
+    def high_low(self, smooth_minutes: Optional[float] = None, **options) -> TideEvents:
+        """
+        Every high and low water in the series (see tide_events.find_high_low).
+
+        Args:
+            smooth_minutes: Moving-average window for noisy gauge readings
+                (e.g. 30); leave as None for predicted series
+        """
+        return find_high_low(self.times, self.values['water_level'], smooth_minutes, **options)
+
+    def level_at(self, times, method: str = "linear",
+                 max_gap_minutes: Optional[float] = 60) -> np.ndarray:
+        """
+        Water level at any number of times (see value_at).
+
+        Example:
+            >>> series.level_at(['2024-11-01T06:30:00Z', '2024-11-01T07:45:00Z'])
+        """
+        return self.value_at('water_level', times, method, max_gap_minutes)
+
+    def states(self, smooth_minutes: Optional[float] = 30) -> TideStates:
+        """
+        Rate of change, phase and next high/low for every reading (see tide_state.TideStates).
+
+        Computed once per smoothing and kept, so repeated "state now"
+        lookups on the same series cost an index, not a fit.
+        """
+        cache = self.__dict__.setdefault('_states', {})
+        if smooth_minutes not in cache:
+            cache[smooth_minutes] = TideStates(self.times, self.values['water_level'], smooth_minutes)
+        return cache[smooth_minutes]
+
+    def tide_state(self) -> str:
+        """Rising or falling at the newest reading, from the smoothed rate of change."""
+        states = self.states()   # NaN levels are dropped, so this may be shorter than the series
+        if len(states) < 2:
+            return UNKNOWN
+        return states.latest().state
+
+
+class HistoricalView(Sequence):
+    """
+    A read-only, list-like data['historical'] over a series' arrays.
+
+    Each {'time': ..., <field>: ...} dictionary is built when it is
+    indexed or iterated, so a view over years of memory-mapped readings
+    costs nothing until it is used. Slicing returns a real list.
+    """
+
+    def __init__(self, series: ObservationSeries, fields: Dict[str, str]):
+        self.series = series
+        self.fields = fields
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            times = self.series.times[index]
+            columns = [_legacy_floats(self.series.values[name][index]) for name in self.fields.values()]
+            keys = ['time'] + list(self.fields)
+            time_strings = [t + 'Z' for t in np.datetime_as_string(times, unit='s')]
+            return [dict(zip(keys, row)) for row in zip(time_strings, *columns)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("historical index out of range")
+        return self[index:index + 1][0]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (HistoricalView, list)):
+            return self[:] == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoricalView({self.series.station!r}, {len(self)} readings)"
+
+
+def _interpolate(times: np.ndarray, values: np.ndarray, query: np.ndarray,
+                 method: str, max_gap: Optional[float]) -> np.ndarray:
+    """Interpolate readings (sorted times, no NaN) at query times; NaN outside."""
+    result = np.full(query.shape, np.nan)
+    if len(times) < 2:
+        if len(times) == 1:
+            result[query == times[0]] = values[0]
+        return result
+    seconds = (times - times[0]).astype(np.float64)
+    x = (query - times[0]).astype(np.float64)
+    inside = (x >= 0) & (x <= seconds[-1])
+    x = x[inside]
+    i = np.clip(np.searchsorted(seconds, x, side='right') - 1, 0, len(seconds) - 2)
+    width = seconds[i + 1] - seconds[i]
+    s = (x - seconds[i]) / width
+    if method == "cubic":
+        slopes = np.gradient(values, seconds, edge_order=2 if len(seconds) > 2 else 1)
+        s2, s3 = s * s, s * s * s
+        level = ((2 * s3 - 3 * s2 + 1) * values[i] + (s3 - 2 * s2 + s) * width * slopes[i]
+                 + (3 * s2 - 2 * s3) * values[i + 1] + (s3 - s2) * width * slopes[i + 1])
+    else:
+        level = values[i] + s * (values[i + 1] - values[i])
+    if max_gap is not None:
+        level[width > max_gap] = np.nan
+    result[inside] = level
+    return result
+
+
+def _legacy_floats(array: np.ndarray) -> List[float]:
+    """Plain Python floats for the legacy dicts: NaN as 0, float32 without noise (2.4 not 2.4000000953674316)."""
+    if array.dtype == np.float32:
+        array = array.astype(str).astype(np.float64)
+    return np.nan_to_num(array, nan=0.0).tolist()
+
+
+# ERDDAP dataset -> the series class for its readings
+SERIES_TYPES = {series_type.DATASET: series_type for series_type in (BuoySeries, TideSeries)}
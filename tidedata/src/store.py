@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite store of raw buoy and tide observations.
+Keeps every reading the client parses, plus which time ranges have been
+fetched in full, so common windows can be answered locally (and offline).
+"""
+
+import sqlite3
+import threading
+from itertools import repeat
+from typing import List, Optional
+
+import numpy as np
+
+from erddap_csv import epoch_seconds
+from series import ObservationSeries, SERIES_TYPES
+
+
+class ObservationStore:
+    """
+    SQLite (WAL mode) table per dataset, keyed on (station_id, time).
+
+    The tables are WITHOUT ROWID, so the primary key is the table's own
+    b-tree: a range scan for one station reads consecutive pages with no
+    extra index lookups. A coverage table records the time ranges that
+    were fetched completely, which is what lets the client trust a window.
+
+    Example:
+        >>> store = ObservationStore("observations.db")
+        >>> client = IrishMarineDataClient(store=store)
+        >>> client.get_wave_buoy_data("M2", 24)   # fetched, stored
+        >>> client.get_wave_buoy_data("M2", 12)   # answered from the store
+    """
+
+    def __init__(self, path: str, max_age: float = 600):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            max_age: Seconds a fetched window stays current - a window is
+                served from the store only if it was fetched up to at least
+                this long ago
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for dataset, series_type in SERIES_TYPES.items():
+                columns = ", ".join(f"{name} REAL" for name in series_type.COLUMNS.values())
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {dataset} ("
+                    f"station_id TEXT NOT NULL, time INTEGER NOT NULL, {columns}, "
+                    f"PRIMARY KEY (station_id, time)) WITHOUT ROWID")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "dataset TEXT NOT NULL, station_id TEXT NOT NULL, start_time INTEGER NOT NULL, "
+                "end_time INTEGER NOT NULL, PRIMARY KEY (dataset, station_id, start_time)) WITHOUT ROWID")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "ObservationStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def upsert(self, series: ObservationSeries) -> int:
+        """
+        Insert or replace a series' readings in one transaction.
+
+        Returns:
+            Number of readings written
+        """
+        if not len(series):
+            return 0
+        names = list(series.COLUMNS.values())
+        placeholders = ", ".join("?" * (len(names) + 2))
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names)
+        sql = (f"INSERT INTO {series.DATASET} (station_id, time, {', '.join(names)}) "
+               f"VALUES ({placeholders}) ON CONFLICT (station_id, time) DO UPDATE SET {updates}")
+        # NaN is stored as NULL by sqlite3
+        rows = zip(repeat(series.station), series.times.astype(np.int64).tolist(),
+                   *[series.values[name].tolist() for name in names])
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+        return len(series)
+
+    def mark_covered(self, dataset: str, station: str, start: str, end: str):
+        """
+        Record that every reading between start and end has been stored.
+
+        Overlapping or touching ranges are merged into one.
+        """
+        start_s, end_s = epoch_seconds(start), epoch_seconds(end)
+        with self._lock, self._conn:
+            overlapping = self._conn.execute(
+                "SELECT start_time, end_time FROM coverage WHERE dataset = ? AND station_id = ? "
+                "AND start_time <= ? AND end_time >= ?", (dataset, station, end_s, start_s)).fetchall()
+            for old_start, old_end in overlapping:
+                start_s, end_s = min(start_s, old_start), max(end_s, old_end)
+            self._conn.execute(
+                "DELETE FROM coverage WHERE dataset = ? AND station_id = ? "
+                "AND start_time <= ? AND end_time >= ?",
+                (dataset, station, end_s, start_s))
+            self._conn.execute("INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                               (dataset, station, start_s, end_s))
+
+    def covers(self, dataset: str, station: str, start: str, end: str) -> bool:
+        """True if one fetched range spans the whole of start..end."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM coverage WHERE dataset = ? AND station_id = ? "
+                "AND start_time <= ? AND end_time >= ?",
+                (dataset, station, epoch_seconds(start), epoch_seconds(end))).fetchone()
+        return row is not None
+
+    def read(self, dataset: str, station: str, start: Optional[str] = None,
+             end: Optional[str] = None, columns: Optional[List[str]] = None) -> ObservationSeries:
+        """
+        Read a station's readings in a time range.
+
+        Args:
+            dataset: "IWBNetwork" or "IrishNationalTideGaugeNetwork"
+            station: Station id, e.g. "M2" or "Galway Port"
+            start: First time to include (ISO string, inclusive)
+            end: Time to stop at (ISO string, exclusive)
+            columns: Variables to load (all if None)
+
+        Returns:
+            A BuoySeries or TideSeries, oldest reading first
+        """
+        series_type = SERIES_TYPES[dataset]
+        names = list(columns) if columns else list(series_type.COLUMNS.values())
+        unknown = set(names) - set(series_type.COLUMNS.values())
+        if unknown:
+            raise ValueError(f"Unknown variables for {dataset}: {', '.join(sorted(unknown))}")
+        start_s = epoch_seconds(start) if start else -2 ** 62
+        end_s = epoch_seconds(end) if end else 2 ** 62
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT time, {', '.join(names)} FROM {dataset} "
+                f"WHERE station_id = ? AND time >= ? AND time < ? ORDER BY time",
+                (station, start_s, end_s)).fetchall()
+
+        table = np.array(rows, dtype=np.float64).reshape(len(rows), len(names) + 1)  # NULL -> NaN
+        times = table[:, 0].astype(np.int64).astype('datetime64[s]')
+        return series_type(station, times, {name: table[:, i + 1] for i, name in enumerate(names)})
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+High and low water detection.
+Finds every high and low water in an observed or predicted tide series in
+one vectorized pass, and turns them into rows for the tide_times table.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+HIGH = 1
+LOW = -1
+
+
+class TideEvents(NamedTuple):
+    """High and low waters, oldest first, as parallel arrays."""
+    times: np.ndarray    # datetime64[s]
+    heights: np.ndarray  # float64, metres
+    kinds: np.ndarray    # int8, HIGH (1) or LOW (-1)
+
+    @property
+    def highs(self) -> "TideEvents":
+        """Only the high waters."""
+        keep = self.kinds == HIGH
+        return TideEvents(self.times[keep], self.heights[keep], self.kinds[keep])
+
+    @property
+    def lows(self) -> "TideEvents":
+        """Only the low waters."""
+        keep = self.kinds == LOW
+        return TideEvents(self.times[keep], self.heights[keep], self.kinds[keep])
+
+
+def find_high_low(times, levels, smooth_minutes: Optional[float] = None,
+                  min_separation_hours: float = 2.0) -> TideEvents:
+    """
+    Detect every high and low water in a tide series.
+
+    Turning points are where the level's slope changes sign. Each one is
+    refined between samples by fitting a parabola through it and its two
+    neighbours, so times and heights are not limited to the sampling grid.
+
+    For noisy gauge readings, smooth first (e.g. smooth_minutes=30);
+    predicted series need no smoothing. Turning points closer together
+    than min_separation_hours are treated as noise and removed in pairs,
+    so highs and lows still alternate.
+
+    Args:
+        times: datetime64 times, ascending
+        levels: Water levels (NaN readings are dropped)
+        smooth_minutes: Moving-average window applied before detection
+        min_separation_hours: Minimum gap between a high and the next low
+
+    Returns:
+        TideEvents with refined times and heights
+
+    Example:
+        >>> events = find_high_low(series.times, series['water_level'], smooth_minutes=30)
+        >>> events.highs.heights.max()
+    """
+    times = np.asarray(times, dtype='datetime64[s]')
+    levels = np.asarray(levels, dtype=np.float64)
+    valid = np.isfinite(levels)
+    times, levels = times[valid], levels[valid]
+    if len(levels) < 3:
+        return _no_events()
+
+    seconds = (times - times[0]).astype(np.float64)
+    if smooth_minutes:
+        step = np.median(np.diff(seconds))
+        # Odd, so the window is centred on each sample and events aren't shifted
+        # (repeated timestamps can leave no step to size it by)
+        width = int(round(smooth_minutes * 60 / step)) | 1 if step > 0 else 1
+        if width > 1:
+            levels = _moving_average(levels, width)
+
+    # Slope sign, with flat steps taking the sign of the step before them
+    slope = np.sign(np.diff(levels))
+    nonzero = np.flatnonzero(slope)
+    if not len(nonzero):
+        return _no_events()
+    filled = slope[nonzero][np.maximum(np.searchsorted(nonzero, np.arange(len(slope)), side='right') - 1, 0)]
+    turns = np.flatnonzero(filled[1:] != filled[:-1]) + 1  # sample index of each turning point
+    if not len(turns):
+        return _no_events()
+    kinds = np.where(filled[turns - 1] > 0, HIGH, LOW).astype(np.int8)
+
+    # Parabola through (i-1, i, i+1): vertex offset and height
+    before, at, after = levels[turns - 1], levels[turns], levels[turns + 1]
+    curvature = before - 2 * at + after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(curvature != 0, 0.5 * (before - after) / curvature, 0.0)
+    offset = np.clip(offset, -1.0, 1.0)
+    heights = at - 0.25 * (before - after) * offset
+    spacing = np.where(offset < 0, seconds[turns] - seconds[turns - 1], seconds[turns + 1] - seconds[turns])
+    event_seconds = seconds[turns] + offset * spacing
+
+    event_seconds, heights, kinds = _drop_close_pairs(event_seconds, heights, kinds, min_separation_hours * 3600)
+    event_times = times[0] + np.round(event_seconds).astype(np.int64).astype('timedelta64[s]')
+    return TideEvents(event_times, heights, kinds)
+
+
+def tide_times_rows(events: TideEvents, country: str = "Ireland", city: str = "Galway",
+                    post_code: str = "H91", tz: str = "Europe/Dublin") -> List[Dict]:
+    """
+    Turn high/low waters into rows for the Supabase tide_times table.
+
+    Each local day gets one row with its morning (before noon) and
+    afternoon high and low water, times as "HH:MM" local time and heights
+    rounded to centimetres - the same shape the web-page importer writes.
+    A slot with no event is None; if a half-day holds two events of a
+    kind, the first is used.
+
+    Args:
+        events: Output of find_high_low
+        country, city, post_code: Location columns (the importer's defaults)
+        tz: Time zone the times are given in
+
+    Returns:
+        List of row dicts, one per day, in date order
+    """
+    zone = ZoneInfo(tz)
+    rows: Dict[str, Dict] = {}
+    epoch_seconds = events.times.astype('datetime64[s]').astype(np.int64).tolist()
+    for seconds, height, kind in zip(epoch_seconds, events.heights.tolist(), events.kinds.tolist()):
+        local = datetime.fromtimestamp(seconds, timezone.utc).astimezone(zone)
+        date = local.strftime("%Y-%m-%d")
+        row = rows.get(date)
+        if row is None:
+            row = rows[date] = {
+                'country': country, 'city': city, 'post_code': post_code, 'date': date,
+                'morning_high_time': None, 'morning_high_height': None,
+                'afternoon_high_time': None, 'afternoon_high_height': None,
+                'morning_low_time': None, 'morning_low_height': None,
+                'afternoon_low_time': None, 'afternoon_low_height': None,
+            }
+        slot = f"{'morning' if local.hour < 12 else 'afternoon'}_{'high' if kind == HIGH else 'low'}"
+        if row[f"{slot}_time"] is None:
+            row[f"{slot}_time"] = local.strftime("%H:%M")
+            row[f"{slot}_height"] = round(height, 2)
+    return [rows[date] for date in sorted(rows)]
+
+
+def _moving_average(levels: np.ndarray, width: int) -> np.ndarray:
+    """Centred moving average over an odd width; the ends use as many samples as exist."""
+    kernel = np.ones(width)
+    sums = np.convolve(levels, kernel, mode='same')
+    counts = np.convolve(np.ones(len(levels)), kernel, mode='same')
+    return sums / counts
+
+
+def _drop_close_pairs(seconds: np.ndarray, heights: np.ndarray, kinds: np.ndarray,
+                      min_gap: float):
+    """
+    Remove noise wiggles: turning points closer than min_gap to the next one.
+
+    Close pairs with the smallest height difference go first, which keeps
+    highs and lows alternating and leaves the real extremes. Each round
+    removes, all at once, every close pair that is smaller than the other
+    close pairs within two places of it (so removals never overlap or
+    create a new pair that should have gone first), until none are left.
+    A few rounds clear even unsmoothed 5-minute gauge noise.
+    """
+    while len(seconds) > 1:
+        close = np.diff(seconds) < min_gap
+        if not close.any():
+            break
+        # Rank every pair by height difference (index breaks ties); far-apart pairs never win
+        order = np.lexsort((np.arange(len(close)), np.abs(np.diff(heights))))
+        rank = np.empty(len(close), dtype=np.float64)
+        rank[order] = np.arange(len(close))
+        rank[~close] = np.inf
+        padded = np.concatenate([[np.inf, np.inf], rank, [np.inf, np.inf]])
+        neighbours = np.minimum.reduce([padded[:-4], padded[1:-3], padded[3:-1], padded[4:]])
+        pairs = np.flatnonzero(close & (rank < neighbours))
+        keep = np.ones(len(seconds), dtype=bool)
+        keep[pairs] = False
+        keep[pairs + 1] = False
+        seconds, heights, kinds = seconds[keep], heights[keep], kinds[keep]
+    return seconds, heights, kinds
+
+
+def _no_events() -> TideEvents:
+    return TideEvents(np.array([], dtype='datetime64[s]'), np.array([], dtype=np.float64),
+                      np.array([], dtype=np.int8))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tide state for every reading of a series.
+Rate of change, phase in the tidal cycle, time to the next high and low
+water and a rule-of-twelfths estimate are computed for all samples in one
+vectorized pass, so "what is the tide doing now" is a lookup, not a fit.
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tide_events import HIGH, TideEvents, find_high_low
+
+# Fraction of a rise (or fall) completed after each sixth of its duration:
+# 1, 2, 3, 3, 2, 1 twelfths of the range in turn
+TWELFTHS = np.array([0, 1, 3, 6, 9, 11, 12]) / 12.0
+
+RISING = "Rising 📈"
+FALLING = "Falling 📉"
+UNKNOWN = "Unknown"
+
+
+def state_label(rate: float) -> str:
+    """The legacy tide_state string for a rate of change."""
+    if not np.isfinite(rate):
+        return UNKNOWN
+    return RISING if rate > 0 else FALLING
+
+
+class TideState(NamedTuple):
+    """The tide at one instant (see TideStates.at)."""
+    time: np.datetime64             # the reading this state comes from
+    level: float                    # metres
+    rate: float                     # metres per hour, positive when rising
+    phase: float                    # 0 at low water, 0.5 at high water, 1 at the next low
+    next_high: Optional[np.datetime64]
+    next_high_height: float
+    next_low: Optional[np.datetime64]
+    next_low_height: float
+    twelfths_level: float           # level the rule of twelfths expects now
+
+    @property
+    def state(self) -> str:
+        return state_label(self.rate)
+
+    def hours_to_next_high(self, now=None) -> float:
+        """Hours from `now` (default: this reading's time) to the next high water."""
+        return _hours_until(self.next_high, self.time if now is None else now)
+
+    def hours_to_next_low(self, now=None) -> float:
+        """Hours from `now` (default: this reading's time) to the next low water."""
+        return _hours_until(self.next_low, self.time if now is None else now)
+
+    def to_dict(self) -> Dict:
+        """JSON-friendly form, as used in the tide data dictionary."""
+        def iso(value):
+            return None if value is None else f"{value.astype('datetime64[s]')}Z"
+
+        def number(value, digits=3):
+            return round(float(value), digits) if np.isfinite(value) else None
+
+        return {
+            'timestamp': iso(self.time),
+            'state': self.state,
+            'rate_m_per_hour': number(self.rate),
+            'phase': number(self.phase),
+            'next_high': iso(self.next_high),
+            'next_high_height': number(self.next_high_height, 2),
+            'next_low': iso(self.next_low),
+            'next_low_height': number(self.next_low_height, 2),
+            'twelfths_level': number(self.twelfths_level, 2),
+        }
+
+
+class TideStates:
+    """
+    Precomputed tide state for every reading of a series.
+
+    Each attribute is an array with one value per (non-NaN) reading:
+    `rate` (m/h), `phase`, `next_high`/`next_low` times and heights, and
+    `twelfths_level`. Phase and twelfths are NaN before the first and after
+    the last high/low water the series contains; next_* times are NaT when
+    there is no later event.
+
+    Example:
+        >>> states = client.get_galway_tide_series(48).states()
+        >>> now = states.at(np.datetime64('now'))
+        >>> now.state, now.rate, now.hours_to_next_high()
+    """
+
+    def __init__(self, times, levels, smooth_minutes: Optional[float] = 30,
+                 min_separation_hours: float = 2.0):
+        """
+        Args:
+            times: datetime64 times, ascending
+            levels: Water levels (NaN readings are dropped)
+            smooth_minutes: Span of readings the rate is fitted over, and
+                the smoothing used to find high and low water
+            min_separation_hours: See tide_events.find_high_low
+        """
+        times = np.asarray(times, dtype='datetime64[s]')
+        levels = np.asarray(levels, dtype=np.float64)
+        valid = np.isfinite(levels)
+        self.times, self.levels = times[valid], levels[valid]
+        self.events: TideEvents = find_high_low(self.times, self.levels, smooth_minutes,
+                                                min_separation_hours)
+        count = len(self.times)
+        seconds = (self.times - self.times[0]).astype(np.float64) if count else np.zeros(0)
+
+        self.rate = _windowed_slope(seconds / 3600.0, self.levels, _window_size(seconds, smooth_minutes))
+
+        # Fraction of the way from the previous high/low to the next, for every reading
+        self.phase = np.full(count, np.nan)
+        self.twelfths_level = np.full(count, np.nan)
+        if len(self.events.times):
+            event_seconds = (self.events.times - self.times[0]).astype(np.float64)
+            following = np.searchsorted(event_seconds, seconds, side='right')
+            inside = np.flatnonzero((following > 0) & (following < len(event_seconds)))
+            prev_i, next_i = following[inside] - 1, following[inside]
+            fraction = ((seconds[inside] - event_seconds[prev_i])
+                        / (event_seconds[next_i] - event_seconds[prev_i]))
+            rising = self.events.kinds[prev_i] != HIGH
+            self.phase[inside] = np.where(rising, 0.0, 0.5) + 0.5 * fraction
+            start_height = self.events.heights[prev_i]
+            self.twelfths_level[inside] = start_height + (
+                (self.events.heights[next_i] - start_height) * np.interp(fraction * 6, np.arange(7), TWELFTHS))
+
+        self.next_high, self.next_high_height = self._next_of(self.events.highs, self.times)
+        self.next_low, self.next_low_height = self._next_of(self.events.lows, self.times)
+
+        # Regular sampling lets at() index directly instead of searching
+        steps = np.diff(self.times).astype(np.int64)
+        self._step = int(steps[0]) if len(steps) and steps[0] > 0 and np.all(steps == steps[0]) else 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def index_at(self, when) -> int:
+        """Index of the last reading at or before `when` (0 if `when` is before the first)."""
+        when = np.datetime64(when, 's')
+        if self._step:
+            index = int((when - self.times[0]).astype(np.int64)) // self._step
+        else:
+            index = int(np.searchsorted(self.times, when, side='right')) - 1
+        return min(max(index, 0), len(self.times) - 1)
+
+    def at(self, when) -> TideState:
+        """
+        The state at the last reading at or before `when`.
+
+        O(1) for regularly sampled series (a division, not a search). Times
+        past the end of the series give the last reading's state, so check
+        TideState.time if staleness matters.
+        """
+        if not len(self.times):
+            raise ValueError("No readings to take a tide state from")
+        i = self.index_at(when)
+        return TideState(self.times[i], float(self.levels[i]), float(self.rate[i]), float(self.phase[i]),
+                         _or_none(self.next_high[i]), float(self.next_high_height[i]),
+                         _or_none(self.next_low[i]), float(self.next_low_height[i]),
+                         float(self.twelfths_level[i]))
+
+    def latest(self) -> TideState:
+        """The state at the newest reading."""
+        if not len(self.times):
+            raise ValueError("No readings to take a tide state from")
+        return self.at(self.times[-1])
+
+    def labels(self) -> np.ndarray:
+        """The tide_state string for every reading."""
+        return np.where(np.isnan(self.rate), UNKNOWN, np.where(self.rate > 0, RISING, FALLING))
+
+    @staticmethod
+    def _next_of(events: TideEvents, times: np.ndarray):
+        """Time and height of the first of `events` after each time (NaT/NaN if none)."""
+        following = np.searchsorted(events.times, times, side='right')
+        found = following < len(events.times)
+        if not len(events.times):
+            return np.full(len(times), np.datetime64('NaT'), dtype='datetime64[s]'), np.full(len(times), np.nan)
+        index = np.where(found, following, 0)
+        return (np.where(found, events.times[index], np.datetime64('NaT')),
+                np.where(found, events.heights[index], np.nan))
+
+
+def _window_size(seconds: np.ndarray, smooth_minutes: Optional[float]) -> int:
+    """Readings per rate window: an odd number spanning smooth_minutes, at least 2."""
+    if len(seconds) < 2:
+        return len(seconds)
+    step = np.median(np.diff(seconds))
+    width = int(round((smooth_minutes or 0) * 60 / step)) + 1 if step > 0 else 2
+    width = max(width | 1, 3)
+    return min(width, len(seconds))
+
+
+def _windowed_slope(hours: np.ndarray, levels: np.ndarray, width: int) -> np.ndarray:
+    """
+    Least-squares slope through `width` readings around each one.
+
+    Windows are centred where they can be and one-sided at the ends, so
+    the newest reading's rate uses only readings up to it.
+    """
+    count = len(hours)
+    if count < 2:
+        return np.full(count, np.nan)
+    half = width // 2
+    starts = np.clip(np.arange(count) - half, 0, count - width)
+    t = sliding_window_view(hours, width)[starts]
+    y = sliding_window_view(levels, width)[starts]
+    t = t - t.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (t * (y - y.mean(axis=1, keepdims=True))).sum(axis=1) / (t * t).sum(axis=1)
+
+
+def _hours_until(event: Optional[np.datetime64], now) -> float:
+    if event is None:
+        return float('nan')
+    return float((event - np.datetime64(now, 's')).astype(np.int64)) / 3600.0
+
+
+def _or_none(value: np.datetime64) -> Optional[np.datetime64]:
+    return None if np.isnat(value) else value
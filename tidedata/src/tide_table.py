@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Parser for published tide tables (the tide.txt HTML dump).
+One compiled regular expression walks the whole <tbody> once, pulling the
+date and the morning/afternoon high and low waters out of every <tr>, and
+returns rows shaped for the Supabase tide_times table.
+"""
+
+import json
+import re
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+MONTHS = {name: number for number, name in enumerate(
+    ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+     'august', 'september', 'october', 'november', 'december'], start=1)}
+
+# tide_times columns filled from table columns 2-5, in order
+SLOTS = ['morning_high', 'afternoon_high', 'morning_low', 'afternoon_low']
+
+_SPACE = r'(?:\s|&nbsp;)+'
+# One table cell: empty, or "🕐05:48<br> 4.98m"
+_CELL = r'<td[^>]*>\s*(?:🕐?\s*(\d{1,2}:\d{2})\s*<br\s*/?>\s*(-?\d+(?:\.\d+)?)\s*m)?\s*</td>\s*'
+ROW_PATTERN = re.compile(
+    r'<tr[^>]*>\s*<td[^>]*>\s*(\d{1,2})' + _SPACE + r'([A-Za-z]+)' + _SPACE + r'(\d{4})\s*</td>\s*'
+    + _CELL * len(SLOTS) + r'</tr>')
+
+
+def tokenize(html: str) -> List[Tuple[str, ...]]:
+    """
+    Every table row as a tuple of strings, in one pass over the text.
+
+    Each tuple is (day, month name, year, then time and height for each of
+    SLOTS), with empty strings for empty cells. Rows without a date cell
+    and four tide cells (e.g. a header row) are skipped.
+    """
+    return ROW_PATTERN.findall(html)
+
+
+def parse_tide_table(html: str, country: str = "Ireland", city: str = "Galway",
+                     post_code: str = "H91") -> List[Dict]:
+    """
+    Turn the tide-table HTML into tide_times rows.
+
+    Args:
+        html: The table markup (a <tbody> of <tr> rows, as in tide.txt)
+        country, city, post_code: Location columns (the importer's defaults)
+
+    Returns:
+        One dict per row, in table order, with date "YYYY-MM-DD", times
+        "HH:MM" and heights as floats (None where the table has no entry).
+        Rows whose month name is not recognised are skipped.
+    """
+    rows = []
+    for day, month, year, *cells in tokenize(html):
+        month_number = MONTHS.get(month.lower())
+        if month_number is None:
+            continue
+        row = {'country': country, 'city': city, 'post_code': post_code,
+               'date': f"{year}-{month_number:02d}-{int(day):02d}"}
+        for i, slot in enumerate(SLOTS):
+            time, height = cells[2 * i], cells[2 * i + 1]
+            row[f"{slot}_time"] = time.zfill(5) if time else None
+            row[f"{slot}_height"] = float(height) if height else None
+        rows.append(row)
+    return rows
+
+
+def tide_table_columns(html: str) -> Dict[str, np.ndarray]:
+    """
+    The same table as typed NumPy columns.
+
+    Returns:
+        'date' as datetime64[D]; '<slot>_time' as timedelta64[m] since
+        local midnight (NaT when empty); '<slot>_height' as float64 (NaN
+        when empty), for each of SLOTS
+    """
+    rows = parse_tide_table(html)
+    columns = {'date': np.array([row['date'] for row in rows], dtype='datetime64[D]')}
+    for slot in SLOTS:
+        minutes = [_minutes(row[f"{slot}_time"]) for row in rows]
+        columns[f"{slot}_time"] = np.array(minutes, dtype='timedelta64[m]')
+        columns[f"{slot}_height"] = np.array([row[f"{slot}_height"] for row in rows], dtype=np.float64)
+    return columns
+
+
+def read_tide_table(path: str, **location) -> List[Dict]:
+    """Parse a tide-table file (see parse_tide_table)."""
+    with open(path, encoding='utf-8') as f:
+        return parse_tide_table(f.read(), **location)
+
+
+def _minutes(time: str):
+    if time is None:
+        return 'NaT'
+    hours, minutes = time.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python tide_table.py <tide.txt>  - print tide_times rows as JSON")
+        sys.exit(1)
+    json.dump(read_tide_table(sys.argv[1]), sys.stdout, indent=2)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for building fake ERDDAP responses and synthetic tides in
+the test suites
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+M2_HOURS = 360 / 28.9841042
+
+HEADER = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+"""
+
+
+def iso_hours_ago(hours: float) -> str:
+    """ERDDAP-style timestamp `hours` before now."""
+    return (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def buoy_csv(*times) -> str:
+    """A buoy CSV response with one row per timestamp."""
+    rows = [f"M2,{t},2.{i},7.0,250.0,1{i}.0,240.0,12.5,11.0,1012.0" for i, t in enumerate(times)]
+    return HEADER + "\n".join(rows) + "\n"
+
+
+def m2_tide(times, noise=0.0, seed=3):
+    """A pure M2 tide of 2m amplitude around 3m, high water at 2024-11-01T00:00."""
+    hours = (np.asarray(times, dtype='datetime64[s]') - np.datetime64('2024-11-01T00:00:00')).astype(np.float64) / 3600
+    return 3.0 + 2.0 * np.cos(2 * np.pi * hours / M2_HOURS) + np.random.default_rng(seed).normal(0, noise, hours.shape)
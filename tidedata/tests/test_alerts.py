@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the alert engine
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from alerts import AlertEngine, AlertRule, Condition
+from series import BuoySeries, TideSeries
+
+HOURS = np.arange('2024-11-01T00', '2024-11-02T00', np.timedelta64(1, 'h'), dtype='datetime64[s]')
+
+
+def buoy(station, wave_heights, start=0, wind=0.0):
+    """A buoy series of hourly wave heights from HOURS[start]."""
+    times = HOURS[start:start + len(wave_heights)]
+    values = {name: np.full(len(times), np.nan) for name in BuoySeries.COLUMNS.values()}
+    values['wave_height'] = np.array(wave_heights, dtype=np.float64)
+    values['wind_speed'] = np.full(len(times), wind)
+    return BuoySeries(station, times, values)
+
+
+def tide(levels, start='2024-11-01T00:00'):
+    """A 5-minute tide series."""
+    times = np.datetime64(start, 's') + np.arange(len(levels)) * np.timedelta64(5, 'm')
+    return TideSeries('Galway Port', times, {'water_level': np.asarray(levels, dtype=np.float64),
+                                             'water_level_malin': np.zeros(len(levels))})
+
+
+class TestConditions(unittest.TestCase):
+    """Test cases for individual condition types."""
+
+    def test_threshold_with_hysteresis(self):
+        """Test that a latched condition only clears past its clear level."""
+        engine = AlertEngine([AlertRule("swell", [Condition("M2", "wave_height", ">", 3.0, clear=2.5)])])
+        alerts = engine.update(buoy("M2", [2.0, 3.1]))
+        self.assertEqual([(a.rule, a.kind) for a in alerts], [("swell", "triggered")])
+        self.assertEqual(alerts[0].values, {"M2.wave_height": 3.1})
+        self.assertEqual(engine.update(buoy("M2", [2.0, 3.1, 2.8, 3.2, 2.9], 0)), [])   # hovering: no repeats
+        self.assertEqual([a.kind for a in engine.update(buoy("M2", [2.4], 5))], ["cleared"])
+        self.assertEqual(engine.active(), [])
+
+    def test_episode_within_one_update(self):
+        """Test that a trigger and clear inside one batch are both reported, at their readings."""
+        engine = AlertEngine([AlertRule("swell", [Condition("M2", "wave_height", ">", 3.0, clear=2.5)])])
+        alerts = engine.update(buoy("M2", [1.0, 4.0, 5.0, 1.0, 1.0]))
+        self.assertEqual([(a.kind, a.time) for a in alerts], [("triggered", HOURS[1]), ("cleared", HOURS[3])])
+        self.assertEqual(alerts[0].values, {"M2.wave_height": 4.0})
+        self.assertEqual(alerts[1].values, {"M2.wave_height": 1.0})
+        self.assertEqual(engine.active(), [])
+
+    def test_sustained_window(self):
+        """Test that a condition must hold for sustained_minutes before it counts."""
+        engine = AlertEngine([AlertRule("sustained", [
+            Condition("M2", "wave_height", ">=", 3.0, sustained_minutes=120)])])
+        self.assertEqual(engine.update(buoy("M2", [3.0, 3.5])), [])
+        self.assertEqual(engine.update(buoy("M2", [2.0], 2)), [])   # broken run
+        self.assertEqual(engine.update(buoy("M2", [3.1, 3.2], 3)), [])
+        alerts = engine.update(buoy("M2", [3.3], 5))
+        self.assertEqual([a.kind for a in alerts], ["triggered"])
+        self.assertEqual(alerts[0].time, HOURS[5])
+
+    def test_rate_of_change(self):
+        """Test rate conditions, including readings split across updates."""
+        engine = AlertEngine([AlertRule("surge", [
+            Condition("Galway Port", "water_level", ">", 1.0, rate_minutes=30)])])
+        levels = np.concatenate([np.full(12, 2.0), 2.0 + 0.1 * np.arange(1, 13)])   # then 1.2 m/h
+        self.assertEqual(engine.update(tide(levels[:14])), [])
+        alerts = engine.update(tide(levels))
+        self.assertEqual([a.kind for a in alerts], ["triggered"])
+        self.assertAlmostEqual(alerts[0].values["Galway Port.water_level/h"], 1.2)
+
+    def test_below_and_nan(self):
+        """Test '<' conditions and that missing readings keep the previous state."""
+        engine = AlertEngine([AlertRule("flat", [Condition("M4", "wave_height", "<", 0.5, clear=0.8)])])
+        self.assertEqual(len(engine.update(buoy("M4", [0.4, np.nan, 0.6]))), 1)
+        self.assertEqual(engine.active(), ["flat"])
+
+    def test_invalid_rules(self):
+        """Test that bad rules are rejected when compiled."""
+        with self.assertRaises(ValueError):
+            AlertEngine([AlertRule("x", [Condition("M2", "wave_height", "!=", 1.0)])])
+        with self.assertRaises(ValueError):
+            AlertEngine([AlertRule("x", [Condition("M2", "depth", ">", 1.0)])])
+        with self.assertRaises(ValueError):
+            AlertEngine([AlertRule("x", [Condition("M2", "wave_height", ">", 3.0, clear=3.5)])])
+        with self.assertRaises(ValueError):
+            AlertEngine([AlertRule("x", [])])
+
+
+class TestRules(unittest.TestCase):
+    """Test cases for combining conditions."""
+
+    def test_cross_station_all(self):
+        """Test a rule needing a buoy and the tide gauge at once."""
+        rule = AlertRule.from_dict({'name': "flood risk", 'conditions': [
+            {'station': "M2", 'variable': "wave_height", 'op': ">", 'threshold': 4.0},
+            {'station': "Galway Port", 'variable': "water_level", 'op': ">", 'threshold': 5.0},
+        ]})
+        engine = AlertEngine([rule])
+        self.assertEqual(engine.update(buoy("M2", [4.5])), [])
+        alerts = engine.update_many([tide([5.2], '2024-11-01T00:30')])
+        self.assertEqual([a.kind for a in alerts], ["triggered"])
+        self.assertEqual(set(alerts[0].values), {"M2.wave_height", "Galway Port.water_level"})
+
+    def test_stale_station_stops_counting(self):
+        """Test that a condition goes false once its station stops reporting."""
+        engine = AlertEngine([AlertRule("any rough", [
+            Condition("M2", "wave_height", ">", 4.0), Condition("M3", "wave_height", ">", 4.0)],
+            combine="any")], max_age_minutes=120)
+        self.assertEqual(len(engine.update(buoy("M2", [4.5]))), 1)
+        self.assertEqual(engine.update(buoy("M3", [1.0, 1.0], 1)), [])
+        self.assertEqual([a.kind for a in engine.update(buoy("M3", [1.0], 3))], ["cleared"])
+
+    def test_cooldown(self):
+        """Test that a rule re-matching within its cooldown is not reported again."""
+        engine = AlertEngine([AlertRule("swell", [Condition("M2", "wave_height", ">", 3.0)],
+                                        cooldown_minutes=6 * 60)])
+        self.assertEqual(len(engine.update(buoy("M2", [3.5]))), 1)
+        self.assertEqual(len(engine.update(buoy("M2", [2.0], 1))), 1)   # cleared
+        self.assertEqual(engine.update(buoy("M2", [3.5], 2)), [])       # within cooldown
+        self.assertEqual(engine.update(buoy("M2", [2.0], 3)), [])       # its end isn't reported either
+        self.assertEqual(len(engine.update(buoy("M2", [3.5], 8))), 1)
+
+    def test_many_rules_incrementally(self):
+        """Test thousands of rules, each alerting as it would alone, and no re-evaluation."""
+        rng = np.random.default_rng(3)
+        stations = ["M1", "M2", "M3", "M4", "M5", "M6"]
+        rules = [AlertRule(f"rule {i}", [
+            Condition(stations[i % 6], "wave_height", ">", float(rng.uniform(1, 5)),
+                      sustained_minutes=60 * int(rng.integers(0, 3))),
+            Condition(stations[(i + 1) % 6], "wind_speed", ">", float(rng.uniform(5, 30))),
+        ]) for i in range(5000)]
+        engine = AlertEngine(rules)
+        day = [buoy(station, rng.uniform(0, 6, 24), wind=20.0) for station in stations]
+        alerts = engine.update_many(day)
+        self.assertGreater(len(alerts), 0)
+        self.assertEqual(engine.update_many(day), [])   # nothing new
+
+        # Compiled together, each rule alerts exactly as it would on its own
+        for rule in rules[:200]:
+            alone = AlertEngine([rule]).update_many(day)
+            self.assertEqual([(a.kind, a.time, a.values) for a in alone],
+                             [(a.kind, a.time, a.values) for a in alerts if a.rule == rule.name])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the local Parquet observation archive
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from archive import ObservationArchive, pq
+from series import BuoySeries, TideSeries
+from marine_data_v2 import IrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-10-31T23:00:00Z,2.2,7.4,250.0,15.0,240.0,12.5,11.0,1012.0
+M2,2024-11-01T00:00:00Z,2.3,7.4,250.0,15.0,240.0,12.5,11.0,1012.0
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,16.0,245.0,12.4,10.8,1011.0
+"""
+
+
+def buoy_series(times, heights, station="M2") -> BuoySeries:
+    """A BuoySeries with only wave heights filled in."""
+    times = np.array(times, dtype='datetime64[s]')
+    values = {name: np.full(len(times), np.nan) for name in BuoySeries.COLUMNS.values()}
+    values['wave_height'] = np.array(heights, dtype=np.float64)
+    return BuoySeries(station, times, values)
+
+
+@unittest.skipUnless(pq, "pyarrow not installed")
+class TestObservationArchive(unittest.TestCase):
+    """Test cases for ObservationArchive."""
+
+    def setUp(self):
+        """Create an archive in a temporary folder."""
+        self.directory = tempfile.mkdtemp()
+        self.archive = ObservationArchive(self.directory)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.directory)
+
+    def test_partitioned_by_month(self):
+        """Test that readings land in one file per dataset/station/month."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        self.assertEqual(self.archive.months("IWBNetwork", "M2"), ["2024-10", "2024-11"])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "IWBNetwork", "M2", "2024-11.parquet")))
+
+    def test_dedup_newest_wins(self):
+        """Test that re-archiving a time replaces it rather than duplicating it."""
+        self.assertEqual(self.archive.write(buoy_series(['2024-11-01T00:00', '2024-11-01T01:00'], [1.0, 2.0])), 2)
+        self.assertEqual(self.archive.write(buoy_series(['2024-11-01T01:00', '2024-11-01T02:00'], [2.5, 3.0])), 1)
+        series = self.archive.query("IWBNetwork", "M2")
+        self.assertEqual(series['wave_height'].tolist(), [1.0, 2.5, 3.0])
+
+    def test_write_adds_part_file(self):
+        """Test that a later write adds only its new readings in a part file."""
+        folder = os.path.join(self.directory, "IWBNetwork", "M2")
+        self.archive.write(buoy_series(['2024-11-01T00:00', '2024-11-01T01:00'], [1.0, 2.0]))
+        with open(os.path.join(folder, "2024-11.parquet"), 'rb') as f:
+            main = f.read()
+        self.archive.write(buoy_series(['2024-11-01T00:00', '2024-11-01T01:00', '2024-11-01T02:00'],
+                                       [1.0, 2.0, 3.0]))
+        with open(os.path.join(folder, "2024-11.parquet"), 'rb') as f:
+            self.assertEqual(f.read(), main)
+        part = pq.read_table(os.path.join(folder, "2024-11.part-000001.parquet"))
+        self.assertEqual(part.num_rows, 1)
+        self.assertEqual(self.archive.months("IWBNetwork", "M2"), ["2024-11"])
+
+    def test_rewrite_of_same_readings_is_skipped(self):
+        """Test that archiving readings again unchanged writes nothing."""
+        series = BuoySeries.from_csv(BUOY_CSV, "M2")
+        self.archive.write(series)
+        self.assertEqual(self.archive.write(series), 0)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory, "IWBNetwork", "M2"))),
+                         ["2024-10.parquet", "2024-11.parquet"])
+
+    def test_parts_are_compacted(self):
+        """Test that a month's parts are merged into its main file once there are enough."""
+        self.archive.MAX_PARTS = 3
+        hours = np.arange('2024-11-01T00', '2024-11-01T04', dtype='datetime64[h]')
+        for hour in range(4):
+            self.archive.write(buoy_series(hours[:hour + 1], np.arange(hour + 1.0)))
+        self.assertEqual(os.listdir(os.path.join(self.directory, "IWBNetwork", "M2")), ["2024-11.parquet"])
+        self.assertEqual(self.archive.query("IWBNetwork", "M2")['wave_height'].tolist(), [0.0, 1.0, 2.0, 3.0])
+
+    def test_compact(self):
+        """Test that compact leaves one file per month with the newest readings."""
+        self.archive.write(buoy_series(['2024-11-01T00:00', '2024-11-01T01:00'], [1.0, 2.0]))
+        self.archive.write(buoy_series(['2024-11-01T01:00'], [2.5]))
+        self.archive.compact("IWBNetwork", "M2")
+        self.assertEqual(os.listdir(os.path.join(self.directory, "IWBNetwork", "M2")), ["2024-11.parquet"])
+        self.assertEqual(self.archive.query("IWBNetwork", "M2")['wave_height'].tolist(), [1.0, 2.5])
+
+    def test_query_range_and_columns(self):
+        """Test that a query skips other months and loads only asked-for columns."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        with mock.patch('archive.pq.read_table', wraps=pq.read_table) as read_table:
+            series = self.archive.query("IWBNetwork", "M2", "2024-11-01T00:30:00Z", None, ["wave_height"])
+        self.assertEqual(read_table.call_count, 1)
+        self.assertEqual(read_table.call_args.kwargs['columns'], ['time', 'wave_height'])
+        self.assertEqual(list(series.values), ['wave_height'])
+        self.assertEqual(series['wave_height'].tolist(), [2.4])
+
+    def test_empty_query(self):
+        """Test that querying an unknown station gives an empty series."""
+        series = self.archive.query("IrishNationalTideGaugeNetwork", "Galway Port")
+        self.assertIsInstance(series, TideSeries)
+        self.assertEqual(len(series), 0)
+
+    def test_client_archives_fetches(self):
+        """Test that a client with an archive appends what it fetches."""
+        client = IrishMarineDataClient(requests_per_second=None, archive=self.archive)
+        response = mock.Mock(status_code=200, text=BUOY_CSV)
+        with mock.patch.object(client.session, 'get', return_value=response):
+            client.get_wave_buoy_data("M2", 6)
+        self.assertEqual(len(self.archive.query("IWBNetwork", "M2")), 3)
+
+    def test_latest_only_is_not_archived(self):
+        """Test that latest-only fetches are left to the full-window fetches to archive."""
+        client = IrishMarineDataClient(requests_per_second=None, archive=self.archive)
+        response = mock.Mock(status_code=200, text=BUOY_CSV)
+        with mock.patch.object(client.session, 'get', return_value=response):
+            client.get_wave_buoy_data("M2", 6, latest_only=True)
+        self.assertEqual(self.archive.months("IWBNetwork", "M2"), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
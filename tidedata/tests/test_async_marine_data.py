@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the asyncio Irish Marine Data Client
+Serves canned ERDDAP CSV from a local aiohttp server.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from aiohttp import web
+from async_marine_data import AsyncIrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+{station},2024-11-01T00:00:00Z,2.1,7.0,250.0,14.0,240.0,12.5,11.0,1012.0
+{station},2024-11-01T01:00:00Z,2.4,7.5,255.0,16.0,245.0,12.4,10.8,1011.0
+"""
+
+TIDE_CSV = """station_id,time,Water_Level_LAT,Water_Level_OD_Malin
+,UTC,meters,meters
+Galway Port,2024-11-01T00:00:00Z,3.10,0.02
+Galway Port,2024-11-01T00:05:00Z,3.20,0.12
+"""
+
+
+class TestAsyncIrishMarineDataClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the async client against a local fake ERDDAP."""
+
+    async def asyncSetUp(self):
+        """Start a local server that answers like ERDDAP."""
+        self.delay = 0
+        self.batched_requests = 0
+        self.in_flight = 0
+        self.peak = 0
+
+        async def tabledap(request):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.in_flight -= 1
+            if request.match_info['dataset'] == 'IWBNetwork.csv':
+                query = request.rel_url.raw_query_string
+                if 'station_id=~' in query:
+                    self.batched_requests += 1
+                    rows = [BUOY_CSV.format(station=s).splitlines()[2:] for s in ["M1", "M2", "M3", "M4", "M5", "M6"]]
+                    return web.Response(text="\n".join(BUOY_CSV.splitlines()[:2] + sum(rows, [])))
+                station = query.split('station_id=%22')[1].split('%22')[0]
+                if station == 'M9':
+                    return web.Response(status=404, text='Error')
+                return web.Response(text=BUOY_CSV.format(station=station))
+            return web.Response(text=TIDE_CSV)
+
+        app = web.Application()
+        app.router.add_get('/erddap/tabledap/{dataset}', tabledap)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.client = AsyncIrishMarineDataClient(requests_per_second=None)
+        self.client.base_url = f"http://127.0.0.1:{port}/erddap/tabledap"
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_wave_buoy_data_matches_sync_shape(self):
+        """Test that the async buoy result has the usual fields."""
+        data = await self.client.get_wave_buoy_data("M2", hours_back=2)
+        self.assertEqual(data['buoy_id'], 'M2')
+        self.assertEqual(data['latest']['wave_height'], 2.4)
+        self.assertEqual(len(data['historical']), 2)
+        self.assertNotIn('note', data)
+
+    async def test_galway_tide_data(self):
+        """Test that tide data is parsed with the shared parser."""
+        tides = await self.client.get_galway_tide_data(hours_back=1)
+        self.assertEqual(tides['station'], 'Galway Port')
+        self.assertEqual(tides['latest']['water_level'], 3.2)
+        self.assertEqual(tides['tide_state'], 'Rising 📈')
+
+    async def test_all_buoys_in_one_request(self):
+        """Test that all six buoys come back from one batched query."""
+        results = await self.client.get_all_buoy_data(hours_back=1)
+        self.assertEqual([r['buoy_id'] for r in results], ["M1", "M2", "M3", "M4", "M5", "M6"])
+        self.assertEqual(self.batched_requests, 1)
+        self.assertEqual(results[0]['wave_height'], 2.4)
+
+    async def test_all_buoys_run_concurrently(self):
+        """Test that all six buoy requests are in flight at once."""
+        self.delay = 0.2
+        results = await self.client.get_all_buoy_data(hours_back=1, batched=False)
+        self.assertEqual([r['buoy_id'] for r in results], ["M1", "M2", "M3", "M4", "M5", "M6"])
+        self.assertEqual(self.peak, 6)
+
+    async def test_series_and_latest_readings(self):
+        """Test that the array and latest-reading methods are awaitable too."""
+        series = await self.client.get_wave_buoy_series("M2", hours_back=2)
+        self.assertEqual(series['wave_height'].tolist(), [2.1, 2.4])
+        self.assertEqual(len(await self.client.get_galway_tide_series(hours_back=1)), 2)
+        latest = await self.client.get_latest_readings(["M2", "M5"])
+        self.assertEqual(latest['M5'].wave_height, 2.4)
+        self.assertFalse(latest['M5'].is_sample)
+
+    async def test_iter_chunks_streams_in_batches(self):
+        """Test that a streamed query comes back in chunk_rows batches."""
+        chunks = [chunk async for chunk in self.client.iter_chunks(hours_back=24, chunk_rows=5)]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum(len(series) for chunk in chunks for series in chunk.values()), 12)
+        rows = [row async for row in self.client.iter_rows(["M1", "M2"], hours_back=24)]
+        self.assertEqual(len(rows), 12)   # the fake server always sends all six buoys
+
+    async def test_no_blocking_transport(self):
+        """Test that the client holds no requests session and closes its own."""
+        self.assertFalse(hasattr(self.client, 'session'))
+        async with AsyncIrishMarineDataClient(requests_per_second=None) as client:
+            client.base_url = self.client.base_url
+            await client.get_wave_buoy_data("M2", hours_back=1)
+            session = client._session
+        self.assertTrue(session.closed)
+
+    async def test_weather_data_uses_buoy(self):
+        """Test that M-series weather comes from the buoy dataset."""
+        weather = await self.client.get_weather_data("M3", hours_back=1)
+        self.assertEqual(weather['latest']['wind_speed'], 16.0)
+
+    async def test_server_error_falls_back_to_sample_data(self):
+        """Test that an error status returns mock data like the sync client."""
+        data = await self.client.get_wave_buoy_data("M9", hours_back=1)
+        self.assertIn('note', data)
+
+    async def test_timeout_falls_back_to_sample_data(self):
+        """Test that a slow server hits the timeout instead of hanging."""
+        self.delay = 1.0
+        self.client.timeout = 0.1
+        data = await self.client.get_wave_buoy_data("M2", hours_back=1)
+        self.assertIn('note', data)
+
+    async def test_cancellation_propagates(self):
+        """Test that cancelling the caller cancels the request."""
+        self.delay = 1.0
+        task = asyncio.create_task(self.client.get_wave_buoy_data("M2", hours_back=1))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
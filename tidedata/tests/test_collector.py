@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the background collector
+"""
+
+import unittest
+import sys
+import os
+import random
+import threading
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from collector import Collector, PollJob
+from marine_data_v2 import IrishMarineDataClient
+from series import BuoySeries, TideSeries
+from store import ObservationStore
+from fixtures import iso_hours_ago
+
+BUOYS = PollJob("IWBNetwork", ("M2", "M3"), interval=3600, offset=600, hours_back=3)
+TIDES = PollJob("IrishNationalTideGaugeNetwork", ("Galway Port",), interval=300, offset=60, hours_back=1)
+
+
+def buoy_series(station: str, count: int = 2) -> BuoySeries:
+    times = np.array([iso_hours_ago(hours)[:-1] for hours in np.linspace(2, 0.1, count)], dtype='datetime64[s]')
+    values = {name: np.full(count, 1.5) for name in BuoySeries.COLUMNS.values()}
+    return BuoySeries(station, times, values)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCollector(unittest.TestCase):
+    """Test cases for Collector."""
+
+    def setUp(self):
+        self.store = ObservationStore(":memory:")
+        self.client = IrishMarineDataClient(store=self.store)
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.client.close()
+        self.store.close()
+
+    def make_collector(self, jobs, **kwargs):
+        collector = Collector(self.client, jobs, jitter=0, clock=self.clock, rng=random.Random(1), **kwargs)
+        self.addCleanup(collector.stop)
+        return collector
+
+    def wait_idle(self, collector):
+        for future in collector._running:
+            if future is not None:
+                future.result()
+
+    def test_poll_publishes_and_covers(self):
+        """Test a poll fills the snapshot and lets dict calls be served from the store."""
+        collector = self.make_collector([BUOYS])
+        result = {"M2": buoy_series("M2"), "M3": BuoySeries.empty("M3")}
+        with mock.patch.object(self.client, 'get_buoy_series_batch', return_value=result) as fetch:
+            self.assertTrue(collector.poll(BUOYS))
+        fetch.assert_called_once_with(["M2", "M3"], 3)
+        self.assertIs(collector.latest("IWBNetwork", "M2"), result["M2"])
+        self.assertIsNone(collector.latest("IWBNetwork", "M3"))
+
+        self.store.upsert(result["M2"])  # what the real fetch does as it parses
+        with mock.patch.object(self.client, '_http_get', side_effect=AssertionError("should not fetch")):
+            self.store.max_age = 0
+            data = self.client.get_wave_buoy_data("M2", hours_back=2)
+        self.assertEqual(data['data_points'], 2)
+
+    def test_schedule_aligned_to_interval(self):
+        """Test that the next poll lands on the interval boundary plus offset."""
+        collector = self.make_collector([TIDES])
+        with mock.patch.object(self.client, 'get_galway_tide_series',
+                               return_value=TideSeries('Galway Port', np.array(['2024-11-01'], dtype='datetime64[s]'),
+                                                       {'water_level': np.ones(1), 'water_level_malin': np.ones(1)})):
+            collector.run_pending()
+            self.wait_idle(collector)
+        due = collector._due[0]
+        self.assertGreater(due, self.clock.now)
+        self.assertEqual((due - 60) % 300, 0)
+        self.assertLessEqual(due - self.clock.now, 300)
+        self.assertEqual(collector.stats['polls'], 1)
+
+    def test_backoff_on_failure(self):
+        """Test that failures back off exponentially, capped, and reset on success."""
+        collector = self.make_collector([TIDES], max_backoff=1000)
+        delays = []
+        with mock.patch.object(self.client, 'get_galway_tide_series', return_value=TideSeries.empty('Galway Port')):
+            for _ in range(4):
+                collector._due[0] = self.clock.now
+                collector.run_pending()
+                self.wait_idle(collector)
+                delays.append(collector._due[0] - self.clock.now)
+        self.assertEqual(delays, [300, 600, 1000, 1000])
+        self.assertEqual(collector.stats['failures'], 4)
+
+    def test_overlapping_polls_coalesce(self):
+        """Test that a job still running when due again is not started twice."""
+        collector = self.make_collector([TIDES])
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch(hours_back):
+            calls.append(hours_back)
+            release.wait(5)
+            return TideSeries.empty('Galway Port')
+
+        with mock.patch.object(self.client, 'get_galway_tide_series', side_effect=slow_fetch):
+            collector.run_pending()
+            self.clock.now += 600
+            collector.run_pending()
+            release.set()
+            self.wait_idle(collector)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(collector.stats['coalesced'], 1)
+
+    def test_unknown_dataset(self):
+        """Test that only datasets the client can fetch are accepted."""
+        with self.assertRaises(ValueError):
+            Collector(self.client, [PollJob("Nope", ("X",), 60)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the fast ERDDAP CSV reader
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from erddap_csv import read_columns
+
+BUOY_CSV = """station_id,time,WaveHeight,WindSpeed
+,UTC,meters,knots
+M2,2024-11-01T00:00:00Z,2.3,15.0
+M2,2024-11-01T01:00:00Z,NaN,
+M5,2024-11-01T01:00:00Z,3.1,18.0
+"""
+
+
+class TestReadColumns(unittest.TestCase):
+    """Test cases for read_columns."""
+
+    def test_typed_columns(self):
+        """Test that the units row is skipped and columns are typed."""
+        stations, times, values = read_columns(BUOY_CSV, ["WaveHeight", "WindSpeed"])
+        self.assertEqual(stations.tolist(), ["M2", "M2", "M5"])
+        self.assertEqual(times.dtype, np.dtype('datetime64[s]'))
+        self.assertEqual(times[0], np.datetime64('2024-11-01T00:00:00'))
+        self.assertEqual(values["WaveHeight"].dtype, np.float64)
+
+    def test_missing_values_are_nan(self):
+        """Test that empty and NaN cells become NaN."""
+        _, _, values = read_columns(BUOY_CSV, ["WaveHeight", "WindSpeed"])
+        self.assertTrue(np.isnan(values["WaveHeight"][1]))
+        self.assertTrue(np.isnan(values["WindSpeed"][1]))
+
+    def test_absent_column(self):
+        """Test that a column missing from the response is all NaN."""
+        _, times, values = read_columns(BUOY_CSV, ["AtmosphericPressure"])
+        self.assertEqual(len(values["AtmosphericPressure"]), len(times))
+        self.assertTrue(np.isnan(values["AtmosphericPressure"]).all())
+
+    def test_no_station_column(self):
+        """Test that responses without station_id give stations=None."""
+        stations, times, _ = read_columns("time,WaveHeight\nUTC,meters\n2024-11-01T00:00:00Z,1.0\n",
+                                          ["WaveHeight"])
+        self.assertIsNone(stations)
+        self.assertEqual(len(times), 1)
+
+    def test_header_only(self):
+        """Test that a response with no data rows gives empty arrays."""
+        _, times, values = read_columns(BUOY_CSV.split("M2,")[0], ["WaveHeight"])
+        self.assertEqual(len(times), 0)
+        self.assertEqual(len(values["WaveHeight"]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
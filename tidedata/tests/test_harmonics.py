@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test Suite for harmonic tide prediction
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from harmonics import HarmonicModel, resolvable_constituents, CONSTITUENT_SPEEDS, hours_since_reference
+from series import TideSeries
+from marine_data_v2 import IrishMarineDataClient
+
+# A Galway-like tide: amplitudes in metres, phases in degrees
+TRUE_CONSTITUENTS = {'M2': (1.60, 110.0), 'S2': (0.55, 150.0), 'K1': (0.08, 60.0),
+                     'O1': (0.06, 300.0), 'N2': (0.30, 90.0), 'M4': (0.05, 20.0)}
+MEAN = 2.9
+
+
+def synthetic_levels(times, noise=0.0, seed=1):
+    """Levels from TRUE_CONSTITUENTS, with optional Gaussian noise."""
+    hours = hours_since_reference(times)
+    levels = np.full(hours.shape, MEAN)
+    for name, (amplitude, phase) in TRUE_CONSTITUENTS.items():
+        levels += amplitude * np.cos(np.radians(CONSTITUENT_SPEEDS[name] * hours - phase))
+    return levels + np.random.default_rng(seed).normal(0, noise, hours.shape)
+
+
+class TestHarmonicModel(unittest.TestCase):
+    """Test cases for HarmonicModel."""
+
+    def setUp(self):
+        """Sixty days of 5-minute readings."""
+        self.times = np.arange('2024-09-01', '2024-10-31', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        self.levels = synthetic_levels(self.times, noise=0.05)
+
+    def test_recovers_constituents(self):
+        """Test that a fit recovers known amplitudes and phases."""
+        model = HarmonicModel.fit(self.times, self.levels, list(TRUE_CONSTITUENTS))
+        self.assertAlmostEqual(model.mean, MEAN, places=2)
+        for name, (amplitude, phase) in TRUE_CONSTITUENTS.items():
+            fitted_amplitude, fitted_phase = model.constituents[name]
+            self.assertAlmostEqual(fitted_amplitude, amplitude, delta=0.01)
+            if amplitude > 0.2:
+                self.assertAlmostEqual((fitted_phase - phase + 180) % 360 - 180, 0, delta=1.0)
+        self.assertAlmostEqual(model.residual_std, 0.05, delta=0.01)
+
+    def test_predicts_future(self):
+        """Test that predictions a month past the record match the true tide."""
+        model = HarmonicModel.fit(self.times, self.levels)
+        future = np.arange('2024-11-15', '2024-11-17', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        error = model.predict(future) - synthetic_levels(future)
+        self.assertLess(np.abs(error).max(), 0.05)
+
+    def test_gaps_ignored(self):
+        """Test that NaN readings are left out of the fit."""
+        levels = self.levels.copy()
+        levels[::3] = np.nan
+        model = HarmonicModel.fit(self.times, levels, list(TRUE_CONSTITUENTS))
+        self.assertAlmostEqual(model.constituents['M2'][0], 1.60, delta=0.02)
+
+    def test_rayleigh_selection(self):
+        """Test that short records only get constituents they can separate."""
+        self.assertEqual(resolvable_constituents(25), ['M2', 'M4', 'M6', 'M8'])
+        two_weeks = resolvable_constituents(15 * 24)
+        self.assertIn('S2', two_weeks)
+        self.assertNotIn('N2', two_weeks)
+        self.assertNotIn('K2', two_weeks)
+        self.assertIn('K2', resolvable_constituents(183 * 24))
+
+    def test_year_of_minutes(self):
+        """Test a year at 1-minute steps in one call against predicting a sample of those times."""
+        model = HarmonicModel.fit(self.times, self.levels)
+        minutes = np.arange('2025-01-01', '2026-01-01', dtype='datetime64[m]')
+        levels = model.predict(minutes)
+        self.assertEqual(levels.shape, minutes.shape)
+        np.testing.assert_allclose(levels[::997], model.predict(minutes[::997]))
+
+    def test_round_trip_and_series(self):
+        """Test to_dict/from_dict and predict_series."""
+        model = HarmonicModel.fit(self.times, self.levels, ['M2', 'S2'])
+        again = HarmonicModel.from_dict(model.to_dict())
+        series = again.predict_series("2024-11-01T00:00:00Z", "2024-11-02T00:00:00Z", 30)
+        self.assertIsInstance(series, TideSeries)
+        self.assertEqual(len(series), 48)
+        np.testing.assert_allclose(series['water_level'], model.predict(series.times))
+
+    def test_level_at(self):
+        """Test that level_at evaluates the model at ISO strings and arrays alike."""
+        model = HarmonicModel(MEAN, TRUE_CONSTITUENTS)
+        queries = ['2025-03-01T06:30:00Z', '2025-03-01T06:31:00Z']
+        times = np.array(['2025-03-01T06:30:00', '2025-03-01T06:31:00'], dtype='datetime64[s]')
+        np.testing.assert_allclose(model.level_at(queries), synthetic_levels(times))
+
+    def test_errors(self):
+        """Test that unknown constituents and empty records are rejected."""
+        with self.assertRaises(ValueError):
+            HarmonicModel.fit(self.times, self.levels, ['XX9'])
+        with self.assertRaises(ValueError):
+            HarmonicModel.fit(self.times[:0], self.levels[:0])
+
+
+class TestClientTideModel(unittest.TestCase):
+    """Test cases for IrishMarineDataClient.fit_galway_tide_model."""
+
+    def test_fit_from_gauge(self):
+        """Test that the client fits a model to the fetched tide series."""
+        times = np.arange('2024-09-01', '2024-10-01', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        rows = "\n".join(f"Galway Port,{t}Z,{level:.3f},0.0"
+                         for t, level in zip(np.datetime_as_string(times), synthetic_levels(times)))
+        csv_text = "station_id,time,Water_Level_LAT,Water_Level_OD_Malin\n,UTC,meters,meters\n" + rows + "\n"
+        client = IrishMarineDataClient(requests_per_second=None)
+        with mock.patch.object(client.session, 'get', return_value=mock.Mock(status_code=200, text=csv_text)):
+            model = client.fit_galway_tide_model(30)
+        self.assertAlmostEqual(model.constituents['M2'][0], 1.60, delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
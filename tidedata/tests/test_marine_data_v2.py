@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Test Suite for Irish Marine Data Client V2
+Runs offline - network calls are replaced with canned ERDDAP responses.
+"""
+
+import unittest
+import sys
+import os
+import time
+import threading
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from marine_data_v2 import IrishMarineDataClient, TokenBucket, LatestReading
+
+MULTI_BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-11-01T00:00:00Z,2.1,7.0,250.0,14.0,240.0,12.5,11.0,1012.0
+M3,2024-11-01T00:00:00Z,1.5,6.0,200.0,9.0,190.0,13.0,12.0,1015.0
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,16.0,245.0,12.4,10.8,1011.0
+M3,2024-11-01T01:00:00Z,1.6,6.5,205.0,,195.0,13.1,12.1,1014.0
+"""
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the request rate limiter."""
+
+    def test_burst_is_free(self):
+        """Test that a full bucket hands out `capacity` tokens without waiting."""
+        bucket = TokenBucket(rate=1.0, capacity=3)
+        waits = [bucket.reserve() for _ in range(3)]
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+
+    def test_empty_bucket_queues_callers(self):
+        """Test that callers past the burst wait in turn."""
+        bucket = TokenBucket(rate=10.0, capacity=1)
+        bucket.reserve()
+        first = bucket.reserve()
+        second = bucket.reserve()
+        self.assertGreater(first, 0)
+        self.assertAlmostEqual(second - first, 0.1, places=2)
+
+    def test_invalid_settings(self):
+        """Test that nonsensical settings are rejected."""
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestConcurrentBuoyFetch(unittest.TestCase):
+    """Test cases for fetching all buoys in parallel."""
+
+    def setUp(self):
+        """Set up a client whose buoy fetch takes a fixed time."""
+        self.client = IrishMarineDataClient(max_workers=6, requests_per_second=None)
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+        def slow_fetch(buoy_id, hours_back, latest_only=False):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            time.sleep(0.1)
+            with self.lock:
+                self.in_flight -= 1
+            return self.client._get_mock_buoy_data(buoy_id)
+
+        self.fetch = slow_fetch
+
+    def test_results_keep_buoy_order(self):
+        """Test that parallel results come back in M1-M6 order."""
+        with mock.patch.object(self.client, 'get_wave_buoy_data', side_effect=self.fetch):
+            results = self.client.get_all_buoy_data(hours_back=1, batched=False)
+        self.assertEqual([r['buoy_id'] for r in results], ["M1", "M2", "M3", "M4", "M5", "M6"])
+
+    def test_all_buoys_fetched_at_once(self):
+        """Test that all six buoy fetches are in flight together."""
+        barrier = threading.Barrier(6, timeout=5)
+
+        def fetch_together(buoy_id, hours_back, latest_only=False):
+            barrier.wait()   # breaks unless all six fetches arrive
+            return self.fetch(buoy_id, hours_back, latest_only)
+
+        with mock.patch.object(self.client, 'get_wave_buoy_data', side_effect=fetch_together):
+            results = self.client.get_all_buoy_data(hours_back=1, batched=False)
+        self.assertEqual(len(results), 6)
+        self.assertFalse(barrier.broken)
+
+    def test_serial_mode(self):
+        """Test that concurrent=False fetches one buoy at a time."""
+        with mock.patch.object(self.client, 'get_wave_buoy_data', side_effect=self.fetch):
+            results = self.client.get_all_buoy_data(hours_back=1, batched=False, concurrent=False)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.peak, 1)
+
+    def test_per_host_limit(self):
+        """Test that no more than max_per_host requests hit one server at once."""
+        client = IrishMarineDataClient(max_workers=6, max_per_host=2, requests_per_second=None)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_get(url, timeout, headers=None):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(url)
+            return mock.Mock(status_code=500)
+
+        with mock.patch.object(client.session, 'get', side_effect=fake_get):
+            client.get_all_buoy_data(hours_back=1, batched=False)
+        self.assertLessEqual(max(peak), 2)
+
+
+class TestPooledSession(unittest.TestCase):
+    """Test cases for the shared keep-alive HTTP session."""
+
+    def test_session_is_reused(self):
+        """Test that every request goes through the client's one session."""
+        client = IrishMarineDataClient(requests_per_second=None)
+        with mock.patch.object(client.session, 'get', return_value=mock.Mock(status_code=500)) as get:
+            client.get_wave_buoy_data("M2", hours_back=1)
+            client.get_galway_tide_data(hours_back=1)
+        self.assertEqual(get.call_count, 2)
+
+    def test_pool_and_headers(self):
+        """Test that the pool is sized and compression is requested."""
+        client = IrishMarineDataClient(pool_size=12)
+        adapter = client.session.get_adapter("https://erddap.marine.ie/")
+        self.assertEqual(adapter._pool_maxsize, 12)
+        self.assertEqual(client.session.headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(client.session.headers["Connection"], "keep-alive")
+
+    def test_context_manager_closes_session(self):
+        """Test that leaving a with-block closes the session."""
+        client = IrishMarineDataClient()
+        with mock.patch.object(client.session, 'close') as close:
+            with client:
+                pass
+        close.assert_called_once()
+
+
+class TestBatchedBuoyFetch(unittest.TestCase):
+    """Test cases for fetching several buoys in one ERDDAP query."""
+
+    def setUp(self):
+        """Set up a client and a canned multi-station response."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+        self.response = mock.Mock(status_code=200, text=MULTI_BUOY_CSV)
+
+    def test_station_regex_constraint(self):
+        """Test that a list of buoys becomes one encoded regex constraint."""
+        url = self.client._build_buoy_url(["M1", "M2"], 1)
+        self.assertIn("station_id=~%22%28M1%7CM2%29%22", url)
+        self.assertIn("station_id=%22M2%22", self.client._build_buoy_url("M2", 1))
+
+    def test_batch_partitions_by_station(self):
+        """Test that one response is split into per-buoy results."""
+        with mock.patch.object(self.client.session, 'get', return_value=self.response) as get:
+            buoys = self.client.get_buoy_data_batch(["M3", "M2"], hours_back=2)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(list(buoys), ["M3", "M2"])
+        self.assertEqual(buoys['M2']['latest']['wave_height'], 2.4)
+        self.assertEqual(buoys['M3']['latest']['wind_speed'], 0)
+        self.assertEqual(len(buoys['M3']['historical']), 2)
+        self.assertEqual(buoys['M3']['location'], 'Southwest of Ireland')
+
+    def test_missing_station_gets_sample_data(self):
+        """Test that a buoy absent from the response falls back like a single fetch."""
+        with mock.patch.object(self.client.session, 'get', return_value=self.response):
+            buoys = self.client.get_buoy_data_batch(["M2", "M6"], hours_back=2)
+        self.assertNotIn('note', buoys['M2'])
+        self.assertIn('note', buoys['M6'])
+
+    def test_all_buoys_use_one_request(self):
+        """Test that get_all_buoy_data sends a single batched query."""
+        with mock.patch.object(self.client.session, 'get', return_value=self.response) as get:
+            results = self.client.get_all_buoy_data(hours_back=1)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual([r['buoy_id'] for r in results], ["M1", "M2", "M3", "M4", "M5", "M6"])
+
+
+class TestLatestOnly(unittest.TestCase):
+    """Test cases for the server-side latest reading queries."""
+
+    def setUp(self):
+        """Set up a client and a canned orderByMax response."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+        lines = MULTI_BUOY_CSV.splitlines()
+        self.response = mock.Mock(status_code=200, text="\n".join(lines[:2] + lines[4:]))
+
+    def test_order_by_max_in_url(self):
+        """Test that latest_only asks the server for one row per station."""
+        url = self.client._build_buoy_url(["M2", "M3"], 3, latest_only=True)
+        self.assertTrue(url.endswith("&orderByMax(%22station_id,time%22)"))
+        self.assertNotIn("orderByMax", self.client._build_buoy_url("M2", 3))
+
+    def test_latest_readings(self):
+        """Test that latest readings come back as LatestReading tuples."""
+        with mock.patch.object(self.client.session, 'get', return_value=self.response) as get:
+            latest = self.client.get_latest_readings(["M2", "M3", "M6"])
+        self.assertIn("orderByMax", get.call_args[0][0])
+        self.assertIsInstance(latest['M2'], LatestReading)
+        self.assertEqual(latest['M2'].wave_height, 2.4)
+        self.assertEqual(latest['M3'].timestamp, '2024-11-01T01:00:00Z')
+        self.assertFalse(latest['M3'].is_sample)
+        self.assertTrue(latest['M6'].is_sample)
+
+    def test_latest_dict_shape(self):
+        """Test that a LatestReading converts to the data['latest'] shape."""
+        lines = MULTI_BUOY_CSV.splitlines()
+        m2_only = mock.Mock(status_code=200, text="\n".join(lines[:2] + [lines[4]]))
+        with mock.patch.object(self.client.session, 'get', return_value=m2_only):
+            reading = self.client.get_latest_readings(["M2"])['M2']
+            full = self.client.get_wave_buoy_data("M2", hours_back=3, latest_only=True)
+        self.assertEqual(reading.as_latest_dict(), full['latest'])
+
+    def test_all_buoys_use_latest_only(self):
+        """Test that get_all_buoy_data only downloads the latest rows."""
+        with mock.patch.object(self.client.session, 'get', return_value=self.response) as get:
+            self.client.get_all_buoy_data(hours_back=1)
+        self.assertIn("orderByMax", get.call_args[0][0])
+
+
+class TestAggregatedQueries(unittest.TestCase):
+    """Test cases for server-side time-bucketed statistics."""
+
+    def setUp(self):
+        """Set up a client."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+
+    def test_mean_url(self):
+        """Test that the reducer and bucket are pushed into the query."""
+        url = self.client._build_aggregate_url("IWBNetwork", ["M2", "M3"], ["WaveHeight", "WindSpeed"],
+                                               "1hour", "mean", 24)
+        self.assertIn("IWBNetwork.csv?station_id,time,WaveHeight,WindSpeed&station_id=~", url)
+        self.assertTrue(url.endswith("&orderByMean(%22station_id,time/1hour%22)"))
+
+    def test_max_groups_on_variable(self):
+        """Test that min/max reducers compare on the requested variable."""
+        url = self.client._build_aggregate_url("IrishNationalTideGaugeNetwork", ["Galway Port"],
+                                               ["Water_Level_LAT"], "1day", "minmax", 24)
+        self.assertIn("station_id=%22Galway%20Port%22", url)
+        self.assertTrue(url.endswith("&orderByMinMax(%22station_id,time/1day,Water_Level_LAT%22)"))
+
+    def test_invalid_arguments(self):
+        """Test that unsupported reducers, buckets and combinations are rejected."""
+        with self.assertRaises(ValueError):
+            self.client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight"], reducer="median")
+        with self.assertRaises(ValueError):
+            self.client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight"], bucket="hourly")
+        with self.assertRaises(ValueError):
+            self.client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight", "WindSpeed"], reducer="max")
+
+    def test_parse_aggregated_rows(self):
+        """Test that reduced rows are split by station, keeping gaps as None."""
+        csv_text = """station_id,time,WaveHeight,WindSpeed
+,UTC,meters,knots
+M2,2024-11-01T00:00:00Z,2.25,15.0
+M3,2024-11-01T00:00:00Z,1.55,NaN
+"""
+        response = mock.Mock(status_code=200, text=csv_text)
+        with mock.patch.object(self.client.session, 'get', return_value=response):
+            result = self.client.get_aggregated("IWBNetwork", ["M2", "M3"], ["WaveHeight", "WindSpeed"])
+        self.assertEqual(result['data_points'], 2)
+        self.assertEqual(result['stations']['M2'], [{'time': '2024-11-01T00:00:00Z', 'WaveHeight': 2.25, 'WindSpeed': 15.0}])
+        self.assertIsNone(result['stations']['M3'][0]['WindSpeed'])
+
+    def test_failed_request_returns_empty(self):
+        """Test that a server error returns empty station lists, not sample data."""
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=500)):
+            result = self.client.get_aggregated("IWBNetwork", ["M2"], ["WaveHeight"])
+        self.assertEqual(result['stations'], {'M2': []})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
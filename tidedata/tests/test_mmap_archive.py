@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the memory-mapped archive and lazy historical views
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mmap_archive import MmapArchive
+from series import BuoySeries, TideSeries, HistoricalView
+from marine_data_v2 import IrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-11-01T00:00:00Z,2.3,7.4,250.0,15.0,240.0,12.5,11.0,1012.0
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,,245.0,12.4,10.8,1011.0
+M2,2024-11-01T02:00:00Z,2.6,7.5,255.0,17.0,245.0,12.4,10.8,1011.0
+"""
+
+
+class TestMmapArchive(unittest.TestCase):
+    """Test cases for MmapArchive."""
+
+    def setUp(self):
+        """Create an archive in a temporary folder."""
+        self.directory = tempfile.mkdtemp()
+        self.archive = MmapArchive(self.directory)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.directory)
+
+    def generation(self, station="M2"):
+        """The live generation folder of a station."""
+        folder = os.path.join(self.directory, "IWBNetwork", station)
+        with open(os.path.join(folder, "CURRENT")) as f:
+            return os.path.join(folder, f.read())
+
+    def test_fixed_width_files(self):
+        """Test that time is int64 epoch seconds and variables float32, on disk."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        self.assertEqual(np.load(os.path.join(self.generation(), "time.npy")).dtype, np.int64)
+        self.assertEqual(np.load(os.path.join(self.generation(), "wave_height.npy")).dtype, np.float32)
+        with open(os.path.join(self.generation(), "LENGTH")) as f:
+            self.assertEqual(f.read(), "3")
+
+    def test_open_is_memory_mapped(self):
+        """Test that open() returns read-only views of the mapped files."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        series = self.archive.open("IWBNetwork", "M2")
+        self.assertIsInstance(series['wave_height'], np.memmap)
+        self.assertFalse(series['wave_height'].flags.writeable)
+        self.assertEqual(series.times[0], np.datetime64('2024-11-01T00:00:00'))
+
+    def test_range(self):
+        """Test that start/end pick a half-open slice by binary search."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        series = self.archive.open("IWBNetwork", "M2", "2024-11-01T01:00:00Z", "2024-11-01T02:00:00Z")
+        self.assertEqual(len(series), 1)
+
+    def test_append_and_overwrite(self):
+        """Test both the append fast path and replacing an existing time."""
+        first, second, third = BUOY_CSV.splitlines()[2:]
+        header = "\n".join(BUOY_CSV.splitlines()[:2])
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{first}\n", "M2")), 1)
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{third}\n", "M2")), 1)
+        replaced = first.replace("2.3,", "9.9,")
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{replaced}\n{second}\n", "M2")), 1)
+        series = self.archive.open("IWBNetwork", "M2")
+        self.assertEqual(series['wave_height'].tolist(), np.float32([9.9, 2.4, 2.6]).tolist())
+
+    def test_append_in_place(self):
+        """Test that newer readings and repeats don't rewrite the files."""
+        first, second, third = BUOY_CSV.splitlines()[2:]
+        header = "\n".join(BUOY_CSV.splitlines()[:2])
+        self.archive.write(BuoySeries.from_csv(f"{header}\n{first}\n", "M2"))
+        generation = self.generation()
+        inode = os.stat(os.path.join(generation, "time.npy")).st_ino
+        reader = self.archive.open("IWBNetwork", "M2")
+
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{first}\n{second}\n", "M2")), 1)
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{third}\n", "M2")), 1)
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2")), 0)   # a latest-only style repeat
+        self.assertEqual(self.generation(), generation)
+        self.assertEqual(os.stat(os.path.join(generation, "time.npy")).st_ino, inode)
+        self.assertEqual(len(self.archive.open("IWBNetwork", "M2")), 3)
+        self.assertEqual(len(reader), 1)   # an earlier reader keeps its own view
+
+    def test_merge_switches_generation(self):
+        """Test that an older reading writes a new generation and old readers stay aligned."""
+        first, second, third = BUOY_CSV.splitlines()[2:]
+        header = "\n".join(BUOY_CSV.splitlines()[:2])
+        self.archive.write(BuoySeries.from_csv(f"{header}\n{second}\n{third}\n", "M2"))
+        old_generation = self.generation()
+        reader = self.archive.open("IWBNetwork", "M2")
+        self.assertEqual(self.archive.write(BuoySeries.from_csv(f"{header}\n{first}\n", "M2")), 1)
+        self.assertNotEqual(self.generation(), old_generation)
+        self.assertFalse(os.path.exists(old_generation))
+        self.assertEqual(reader['wave_height'].tolist(), np.float32([2.4, 2.6]).tolist())
+        self.assertEqual(reader.times[0], np.datetime64('2024-11-01T01:00:00'))
+        self.assertEqual(len(self.archive.open("IWBNetwork", "M2")), 3)
+
+    def test_capacity_growth(self):
+        """Test that appends past the spare capacity move to a larger generation."""
+        self.archive.MIN_CAPACITY = 4
+        times = np.arange('2024-11-01T00', '2024-11-01T10', np.timedelta64(1, 'h'), dtype='datetime64[s]')
+        values = {name: np.arange(10, dtype=np.float64) for name in BuoySeries.COLUMNS.values()}
+        for i in range(10):
+            self.assertEqual(self.archive.write(BuoySeries("M2", times[i:i + 1],
+                                                           {n: v[i:i + 1] for n, v in values.items()})), 1)
+        series = self.archive.open("IWBNetwork", "M2")
+        self.assertEqual(series['wave_height'].tolist(), list(range(10)))
+        self.assertEqual(series.times.tolist(), times.tolist())
+
+    def test_flat_layout_is_migrated(self):
+        """Test that an archive written in the flat layout is read, then moved on write."""
+        folder = os.path.join(self.directory, "IWBNetwork", "M2")
+        os.makedirs(folder)
+        series = BuoySeries.from_csv(BUOY_CSV, "M2")
+        np.save(os.path.join(folder, "time.npy"), series.times[:2].astype('datetime64[s]').astype(np.int64))
+        for name in BuoySeries.COLUMNS.values():
+            np.save(os.path.join(folder, f"{name}.npy"), series[name][:2].astype(np.float32))
+        self.assertEqual(len(self.archive.open("IWBNetwork", "M2")), 2)
+        self.assertEqual(self.archive.write(series), 1)
+        self.assertFalse(os.path.exists(os.path.join(folder, "time.npy")))
+        self.assertEqual(self.archive.open("IWBNetwork", "M2")['wave_height'].tolist(),
+                         np.float32([2.3, 2.4, 2.6]).tolist())
+
+    def test_missing_station(self):
+        """Test that an unknown station gives an empty series."""
+        self.assertEqual(len(self.archive.open("IrishNationalTideGaugeNetwork", "Galway Port")), 0)
+
+    def test_lazy_legacy_dict(self):
+        """Test that the lazy historical view matches the eager list, without float32 noise."""
+        self.archive.write(BuoySeries.from_csv(BUOY_CSV, "M2"))
+        data = self.archive.open("IWBNetwork", "M2").to_dict(lazy=True)
+        self.assertIsInstance(data['historical'], HistoricalView)
+        self.assertEqual(len(data['historical']), 3)
+        self.assertEqual(data['historical'][-1], {'time': '2024-11-01T02:00:00Z', 'wave_height': 2.6, 'wind_speed': 17.0})
+        self.assertEqual(data['historical'], BuoySeries.from_csv(BUOY_CSV, "M2").to_historical())
+        self.assertEqual(data['latest']['wave_height'], 2.6)
+
+    def test_client_writes_archive(self):
+        """Test that a client accepts an MmapArchive as its archive."""
+        client = IrishMarineDataClient(requests_per_second=None, archive=self.archive)
+        response = mock.Mock(status_code=200, text=BUOY_CSV)
+        with mock.patch.object(client.session, 'get', return_value=response):
+            client.get_wave_buoy_data("M2", 6)
+        self.assertEqual(len(self.archive.open("IWBNetwork", "M2")), 3)
+
+
+class TestHistoricalView(unittest.TestCase):
+    """Test cases for HistoricalView on in-memory series."""
+
+    def test_tide_fields_and_indexing(self):
+        """Test the 'level' key, negative indexes and bounds."""
+        csv_text = ("station_id,time,Water_Level_LAT,Water_Level_OD_Malin\n,UTC,meters,meters\n"
+                    "Galway Port,2024-11-01T00:00:00Z,3.1,0.0\nGalway Port,2024-11-01T00:05:00Z,,0.2\n")
+        view = TideSeries.from_csv(csv_text).to_historical(lazy=True)
+        self.assertEqual(view[-1], {'time': '2024-11-01T00:05:00Z', 'level': 0.0})
+        self.assertEqual([h['level'] for h in view], [3.1, 0.0])
+        with self.assertRaises(IndexError):
+            view[2]
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the on-disk ERDDAP response cache
+"""
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+import shutil
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import requests
+from response_cache import ResponseCache, normalize_url, dataset_from_url
+from marine_data_v2 import IrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,16.0,245.0,12.4,10.8,1011.0
+"""
+
+URL = "https://erddap.marine.ie/erddap/tabledap/IWBNetwork.csv?station_id,time,WaveHeight&station_id=%22M2%22&time%3E=2024-11-01T00:00:00Z"
+
+
+def make_response(status=200, body=BUOY_CSV, headers=None):
+    """Build a real requests.Response with the given content."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = body.encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for ResponseCache on its own."""
+
+    def setUp(self):
+        """Create a throwaway cache directory."""
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_equivalent_urls_share_a_key(self):
+        """Test that encoding and constraint order don't change the key."""
+        reordered = ("https://ERDDAP.marine.ie/erddap/tabledap/IWBNetwork.csv?station_id,time,WaveHeight"
+                     "&time>=2024-11-01T00:00:00Z&station_id=\"M2\"")
+        self.assertEqual(normalize_url(URL), normalize_url(reordered))
+        self.assertEqual(dataset_from_url(URL), 'IWBNetwork')
+
+    def test_store_then_hit(self):
+        """Test that a stored response is served fresh and counted as a hit."""
+        self.assertIsNone(self.cache.lookup(URL))
+        self.cache.store(URL, make_response())
+        entry = self.cache.lookup(URL)
+        self.assertTrue(entry.fresh)
+        self.assertEqual(entry.to_response().text, BUOY_CSV)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_per_dataset_ttl(self):
+        """Test that entries go stale after their dataset's TTL."""
+        cache = ResponseCache(self.directory, ttls={'IWBNetwork': 0.05})
+        cache.store(URL, make_response())
+        time.sleep(0.1)
+        self.assertFalse(cache.lookup(URL).fresh)
+
+    def test_survives_restart(self):
+        """Test that a new cache object finds entries already on disk."""
+        self.cache.store(URL, make_response())
+        reopened = ResponseCache(self.directory)
+        self.assertTrue(reopened.lookup(URL).fresh)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry goes when over max_bytes."""
+        cache = ResponseCache(self.directory, max_bytes=len(BUOY_CSV) * 2)
+        urls = [URL.replace("M2", m) for m in ("M1", "M2", "M3")]
+        cache.store(urls[0], make_response())
+        time.sleep(0.02)
+        cache.store(urls[1], make_response())
+        time.sleep(0.02)
+        cache.lookup(urls[0])  # M1 is now more recent than M2
+        time.sleep(0.02)
+        cache.store(urls[2], make_response())
+        self.assertIsNone(cache.lookup(urls[1]))
+        self.assertIsNotNone(cache.lookup(urls[0]))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+class TestClientWithCache(unittest.TestCase):
+    """Test cases for IrishMarineDataClient using a cache."""
+
+    def setUp(self):
+        """Create a client with a throwaway cache."""
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory, ttls={'IWBNetwork': 60})
+        self.client = IrishMarineDataClient(requests_per_second=None, cache=self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_repeat_query_uses_cache(self):
+        """Test that the same query twice only goes to the server once."""
+        with mock.patch.object(self.client.session, 'get', return_value=make_response()) as get:
+            first = self.client.get_wave_buoy_data("M2", hours_back=2)
+            second = self.client.get_wave_buoy_data("M2", hours_back=2)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(first['latest'], second['latest'])
+
+    def test_stale_entry_is_revalidated(self):
+        """Test that a stale entry sends its ETag and reuses the body on 304."""
+        self.cache.ttls['IWBNetwork'] = 0
+        with mock.patch.object(self.client.session, 'get',
+                               return_value=make_response(headers={'ETag': '"abc"'})):
+            self.client.get_wave_buoy_data("M2", hours_back=2)
+        with mock.patch.object(self.client.session, 'get',
+                               return_value=make_response(status=304, body='')) as get:
+            data = self.client.get_wave_buoy_data("M2", hours_back=2)
+        self.assertEqual(get.call_args[1]['headers'], {'If-None-Match': '"abc"'})
+        self.assertEqual(data['latest']['wave_height'], 2.4)
+        self.assertEqual(self.cache.stats()['revalidated'], 1)
+
+    def test_errors_are_not_cached(self):
+        """Test that failed responses are not stored."""
+        with mock.patch.object(self.client.session, 'get', return_value=make_response(status=500)):
+            self.client.get_wave_buoy_data("M2", hours_back=2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_window_start_is_rounded(self):
+        """Test that query windows start on the dataset's sampling interval."""
+        start = self.client.window_start(5, 'IWBNetwork')
+        self.assertTrue(start.endswith(":00:00Z"))
+        minute = int(self.client.window_start(5, 'IrishNationalTideGaugeNetwork')[14:16])
+        self.assertEqual(minute % 5, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the pluggable ERDDAP response formats
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from response_formats import ResponseFormat, get_format, pq, netCDF4
+from marine_data_v2 import IrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WindSpeed
+,UTC,meters,knots
+M2,2024-11-01T00:00:00Z,2.3,15.0
+M2,2024-11-01T01:00:00Z,2.4,
+M5,2024-11-01T01:00:00Z,3.1,18.0
+"""
+
+EPOCH_SECONDS = [1730419200.0, 1730422800.0, 1730422800.0]
+
+
+def parquet_body() -> bytes:
+    """BUOY_CSV as ERDDAP would send it in .parquet form (time in epoch seconds)."""
+    import pyarrow as pa
+    table = pa.table({'station_id': ['M2', 'M2', 'M5'], 'time': EPOCH_SECONDS,
+                      'WaveHeight': [2.3, 2.4, 3.1], 'WindSpeed': [15.0, None, 18.0]})
+    sink = BytesIO()
+    pq.write_table(table, sink)
+    return sink.getvalue()
+
+
+def nccf_body() -> bytes:
+    """BUOY_CSV as a CF contiguous ragged time-series file."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'buoys.nc')
+        with netCDF4.Dataset(path, 'w') as dataset:
+            dataset.createDimension('timeseries', 2)
+            dataset.createDimension('obs', 3)
+            dataset.createDimension('id_strlen', 2)
+            ids = dataset.createVariable('station_id', 'S1', ('timeseries', 'id_strlen'))
+            ids[:] = np.array([[b'M', b'2'], [b'M', b'5']])
+            dataset.createVariable('rowSize', 'i4', ('timeseries',))[:] = [2, 1]
+            time = dataset.createVariable('time', 'f8', ('obs',))
+            time.units = "seconds since 1970-01-01T00:00:00Z"
+            time[:] = EPOCH_SECONDS
+            dataset.createVariable('WaveHeight', 'f4', ('obs',))[:] = [2.3, 2.4, 3.1]
+            wind = dataset.createVariable('WindSpeed', 'f4', ('obs',), fill_value=-9999.0)
+            wind[:] = np.ma.masked_array([15.0, 0.0, 18.0], mask=[False, True, False])
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class TestFormats(unittest.TestCase):
+    """Test cases for decoding each format into column arrays."""
+
+    def check_columns(self, columns):
+        stations, times, values = columns
+        self.assertEqual(list(stations), ['M2', 'M2', 'M5'])
+        self.assertEqual(times[1], np.datetime64('2024-11-01T01:00:00'))
+        np.testing.assert_allclose(values['WaveHeight'], [2.3, 2.4, 3.1], rtol=1e-6)
+        self.assertTrue(np.isnan(values['WindSpeed'][1]))
+        self.assertTrue(np.isnan(values['AtmosphericPressure']).all())
+
+    def test_csv(self):
+        """Test that CSV decodes like read_columns."""
+        self.check_columns(get_format('csv').decode(BUOY_CSV.encode(), ['WaveHeight', 'WindSpeed',
+                                                                       'AtmosphericPressure']))
+
+    @unittest.skipUnless(pq, "pyarrow not installed")
+    def test_parquet(self):
+        """Test that Parquet with epoch-second times decodes to the same arrays."""
+        self.check_columns(get_format('parquet').decode(parquet_body(), ['WaveHeight', 'WindSpeed',
+                                                                         'AtmosphericPressure']))
+
+    @unittest.skipUnless(netCDF4, "netCDF4 not installed")
+    def test_nccf(self):
+        """Test that a ragged ncCF file expands station ids per observation."""
+        self.check_columns(get_format('ncCF').decode(nccf_body(), ['WaveHeight', 'WindSpeed',
+                                                                   'AtmosphericPressure']))
+
+    def test_url_and_unknown_name(self):
+        """Test the URL rewrite and that unknown formats are rejected."""
+        url = "https://example/tabledap/IWBNetwork.csv?station_id,time"
+        self.assertEqual(get_format('ncCF').url_for(url), "https://example/tabledap/IWBNetwork.ncCF?station_id,time")
+        with self.assertRaises(ValueError):
+            get_format('xlsx')
+        with self.assertRaises(TypeError):
+            ResponseFormat()   # formats must say how to decode
+
+
+@unittest.skipUnless(pq, "pyarrow not installed")
+class TestClientFormats(unittest.TestCase):
+    """Test cases for IrishMarineDataClient(response_format=...)."""
+
+    def setUp(self):
+        """Create a client asking for Parquet."""
+        self.client = IrishMarineDataClient(requests_per_second=None, response_format='parquet')
+
+    def test_series_from_parquet(self):
+        """Test that series methods request and decode .parquet."""
+        response = mock.Mock(status_code=200, content=parquet_body())
+        with mock.patch.object(self.client.session, 'get', return_value=response) as get:
+            result = self.client.get_buoy_series_batch(["M2", "M5"], 6)
+        self.assertIn("IWBNetwork.parquet?", get.call_args[0][0])
+        self.assertEqual(result["M2"]['wave_height'].tolist(), [2.3, 2.4])
+
+    def test_falls_back_to_csv(self):
+        """Test that a refused binary request is repeated as CSV."""
+        responses = [mock.Mock(status_code=400), mock.Mock(status_code=200, text=BUOY_CSV)]
+        with mock.patch.object(self.client.session, 'get', side_effect=responses) as get:
+            series = self.client.get_wave_buoy_series("M5", 6)
+        self.assertIn("IWBNetwork.csv?", get.call_args[0][0])
+        self.assertEqual(series['wave_height'].tolist(), [3.1])
+
+    def test_missing_package_uses_csv(self):
+        """Test that a format whose package is missing falls back at construction."""
+        with mock.patch('response_formats.pq', None):
+            client = IrishMarineDataClient(requests_per_second=None, response_format='parquet')
+        self.assertEqual(client.response_format.name, 'csv')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
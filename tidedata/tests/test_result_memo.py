@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the in-memory result memo
+"""
+
+import unittest
+import sys
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from result_memo import ResultMemo
+from marine_data_v2 import IrishMarineDataClient
+
+BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,16.0,245.0,12.4,10.8,1011.0
+"""
+
+
+class TestResultMemo(unittest.TestCase):
+    """Test cases for ResultMemo on its own."""
+
+    def test_value_reused_within_ttl(self):
+        """Test that a fresh value is returned without recomputing."""
+        memo = ResultMemo(ttl=60)
+        compute = mock.Mock(return_value=42)
+        self.assertEqual(memo.get_or_compute('k', compute), 42)
+        self.assertEqual(memo.get_or_compute('k', compute), 42)
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(memo.stats()['hits'], 1)
+
+    def test_value_expires(self):
+        """Test that an expired value is computed again."""
+        memo = ResultMemo(ttl=0.05)
+        compute = mock.Mock(return_value=1)
+        memo.get_or_compute('k', compute)
+        time.sleep(0.1)
+        memo.get_or_compute('k', compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_max_entries(self):
+        """Test that the least recently used value is dropped first."""
+        memo = ResultMemo(max_entries=2)
+        memo.get_or_compute('a', lambda: 1)
+        memo.get_or_compute('b', lambda: 2)
+        memo.get_or_compute('a', lambda: 1)
+        memo.get_or_compute('c', lambda: 3)
+        self.assertEqual(memo.get_or_compute('a', lambda: 'recomputed'), 1)
+        self.assertEqual(memo.get_or_compute('b', lambda: 'recomputed'), 'recomputed')
+
+    def test_single_flight(self):
+        """Test that concurrent callers share one computation."""
+        memo = ResultMemo()
+        calls = []
+
+        def slow():
+            calls.append(threading.get_ident())
+            time.sleep(0.1)
+            return 'value'
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: memo.get_or_compute('k', slow), range(8)))
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(memo.stats()['shared'], 7)
+
+    def test_errors_reach_waiters_and_are_not_stored(self):
+        """Test that a failing computation raises for everyone and is retried later."""
+        memo = ResultMemo()
+
+        def failing():
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(memo.get_or_compute, 'k', failing) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result()
+        self.assertEqual(memo.get_or_compute('k', lambda: 'ok'), 'ok')
+
+    def test_should_store(self):
+        """Test that rejected values are returned but not kept."""
+        memo = ResultMemo()
+        memo.get_or_compute('k', lambda: 'sample', should_store=lambda v: False)
+        self.assertEqual(memo.stats()['entries'], 0)
+
+
+class TestClientWithMemo(unittest.TestCase):
+    """Test cases for IrishMarineDataClient using a memo."""
+
+    def setUp(self):
+        """Create a client with a memo."""
+        self.memo = ResultMemo(ttl=60)
+        self.client = IrishMarineDataClient(requests_per_second=None, memo=self.memo)
+
+    def test_concurrent_handlers_share_one_fetch(self):
+        """Test that simultaneous requests for M2 fetch and parse once."""
+        def slow_get(url, timeout, headers=None):
+            time.sleep(0.1)
+            return mock.Mock(status_code=200, text=BUOY_CSV)
+
+        with mock.patch.object(self.client.session, 'get', side_effect=slow_get) as get:
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                results = list(pool.map(lambda _: self.client.get_wave_buoy_data("M2", 6), range(6)))
+        self.assertEqual(get.call_count, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_different_windows_are_separate(self):
+        """Test that a different window or buoy is not served from the memo."""
+        response = mock.Mock(status_code=200, text=BUOY_CSV)
+        with mock.patch.object(self.client.session, 'get', return_value=response) as get:
+            self.client.get_wave_buoy_data("M2", 6)
+            self.client.get_wave_buoy_data("M2", 12)
+            self.client.get_wave_buoy_data("M3", 6)
+        self.assertEqual(get.call_count, 3)
+
+    def test_sample_data_not_memoized(self):
+        """Test that a failed fetch is retried on the next call."""
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=500)) as get:
+            self.client.get_galway_tide_data(6)
+            self.client.get_galway_tide_data(6)
+        self.assertEqual(get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
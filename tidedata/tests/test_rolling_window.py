@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Suite for incremental (rolling window) fetching
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rolling_window import RollingWindow
+from marine_data_v2 import IrishMarineDataClient
+from fixtures import iso_hours_ago, buoy_csv
+
+
+class TestRollingWindow(unittest.TestCase):
+    """Test cases for RollingWindow on its own."""
+
+    def test_add_only_newer(self):
+        """Test that readings at or before last_seen are ignored."""
+        window = RollingWindow()
+        self.assertTrue(window.add("2024-11-01T01:00:00Z", 'a'))
+        self.assertFalse(window.add("2024-11-01T01:00:00Z", 'dup'))
+        self.assertFalse(window.add("2024-11-01T00:00:00Z", 'old'))
+        self.assertEqual(window.last_seen, "2024-11-01T01:00:00Z")
+        self.assertEqual(len(window), 1)
+
+    def test_evict_before(self):
+        """Test that readings older than the cutoff are dropped."""
+        window = RollingWindow()
+        for hour in range(5):
+            window.add(f"2024-11-01T0{hour}:00:00Z", hour)
+        self.assertEqual(window.evict_before("2024-11-01T02:00:00Z"), 2)
+        self.assertEqual(window.rows, [2, 3, 4])
+
+
+class TestIncrementalFetch(unittest.TestCase):
+    """Test cases for get_wave_buoy_data(incremental=True)."""
+
+    def setUp(self):
+        """Create a client."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+
+    def test_second_poll_only_asks_for_new_rows(self):
+        """Test that the second call queries time>last_seen and merges."""
+        first_times = (iso_hours_ago(3), iso_hours_ago(2), iso_hours_ago(1))
+        new_time = iso_hours_ago(0.01)
+        responses = [mock.Mock(status_code=200, text=buoy_csv(*first_times)),
+                     mock.Mock(status_code=200, text=buoy_csv(new_time))]
+        with mock.patch.object(self.client.session, 'get', side_effect=responses) as get:
+            first = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+            second = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+        self.assertIn("time%3E=", get.call_args_list[0][0][0])
+        self.assertIn(f"time%3E{first_times[-1]}", get.call_args_list[1][0][0])
+        self.assertEqual(first['data_points'], 3)
+        self.assertEqual(second['data_points'], 4)
+        self.assertEqual(second['latest']['timestamp'], new_time)
+        self.assertEqual([h['time'] for h in second['historical']], list(first_times) + [new_time])
+
+    def test_no_new_rows(self):
+        """Test that ERDDAP's 404 'no matching results' keeps the window."""
+        responses = [mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(1))),
+                     mock.Mock(status_code=404, text="Error: Your query produced no matching results.")]
+        with mock.patch.object(self.client.session, 'get', side_effect=responses):
+            self.client.get_wave_buoy_data("M2", 24, incremental=True)
+            again = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+        self.assertEqual(again['data_points'], 1)
+        self.assertNotIn('note', again)
+
+    def test_old_rows_are_evicted(self):
+        """Test that readings older than hours_back leave the window."""
+        response = mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(30), iso_hours_ago(2)))
+        with mock.patch.object(self.client.session, 'get', return_value=response):
+            data = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+        self.assertEqual(data['data_points'], 1)
+
+    def test_longer_window_refetches(self):
+        """Test that asking for more history than held does a full fetch."""
+        responses = [mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(2))),
+                     mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(20), iso_hours_ago(2)))]
+        with mock.patch.object(self.client.session, 'get', side_effect=responses) as get:
+            self.client.get_wave_buoy_data("M2", 6, incremental=True)
+            data = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+        self.assertIn("time%3E=", get.call_args_list[1][0][0])
+        self.assertEqual(data['data_points'], 2)
+
+    def test_tide_incremental(self):
+        """Test that tide data can be polled incrementally too."""
+        csv_text = ("station_id,time,Water_Level_LAT,Water_Level_OD_Malin\n,UTC,meters,meters\n"
+                    f"Galway Port,{iso_hours_ago(0.2)},3.1,0.0\nGalway Port,{iso_hours_ago(0.1)},3.3,0.2\n")
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=200, text=csv_text)):
+            tides = self.client.get_galway_tide_data(6, incremental=True)
+        self.assertEqual(tides['latest']['water_level'], 3.3)
+        self.assertEqual(tides['tide_state'], 'Rising 📈')
+
+    def test_first_failure_gives_sample_data(self):
+        """Test that with nothing held, a failed poll falls back to sample data."""
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=500)):
+            data = self.client.get_wave_buoy_data("M2", 24, incremental=True)
+        self.assertIn('note', data)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test Suite for activity safety scoring
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from safety import (Band, PROFILES, score, score_grid, best_windows, tide_rate_at, in_sector,
+                    ScoreGrid, OFFSHORE_SECTORS, SHORE_BEARINGS)
+from series import BuoySeries
+from harmonics import HarmonicModel
+from marine_data_v2 import IrishMarineDataClient
+
+HOURS = np.arange('2024-07-01T00', '2024-07-02T00', np.timedelta64(1, 'h'), dtype='datetime64[s]')
+
+
+def buoy(station, wave_height, wind_speed=5.0, wind_direction=270.0, sea_temperature=15.0, wave_period=8.0):
+    """An hourly buoy series over HOURS; scalars are repeated."""
+    values = {name: np.full(len(HOURS), np.nan) for name in BuoySeries.COLUMNS.values()}
+    for name, value in [('wave_height', wave_height), ('wind_speed', wind_speed),
+                        ('wind_direction', wind_direction), ('sea_temperature', sea_temperature),
+                        ('peak_period', wave_period)]:
+        values[name] = np.broadcast_to(np.asarray(value, dtype=np.float64), len(HOURS)).copy()
+    return BuoySeries(station, HOURS, values)
+
+
+class TestScoring(unittest.TestCase):
+    """Test cases for bands and the score function."""
+
+    def test_band(self):
+        """Test ramps, open sides and NaN."""
+        band = Band(low_zero=4, low_ok=8, high_ok=18, high_zero=28)
+        np.testing.assert_allclose(band.score(np.array([0, 6, 10, 23, 30, np.nan])),
+                                   [0, 0.5, 1, 0.5, 0, np.nan])
+        np.testing.assert_allclose(Band(high_ok=1).score(np.array([1.0, 1.01])), [1, 0])
+
+    def test_weakest_factor_decides(self):
+        """Test that a cell scores its worst condition and missing ones are skipped."""
+        scores, factors = score(PROFILES['swim'], {
+            'wave_height': np.array([[0.2, 0.75, np.nan]]),
+            'wind_speed': np.array([[5.0, 5.0, np.nan]]),
+            'sea_temperature': np.array([[9.0, 15.0, np.nan]]),
+        })
+        np.testing.assert_allclose(scores, [[50, 50, np.nan]])
+        self.assertEqual(set(factors), {'wave_height', 'wind_speed', 'sea_temperature'})
+
+    def test_offshore_wind_tightens_limits(self):
+        """Test that the same wind scores worse for swimmers when blowing offshore."""
+        wind = {'wind_speed': np.array([12.0, 12.0])}
+        scores, _ = score(PROFILES['swim'], wind, offshore=np.array([False, True]))
+        self.assertGreater(scores[0], scores[1])
+        self.assertTrue(in_sector(np.array([350.0]), 315, 45)[0])
+        self.assertFalse(in_sector(np.array([180.0]), 315, 45)[0])
+
+    def test_offshore_sectors_face_away_from_land(self):
+        """Test that each buoy's offshore wind blows from the side of Ireland it faces."""
+        self.assertEqual(OFFSHORE_SECTORS['M2'], (45, 135))   # west coast: easterlies
+        self.assertTrue(in_sector(np.array([90.0]), *OFFSHORE_SECTORS['M2'])[0])
+        self.assertFalse(in_sector(np.array([270.0]), *OFFSHORE_SECTORS['M2'])[0])
+        self.assertEqual(OFFSHORE_SECTORS['M4'], (270, 0))    # south-east coast: north-westerlies
+        # Land lies opposite the side of Ireland in the client's station table
+        toward_land = {'Southwest': 45, 'West': 90, 'Southeast': 315, 'Northwest': 135}
+        client = IrishMarineDataClient(requests_per_second=None)
+        for buoy_id in ['M1', 'M2', 'M3', 'M4', 'M5', 'M6']:
+            side = client._get_buoy_location(buoy_id).split()[0]
+            self.assertEqual(SHORE_BEARINGS[buoy_id], toward_land[side], buoy_id)
+
+    def test_tide_rate(self):
+        """Test tidal flow from a harmonic model's level_at."""
+        model = HarmonicModel(2.9, {'M2': (1.6, 110.0)})
+        rates = tide_rate_at(model, HOURS)
+        self.assertLess(np.max(np.abs(rates)), 1.6 * np.radians(28.9841042) * 1.01)
+        self.assertGreater(np.max(np.abs(rates)), 0.7)
+
+
+class TestScoreGrid(unittest.TestCase):
+    """Test cases for grids over stations and time."""
+
+    def test_grid_and_best_windows(self):
+        """Test the calm station and calm hours are picked out."""
+        swell = np.where((HOURS >= np.datetime64('2024-07-01T06')) & (HOURS < np.datetime64('2024-07-01T12')),
+                         0.3, 1.5)
+        buoys = {'M2': buoy('M2', swell), 'M3': buoy('M3', 2.0)}
+        grid = score_grid('kayak', buoys, HOURS)
+        self.assertEqual(grid.scores.shape, (2, 24))
+        self.assertTrue(np.all(grid.scores[1] == 0))
+        self.assertEqual(grid.limiting()[1, 0], 'wave_height')
+
+        windows = best_windows(grid, min_score=90, min_hours=2)
+        self.assertEqual(len(windows), 1)
+        self.assertEqual(windows[0].station, 'M2')
+        self.assertEqual(windows[0].start, np.datetime64('2024-07-01T06:00:00'))
+        self.assertEqual(windows[0].end, np.datetime64('2024-07-01T11:00:00'))
+        self.assertEqual(windows[0].min_score, 100.0)
+
+    def test_windows_ranked(self):
+        """Test windows are ordered by mean score and respect min_hours."""
+        scores = np.array([[80, 80, 10, 95, 95, 95, 10, 99],
+                           [90, 90, 90, 10, 10, 10, 10, 10]], dtype=np.float64)
+        grid = ScoreGrid(['A', 'B'], HOURS[:8], scores, {})
+        windows = best_windows(grid, min_score=70, min_hours=1)
+        self.assertEqual([(w.station, w.mean_score) for w in windows], [('A', 95.0), ('B', 90.0), ('A', 80.0)])
+        self.assertEqual(len(best_windows(grid, min_score=70, min_hours=0)), 4)
+
+    def test_wind_direction_wraps(self):
+        """Test that wind veering through north is interpolated the short way."""
+        directions = np.where(np.arange(len(HOURS)) % 2 == 0, 350.0, 10.0)
+        grid_times = HOURS[:-1] + np.timedelta64(30, 'm')
+        swimmer = score_grid('swim', {'M3': buoy('M3', 0.2, wind_speed=12.0, wind_direction=directions)},
+                             grid_times, offshore_sectors={'M3': (315, 45)})
+        # Northerlies are offshore here, so the wind limit tightens everywhere
+        self.assertTrue(np.all(swimmer.factors['wind_speed'] < 1))
+
+    def test_week_of_cells(self):
+        """Test tens of thousands of cells scored in one call, each row as if scored alone."""
+        week = np.arange('2024-07-01', '2024-07-08', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        rng = np.random.default_rng(2)
+        hourly = np.arange('2024-07-01', '2024-07-08', np.timedelta64(1, 'h'), dtype='datetime64[s]')
+        buoys = {}
+        for station in ['M1', 'M2', 'M3', 'M4', 'M5', 'M6']:
+            values = {name: rng.uniform(0, 20, len(hourly)) for name in BuoySeries.COLUMNS.values()}
+            values['wave_height'] = rng.uniform(0, 3, len(hourly))
+            buoys[station] = BuoySeries(station, hourly, values)
+        model = HarmonicModel(2.9, {'M2': (1.6, 110.0), 'S2': (0.55, 150.0)})
+        grid = score_grid('kayak', buoys, week, tide=model)
+        windows = best_windows(grid, min_score=60)
+        self.assertEqual(grid.scores.size, 6 * len(week))
+        alone = score_grid('kayak', {'M4': buoys['M4']}, week, tide=model)
+        np.testing.assert_array_equal(grid.scores[grid.stations.index('M4')], alone.scores[0])
+        self.assertIn('tide_rate', grid.factors)
+        self.assertLessEqual(len(windows), 5)
+
+    def test_unknown_activity(self):
+        """Test that only known activities can be scored."""
+        with self.assertRaises(ValueError):
+            score_grid('paraglide', {}, HOURS)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test Suite for columnar (NumPy) series results
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+import io
+import numpy as np
+import requests
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from series import BuoySeries, ObservationSeries, TideSeries
+from marine_data_v2 import IrishMarineDataClient
+
+MULTI_BUOY_CSV = """station_id,time,WaveHeight,WavePeriod,MeanWaveDirection,WindSpeed,WindDirection,SeaTemperature,AirTemperature,AtmosphericPressure
+,UTC,meters,s,degrees_true,knots,degrees_true,degree_C,degree_C,mbar
+M2,2024-11-01T00:00:00Z,2.3,7.4,250.0,15.0,240.0,12.5,11.0,1012.0
+M2,2024-11-01T01:00:00Z,2.4,7.5,255.0,,245.0,12.4,10.8,1011.0
+M5,2024-11-01T01:00:00Z,3.1,8.2,260.0,18.0,250.0,13.0,11.5,1009.0
+"""
+
+TIDE_CSV = """station_id,time,Water_Level_LAT,Water_Level_OD_Malin
+,UTC,meters,meters
+Galway Port,2024-11-01T00:00:00Z,3.1,0.0
+Galway Port,2024-11-01T00:05:00Z,3.3,0.2
+"""
+
+
+class TestSeries(unittest.TestCase):
+    """Test cases for BuoySeries and TideSeries."""
+
+    def test_from_csv_arrays(self):
+        """Test that the parser fills typed arrays with NaN for gaps."""
+        series = BuoySeries.from_csv(MULTI_BUOY_CSV, "M2")
+        self.assertEqual(len(series), 2)
+        self.assertEqual(series.times.dtype, np.dtype('datetime64[s]'))
+        self.assertEqual(series['wave_height'].dtype, np.float64)
+        self.assertTrue(np.isnan(series['wind_speed'][1]))
+        self.assertEqual(series.times[-1], np.datetime64('2024-11-01T01:00:00'))
+
+    def test_by_station(self):
+        """Test that a multi-station response splits into one series each."""
+        result = BuoySeries.from_csv_by_station(MULTI_BUOY_CSV, ["M5", "M2", "M6"])
+        self.assertEqual(list(result), ["M5", "M2", "M6"])
+        self.assertEqual(len(result["M2"]), 2)
+        self.assertEqual(result["M5"]['wave_height'].tolist(), [3.1])
+        self.assertEqual(len(result["M6"]), 0)
+
+    def test_legacy_dict(self):
+        """Test that to_dict matches the get_wave_buoy_data shape."""
+        client = IrishMarineDataClient(requests_per_second=None)
+        m2_only = "\n".join(line for line in MULTI_BUOY_CSV.splitlines() if not line.startswith("M5"))
+        legacy = client._parse_buoy_csv(m2_only.replace(",,", ",0,"), "M2")
+        series = BuoySeries.from_csv(MULTI_BUOY_CSV, "M2", location=legacy['location'])
+        self.assertEqual(series.to_dict(), legacy)
+
+    def test_tide_legacy_dict(self):
+        """Test that TideSeries.to_dict matches the get_galway_tide_data shape."""
+        client = IrishMarineDataClient(requests_per_second=None)
+        self.assertEqual(TideSeries.from_csv(TIDE_CSV).to_dict(), client._parse_tide_csv(TIDE_CSV))
+
+    def test_base_dict(self):
+        """Test the station-level dictionary shared by every series type."""
+        series = TideSeries.from_csv(TIDE_CSV)
+        base = ObservationSeries.to_dict(series)
+        self.assertEqual(list(base), ['station', 'latest', 'historical', 'data_points'])
+        self.assertEqual(base['data_points'], 2)
+        self.assertEqual(series.to_dict(), {**base, 'tide_state': series.tide_state(),
+                                             'tide_now': series.states().latest().to_dict()})
+
+    def test_to_pandas(self):
+        """Test conversion to a time-indexed DataFrame."""
+        frame = TideSeries.from_csv(TIDE_CSV).to_pandas()
+        self.assertEqual(list(frame.columns), ['water_level', 'water_level_malin'])
+        self.assertEqual(frame['water_level'].iloc[-1], 3.3)
+        self.assertEqual(str(frame.index[0]), '2024-11-01 00:00:00')
+
+
+class TestLevelAt(unittest.TestCase):
+    """Test cases for interpolating readings at arbitrary times."""
+
+    def setUp(self):
+        self.times = np.arange('2024-11-01', '2024-11-03', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        hours = (self.times - self.times[0]).astype(np.float64) / 3600
+        self.omega = 2 * np.pi / 12.42
+        self.series = TideSeries('Galway Port', self.times, {
+            'water_level': 3.0 + 2.0 * np.cos(self.omega * hours),
+            'water_level_malin': np.full(len(self.times), np.nan)})
+        rng = np.random.default_rng(7)
+        self.queries = self.times[0] + rng.integers(0, 47 * 3600, 5000).astype('timedelta64[s]')
+        self.expected = 3.0 + 2.0 * np.cos(self.omega * (self.queries - self.times[0]).astype(np.float64) / 3600)
+
+    def test_linear_and_cubic(self):
+        """Test thousands of queries at once; cubic is far closer than linear."""
+        linear = self.series.level_at(self.queries)
+        cubic = self.series.level_at(self.queries, method="cubic")
+        self.assertEqual(linear.shape, (5000,))
+        linear_error = np.max(np.abs(linear - self.expected))
+        cubic_error = np.max(np.abs(cubic - self.expected))
+        self.assertLess(linear_error, 0.01)
+        self.assertLess(cubic_error, linear_error / 5)
+
+    def test_exact_readings_and_strings(self):
+        """Test that query times on readings return them, given as ISO strings."""
+        self.assertAlmostEqual(float(self.series.level_at('2024-11-01T00:00:00Z')), 5.0)
+        np.testing.assert_allclose(self.series.level_at(['2024-11-01T00:10:00Z'], method="cubic"),
+                                   self.series['water_level'][1:2])
+
+    def test_outside_and_gaps(self):
+        """Test NaN outside the series and across gaps longer than max_gap_minutes."""
+        self.assertTrue(np.isnan(self.series.level_at(['2024-10-31T23:00:00Z', '2024-11-05T00:00:00Z'])).all())
+        levels = self.series['water_level'].copy()
+        levels[10:20] = np.nan
+        gappy = TideSeries('Galway Port', self.times, {'water_level': levels,
+                                                       'water_level_malin': levels})
+        self.assertTrue(np.isnan(gappy.level_at('2024-11-01T02:30:00Z')))
+        self.assertFalse(np.isnan(gappy.level_at('2024-11-01T02:30:00Z', max_gap_minutes=None)))
+        with self.assertRaises(ValueError):
+            gappy.level_at('2024-11-01T02:30:00Z', method="quadratic")
+
+
+class TestClientSeries(unittest.TestCase):
+    """Test cases for the client's *_series methods."""
+
+    def setUp(self):
+        """Create a client."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+
+    def test_buoy_series(self):
+        """Test that get_wave_buoy_series parses into a BuoySeries."""
+        response = mock.Mock(status_code=200, text=MULTI_BUOY_CSV)
+        with mock.patch.object(self.client.session, 'get', return_value=response):
+            series = self.client.get_wave_buoy_series("M2", 6)
+        self.assertIsInstance(series, BuoySeries)
+        self.assertEqual(series.location, 'West of Ireland')
+        self.assertEqual(len(series), 2)
+
+    def test_batch_series_single_request(self):
+        """Test that get_buoy_series_batch uses one request for all buoys."""
+        response = mock.Mock(status_code=200, text=MULTI_BUOY_CSV)
+        with mock.patch.object(self.client.session, 'get', return_value=response) as get:
+            result = self.client.get_buoy_series_batch(["M2", "M5"], 6)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(result["M5"]), 1)
+
+    def test_failure_gives_empty_series(self):
+        """Test that a failed fetch returns an empty series, not sample data."""
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=500)):
+            series = self.client.get_galway_tide_series(6)
+        self.assertEqual(len(series), 0)
+        self.assertEqual(series.to_dict()['tide_state'], 'Unknown')
+
+
+def streamed_response(status_code: int, body: str = "") -> requests.Response:
+    """A requests.Response whose body is read from a stream."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body.encode())
+    return response
+
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for iter_chunks and iter_rows."""
+
+    def setUp(self):
+        """Create a client and a long two-buoy response."""
+        self.client = IrishMarineDataClient(requests_per_second=None)
+        header = "\n".join(MULTI_BUOY_CSV.splitlines()[:2])
+        rows = [f"M{2 + 3 * (i % 2)},2024-{1 + i // 1000:02d}-01T{(i // 2) % 24:02d}:00:00Z,{i}.0,7.0,250.0,15.0,240.0,12.5,11.0,1012.0"
+                for i in range(2500)]
+        self.body = header + "\n" + "\n".join(rows) + "\n"
+
+    def test_chunks_are_bounded(self):
+        """Test that a long response arrives in chunk_rows-sized batches."""
+        with mock.patch.object(self.client.session, 'get',
+                               return_value=streamed_response(200, self.body)) as get:
+            chunks = list(self.client.iter_chunks(["M2", "M5"], 24 * 365, chunk_rows=1000))
+        self.assertTrue(get.call_args.kwargs['stream'])
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([sum(len(s) for s in chunk.values()) for chunk in chunks], [1000, 1000, 500])
+        self.assertIsInstance(chunks[0]["M5"], BuoySeries)
+        self.assertEqual(chunks[0]["M5"].location, 'West of Ireland')
+
+    def test_rows(self):
+        """Test that iter_rows yields every reading as a flat dict."""
+        with mock.patch.object(self.client.session, 'get',
+                               return_value=streamed_response(200, self.body)):
+            rows = list(self.client.iter_rows(["M2", "M5"], chunk_rows=1000))
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[0]['station_id'], 'M2')
+        self.assertEqual(rows[0]['wave_height'], 0.0)
+        self.assertTrue(rows[0]['time'].endswith('Z'))
+
+    def test_no_rows(self):
+        """Test that ERDDAP's 404 'no matching results' yields nothing."""
+        with mock.patch.object(self.client.session, 'get', return_value=streamed_response(404)):
+            self.assertEqual(list(self.client.iter_chunks(["M2"])), [])
+
+    def test_errors_raise(self):
+        """Test that server errors are raised rather than replaced by sample data."""
+        with mock.patch.object(self.client.session, 'get', return_value=streamed_response(500)):
+            with self.assertRaises(requests.HTTPError):
+                list(self.client.iter_chunks(["M2"]))
+
+    def test_unknown_dataset(self):
+        """Test that only buoy and tide datasets can be streamed."""
+        with self.assertRaises(ValueError):
+            next(self.client.iter_chunks(dataset="Nope"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the SQLite observation store
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from store import ObservationStore
+from series import BuoySeries
+from marine_data_v2 import IrishMarineDataClient
+from fixtures import iso_hours_ago, buoy_csv
+
+
+class TestObservationStore(unittest.TestCase):
+    """Test cases for ObservationStore on its own."""
+
+    def setUp(self):
+        """Create a store in a temporary folder."""
+        self.directory = tempfile.mkdtemp()
+        self.store = ObservationStore(os.path.join(self.directory, "obs.db"))
+
+    def tearDown(self):
+        """Close the store and remove the folder."""
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_wal_mode(self):
+        """Test that the database runs in write-ahead-log mode."""
+        self.assertEqual(self.store._conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+    def test_upsert_and_read_range(self):
+        """Test that re-written readings replace old ones and ranges are half-open."""
+        self.store.upsert(BuoySeries.from_csv(buoy_csv("2024-11-01T00:00:00Z", "2024-11-01T01:00:00Z"), "M2"))
+        self.store.upsert(BuoySeries.from_csv(buoy_csv("2024-11-01T01:00:00Z").replace("2.0,", "9.0,"), "M2"))
+        series = self.store.read("IWBNetwork", "M2", "2024-11-01T00:00:00Z", "2024-11-01T02:00:00Z")
+        self.assertEqual(series['wave_height'].tolist(), [2.0, 9.0])
+        series = self.store.read("IWBNetwork", "M2", "2024-11-01T01:00:00Z", columns=['wind_speed'])
+        self.assertEqual(list(series.values), ['wind_speed'])
+        self.assertEqual(len(series), 1)
+
+    def test_missing_values_round_trip(self):
+        """Test that NaN is stored as NULL and read back as NaN."""
+        self.store.upsert(BuoySeries.from_csv(buoy_csv("2024-11-01T00:00:00Z").replace("12.5", ""), "M2"))
+        self.assertTrue(np.isnan(self.store.read("IWBNetwork", "M2")['sea_temperature'][0]))
+
+    def test_coverage_merges(self):
+        """Test that overlapping fetched ranges merge into one covering range."""
+        self.store.mark_covered("IWBNetwork", "M2", "2024-11-01T00:00:00Z", "2024-11-01T06:00:00Z")
+        self.store.mark_covered("IWBNetwork", "M2", "2024-11-01T05:00:00Z", "2024-11-01T12:00:00Z")
+        self.assertTrue(self.store.covers("IWBNetwork", "M2", "2024-11-01T01:00:00Z", "2024-11-01T11:00:00Z"))
+        self.assertFalse(self.store.covers("IWBNetwork", "M2", "2024-10-31T23:00:00Z", "2024-11-01T11:00:00Z"))
+        self.assertFalse(self.store.covers("IWBNetwork", "M3", "2024-11-01T01:00:00Z", "2024-11-01T02:00:00Z"))
+
+    def test_unknown_column(self):
+        """Test that reading an unknown variable is rejected."""
+        with self.assertRaises(ValueError):
+            self.store.read("IWBNetwork", "M2", columns=['water_level'])
+
+
+class TestClientWithStore(unittest.TestCase):
+    """Test cases for IrishMarineDataClient(store=...)."""
+
+    def setUp(self):
+        """Create a client backed by an in-memory store."""
+        self.store = ObservationStore(":memory:")
+        self.client = IrishMarineDataClient(requests_per_second=None, store=self.store)
+
+    def tearDown(self):
+        """Close the store."""
+        self.store.close()
+
+    def test_covered_window_served_locally(self):
+        """Test that a window inside a recent fetch is answered without ERDDAP."""
+        response = mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(20), iso_hours_ago(2), iso_hours_ago(1)))
+        with mock.patch.object(self.client.session, 'get', return_value=response) as get:
+            self.client.get_wave_buoy_data("M2", 24)
+            data = self.client.get_wave_buoy_data("M2", 6)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(data['data_points'], 2)
+        self.assertEqual(data['location'], 'West of Ireland')
+        self.assertNotIn('note', data)
+
+    def test_uncovered_window_fetches(self):
+        """Test that asking for more history than was fetched goes to ERDDAP."""
+        response = mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(1)))
+        with mock.patch.object(self.client.session, 'get', return_value=response) as get:
+            self.client.get_wave_buoy_data("M2", 6)
+            self.client.get_wave_buoy_data("M2", 24)
+        self.assertEqual(get.call_count, 2)
+
+    def test_offline_uses_stored_readings(self):
+        """Test that stored readings replace sample data when ERDDAP fails."""
+        ok = mock.Mock(status_code=200, text=buoy_csv(iso_hours_ago(2), iso_hours_ago(1)))
+        with mock.patch.object(self.client.session, 'get', return_value=ok):
+            self.client.get_buoy_data_batch(["M2"], 6)
+        self.store._conn.execute("DELETE FROM coverage")
+        with mock.patch.object(self.client.session, 'get', return_value=mock.Mock(status_code=503)):
+            data = self.client.get_wave_buoy_data("M2", 6)
+        self.assertEqual(data['data_points'], 2)
+        self.assertIn('Stored', data['note'])
+
+    def test_tide_read_through(self):
+        """Test that tide windows are stored and served the same way."""
+        csv_text = ("station_id,time,Water_Level_LAT,Water_Level_OD_Malin\n,UTC,meters,meters\n"
+                    f"Galway Port,{iso_hours_ago(0.2)},3.1,0.0\nGalway Port,{iso_hours_ago(0.1)},3.3,0.2\n")
+        with mock.patch.object(self.client.session, 'get',
+                               return_value=mock.Mock(status_code=200, text=csv_text)) as get:
+            self.client.get_galway_tide_data(6)
+            tides = self.client.get_galway_tide_data(6)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(tides['tide_state'], 'Rising 📈')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
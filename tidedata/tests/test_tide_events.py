@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test Suite for high/low water detection
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tide_events import find_high_low, tide_times_rows, HIGH, LOW
+from harmonics import HarmonicModel
+from series import TideSeries
+from fixtures import m2_tide
+
+
+class TestFindHighLow(unittest.TestCase):
+    """Test cases for find_high_low."""
+
+    def test_refined_between_samples(self):
+        """Test that parabolic refinement finds times and heights off the 10-minute grid."""
+        times = np.arange('2024-11-01T00:03', '2024-11-03T00:00', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        events = find_high_low(times, m2_tide(times))
+        self.assertEqual(events.kinds[:2].tolist(), [LOW, HIGH])
+        high_time = events.highs.times[0]
+        self.assertLess(abs((high_time - np.datetime64('2024-11-01T12:25:14')).astype(int)), 30)
+        np.testing.assert_allclose(events.highs.heights, 5.0, atol=0.002)
+        np.testing.assert_allclose(events.lows.heights, 1.0, atol=0.002)
+
+    def test_alternates_and_counts(self):
+        """Test that highs and lows alternate, about four a day."""
+        times = np.arange('2024-11-01', '2024-11-11', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        events = find_high_low(times, m2_tide(times))
+        self.assertTrue(np.all(events.kinds[1:] != events.kinds[:-1]))
+        self.assertIn(len(events.times), range(37, 40))
+
+    def test_noisy_readings_with_smoothing(self):
+        """Test that noise wiggles are removed when smoothing is asked for."""
+        times = np.arange('2024-11-01', '2024-11-03', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        levels = m2_tide(times, noise=0.03)
+        self.assertGreater(len(find_high_low(times, levels, min_separation_hours=0).times), 20)
+        events = find_high_low(times, levels, smooth_minutes=30)
+        self.assertEqual(len(events.times), len(find_high_low(times, m2_tide(times)).times))
+        np.testing.assert_allclose(events.highs.heights, 5.0, atol=0.05)
+
+    def test_noisy_year_without_smoothing(self):
+        """Test that pruning alone clears a year of unsmoothed 5-minute noise."""
+        times = np.arange('2025-01-01', '2026-01-01', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        events = find_high_low(times, m2_tide(times, noise=0.03))
+        self.assertTrue(np.all(events.kinds[1:] != events.kinds[:-1]))
+        # A noisy slack water at either end of the year may add or lose one
+        self.assertLessEqual(abs(len(events.times) - len(find_high_low(times, m2_tide(times)).times)), 1)
+
+    def test_repeated_timestamps(self):
+        """Test that readings reported twice (a zero median step) don't break smoothing."""
+        times = np.arange('2024-11-01', '2024-11-03', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        levels = m2_tide(times)
+        events = find_high_low(np.repeat(times, 2), np.repeat(levels, 2), smooth_minutes=30)
+        self.assertEqual(len(events.times), len(find_high_low(times, levels).times))
+        self.assertTrue(np.all(events.kinds[1:] != events.kinds[:-1]))
+
+    def test_smoothing_does_not_shift_events(self):
+        """Test that the centred moving average leaves event times in place."""
+        times = np.arange('2024-11-01', '2024-11-03', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        levels = m2_tide(times)
+        for minutes in (25, 30):
+            shift = find_high_low(times, levels, smooth_minutes=minutes).times - find_high_low(times, levels).times
+            self.assertLessEqual(np.max(np.abs(shift.astype(np.int64))), 5)
+
+    def test_gaps_and_short_input(self):
+        """Test that NaN readings are skipped and tiny inputs give no events."""
+        times = np.arange('2024-11-01', '2024-11-02', np.timedelta64(10, 'm'), dtype='datetime64[s]')
+        levels = m2_tide(times)
+        levels[40:50] = np.nan
+        self.assertGreater(len(find_high_low(times, levels).times), 0)
+        self.assertEqual(len(find_high_low(times[:2], levels[:2]).times), 0)
+
+    def test_year_of_predictions(self):
+        """Test a year of 5-minute predictions: every high and low, alternating."""
+        model = HarmonicModel(2.9, {'M2': (1.6, 110.0), 'S2': (0.55, 150.0), 'M4': (0.05, 20.0)})
+        series = model.predict_series("2025-01-01T00:00:00Z", "2026-01-01T00:00:00Z", 5)
+        events = series.high_low()
+        self.assertIn(len(events.times), range(1400, 1420))
+        self.assertTrue(np.all(events.kinds[1:] != events.kinds[:-1]))
+
+
+class TestTideTimesRows(unittest.TestCase):
+    """Test cases for tide_times_rows."""
+
+    def test_rows_match_importer_shape(self):
+        """Test morning/afternoon slots and the importer's row shape."""
+        times = np.arange('2024-10-31T18:00', '2024-11-02T00:00', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        rows = tide_times_rows(find_high_low(times, m2_tide(times)))
+        first = rows[0]
+        self.assertEqual(first['date'], '2024-11-01')
+        self.assertEqual((first['country'], first['city'], first['post_code']), ('Ireland', 'Galway', 'H91'))
+        # Dublin is on UTC in November
+        self.assertEqual(first['morning_high_time'], '00:00')
+        self.assertEqual(first['afternoon_high_time'], '12:25')
+        self.assertEqual(first['afternoon_high_height'], 5.0)
+        self.assertEqual(first['morning_low_height'], 1.0)
+        self.assertRegex(first['afternoon_low_time'], r'^18:\d{2}$')
+
+    def test_local_time_zone(self):
+        """Test that times and dates are converted to the given zone."""
+        times = np.arange('2024-10-31T18:00', '2024-11-02T00:00', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        rows = tide_times_rows(find_high_low(times, m2_tide(times)), tz='America/New_York')
+        self.assertEqual(rows[0]['date'], '2024-10-31')
+        self.assertEqual(rows[0]['afternoon_high_time'], '20:00')
+
+    def test_missing_slot_is_none(self):
+        """Test that a half-day without an event of a kind leaves None."""
+        times = np.arange('2024-11-01T02:00', '2024-11-01T11:00', np.timedelta64(5, 'm'), dtype='datetime64[s]')
+        rows = tide_times_rows(find_high_low(times, m2_tide(times)))
+        self.assertEqual(len(rows), 1)
+        self.assertIsNone(rows[0]['morning_high_time'])
+        self.assertIsNone(rows[0]['afternoon_low_height'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
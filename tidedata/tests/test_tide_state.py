@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the tide-state engine
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tide_state import TideStates, RISING, FALLING, UNKNOWN
+from series import TideSeries
+from marine_data_v2 import IrishMarineDataClient
+from fixtures import M2_HOURS, m2_tide
+
+
+def grid(start='2024-10-31T12:00', end='2024-11-02T12:00', minutes=5):
+    return np.arange(start, end, np.timedelta64(minutes, 'm'), dtype='datetime64[s]')
+
+
+class TestTideStates(unittest.TestCase):
+    """Test cases for TideStates."""
+
+    def test_rate_matches_derivative(self):
+        """Test the smoothed rate against the analytic rate of change."""
+        times = grid()
+        states = TideStates(times, m2_tide(times, noise=0.02, seed=5))
+        hours = (times - np.datetime64('2024-11-01T00:00:00')).astype(np.float64) / 3600
+        expected = -2.0 * 2 * np.pi / M2_HOURS * np.sin(2 * np.pi * hours / M2_HOURS)
+        np.testing.assert_allclose(states.rate[10:-10], expected[10:-10], atol=0.15)
+
+    def test_phase_and_next_events(self):
+        """Test phase through the cycle and the next high/low at mid-flood."""
+        times = grid()
+        states = TideStates(times, m2_tide(times))
+        mid_flood = states.at('2024-11-01T09:20')   # three hours after low water
+        self.assertEqual(mid_flood.state, RISING)
+        self.assertAlmostEqual(mid_flood.phase, 0.25, delta=0.01)
+        self.assertAlmostEqual(mid_flood.hours_to_next_high(), M2_HOURS - 9 - 20 / 60, delta=0.05)
+        self.assertAlmostEqual(mid_flood.next_high_height, 5.0, delta=0.01)
+        self.assertAlmostEqual(mid_flood.hours_to_next_low(), 1.5 * M2_HOURS - 9 - 20 / 60, delta=0.05)
+        self.assertEqual(states.at('2024-11-01T03:00').state, FALLING)
+        self.assertGreater(states.at('2024-11-01T03:00').phase, 0.5)
+
+    def test_rule_of_twelfths(self):
+        """Test that the twelfths estimate stays close to a sinusoidal tide."""
+        times = grid()
+        levels = m2_tide(times)
+        states = TideStates(times, levels)
+        inside = np.isfinite(states.twelfths_level)
+        self.assertGreater(inside.sum(), len(times) // 2)
+        self.assertLess(np.max(np.abs(states.twelfths_level[inside] - levels[inside])), 0.15)   # ~3% of the 4m range
+        self.assertTrue(np.isnan(states.phase[0]))   # before the first event
+
+    def test_lookup_regular_and_irregular(self):
+        """Test that direct indexing and searching give the same reading."""
+        times = grid()
+        regular = TideStates(times, m2_tide(times))
+        gappy = TideStates(np.delete(times, [5, 6, 7]), np.delete(m2_tide(times), [5, 6, 7]))
+        for when in ['2024-11-01T07:03', '2024-11-02T00:00', '2030-01-01T00:00', '2020-01-01T00:00']:
+            self.assertEqual(regular.at(when).time, gappy.at(when).time)
+        self.assertEqual(regular.at('2030-01-01').time, times[-1])
+
+    def test_regular_lookup_does_not_search(self):
+        """Test that lookups on a regularly sampled year index directly instead of searching."""
+        times = grid('2025-01-01', '2026-01-01')
+        states = TideStates(times, m2_tide(times))
+        with mock.patch.object(np, 'searchsorted', side_effect=AssertionError("searched")):
+            state = states.at('2025-06-01T12:03')
+        self.assertEqual(state.time, np.datetime64('2025-06-01T12:00:00'))
+
+    def test_empty_and_short(self):
+        """Test that too few readings give Unknown rather than an error."""
+        self.assertEqual(TideSeries.empty('Galway Port').tide_state(), UNKNOWN)
+        self.assertIsNone(TideSeries.empty('Galway Port').to_dict()['tide_now'])
+        with self.assertRaises(ValueError):
+            TideStates(np.array([], dtype='datetime64[s]'), np.array([])).at('2024-11-01')
+
+    def test_all_nan_levels(self):
+        """Test a gauge reporting only Malin levels: no state, and no error."""
+        times = grid()
+        series = TideSeries('Galway Port', times, {'water_level': np.full(len(times), np.nan),
+                                                   'water_level_malin': m2_tide(times)})
+        self.assertEqual(len(series.states()), 0)
+        self.assertEqual(series.tide_state(), UNKNOWN)
+        self.assertIsNone(series.to_dict()['tide_now'])
+        with self.assertRaises(ValueError):
+            series.states().latest()
+
+
+class TestTideSeriesStates(unittest.TestCase):
+    """Test cases for the states exposed on tide results."""
+
+    def test_series_and_dict(self):
+        """Test the cached states and the tide_now dictionary."""
+        times = grid()
+        series = TideSeries('Galway Port', times, {'water_level': m2_tide(times),
+                                                   'water_level_malin': np.full(len(times), np.nan)})
+        self.assertIs(series.states(), series.states())
+        data = series.to_dict()
+        self.assertEqual(data['tide_state'], data['tide_now']['state'])
+        self.assertEqual(data['tide_now']['timestamp'], '2024-11-02T11:55:00Z')
+        self.assertIsNotNone(data['tide_now']['rate_m_per_hour'])
+
+    def test_legacy_state_ignores_one_noisy_reading(self):
+        """Test that a single spike at the end no longer flips the state."""
+        client = IrishMarineDataClient()
+        rising = [{'level': level} for level in [1.0, 1.1, 1.2, 1.3, 1.4, 1.5, 0.9]]
+        self.assertEqual(client._calculate_tide_state(rising), RISING)
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test Suite for the tide-table HTML parser
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tide_table import parse_tide_table, tide_table_columns, read_tide_table, tokenize
+
+TIDE_TXT = os.path.join(os.path.dirname(__file__), '..', '..', 'tide.txt')
+
+# The sample row from import-tide-data.js
+SAMPLE_ROW = ('<tr class="row-364" style="display: none;"><td class="column-1" data-th="Date">29&nbsp;December&nbsp;2025</td>'
+              '<td class="column-2" data-th="Morning high water">🕐11:54<br> 4.23m</td>'
+              '<td class="column-3" data-th="Afternoon high water"></td>'
+              '<td class="column-4" data-th="Morning low water">🕐05:39<br> 1.84m</td>'
+              '<td class="column-5" data-th="Afternoon low water">🕐18:06<br> 1.54m</td></tr>')
+
+
+class TestTideTable(unittest.TestCase):
+    """Test cases for parsing tide-table HTML."""
+
+    def test_sample_row(self):
+        """Test the importer's sample row becomes one tide_times row."""
+        self.assertEqual(parse_tide_table(SAMPLE_ROW), [{
+            'country': 'Ireland', 'city': 'Galway', 'post_code': 'H91', 'date': '2025-12-29',
+            'morning_high_time': '11:54', 'morning_high_height': 4.23,
+            'afternoon_high_time': None, 'afternoon_high_height': None,
+            'morning_low_time': '05:39', 'morning_low_height': 1.84,
+            'afternoon_low_time': '18:06', 'afternoon_low_height': 1.54,
+        }])
+
+    def test_location_and_skipped_rows(self):
+        """Test location columns and that header or malformed rows are skipped."""
+        html = ('<tbody><tr><th>Date</th></tr>' + SAMPLE_ROW
+                + SAMPLE_ROW.replace('December', 'Decembre') + '</tbody>')
+        rows = parse_tide_table(html, country='Ireland', city='Clifden', post_code='H71')
+        self.assertEqual(len(tokenize(html)), 2)
+        self.assertEqual([(row['city'], row['post_code']) for row in rows], [('Clifden', 'H71')])
+
+    @unittest.skipUnless(os.path.exists(TIDE_TXT), "tide.txt not present")
+    def test_full_year(self):
+        """Test the repository's tide.txt: a year of rows."""
+        rows = read_tide_table(TIDE_TXT)
+        with open(TIDE_TXT, encoding='utf-8') as f:
+            self.assertEqual(len(rows), f.read().count('<tr'))   # every row, none dropped
+        self.assertEqual(len(rows), 365)
+        self.assertEqual(rows[0]['date'], '2025-01-01')
+        self.assertEqual(rows[0]['morning_high_time'], '05:48')
+        self.assertIsNone(rows[0]['afternoon_low_time'])
+        self.assertEqual(rows[-1]['date'], '2025-12-31')
+
+    @unittest.skipUnless(os.path.exists(TIDE_TXT), "tide.txt not present")
+    def test_columns(self):
+        """Test the typed column form of the table."""
+        with open(TIDE_TXT, encoding='utf-8') as f:
+            columns = tide_table_columns(f.read())
+        self.assertEqual(columns['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(len(columns['date']), 365)
+        self.assertEqual(columns['morning_high_time'][0], np.timedelta64(5 * 60 + 48, 'm'))
+        self.assertTrue(np.isnat(columns['afternoon_low_time'][0]))
+        self.assertTrue(np.isnan(columns['afternoon_low_height'][0]))
+        self.assertTrue(np.all(np.diff(columns['date']) == np.timedelta64(1, 'D')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)